@@ -48,6 +48,7 @@ config = {
     'my_app': ['src.globals', 'Globals'],
     'start_timeout': 120,  # default 60
     'login_timeout': 180, # my
+    'ocr_workers': 2,  # my, OcrService 后台识别实例数, 0 为不启用
     'wait_until_settle_time': 0,
     # required if using feature detection
     'template_matching': {
@@ -7,6 +7,8 @@ import custom.log_filter
 
 from src.task.BaseWWTask import BaseWWTask
 from src.task.DailyTask import DailyTask
+from src.task.OcrService import start_ocr_service
+from src.task.RegionWatch import RegionWatch
 
 import time
 import re
@@ -14,6 +16,7 @@ from custom.time_utils import now, format_timestamp, minutes_until_next_daily
 from custom.ui_boxes import get_ui_box
 
 import subprocess
+import threading
 
 from custom.env_vars import env
 
@@ -21,9 +24,18 @@ def start_ok() -> OK:
     config["use_gui"] = False
     ok = OK(config)
     initialize_my_app(ok)
+    prewarm_ocr(ok)
     return ok
 
 
+def prewarm_ocr(ok: OK) -> None:
+    """Create the OCR engines in background threads so the first OCR on the task thread does not wait for them."""
+    workers = config.get("ocr_workers", 2)
+    if workers > 0:
+        start_ocr_service(config.get("ocr"), workers=workers)
+    threading.Thread(target=ok.task_executor.ocr_lib, name="PrewarmOCR", daemon=True).start()
+
+
 def initialize_my_app(ok: OK) -> None:
     if og.my_app is not None:
         return
@@ -80,6 +92,9 @@ def auto_login(ok: OK, total_timeout: int = 300) -> None:
         logger.info("MY-OK-WW: Already in main. No need to login")
         return
 
+    # 登录界面静止时不再重复识别更新提醒, 只在界面变化后识别
+    notice_watch = RegionWatch(settle_time=0.5)
+
     def handle_update_restart():
         notice = task.wait_ocr(
             box=task.box_of_screen(*get_ui_box("登录界面更新提醒")),
@@ -87,6 +102,7 @@ def auto_login(ok: OK, total_timeout: int = 300) -> None:
             time_out=1,
             raise_if_not_found=False,
             settle_time=0.5,
+            watch=notice_watch,
         )
         if notice is None:
             return
@@ -217,16 +233,8 @@ def my_read_live_stamina(task: BaseWWTask) -> tuple[int | None, int | None]:
         #if stamina < 0:
         #    return None, None
 
-        stamina_box = task.wait_ocr(
-            box=task.box_of_screen(*get_ui_box("F2书体力")),
-            raise_if_not_found=False,
-            match=stamina_re,
-        )
-        backup_stamina_box = task.wait_ocr(
-            box=task.box_of_screen(*get_ui_box("F2书后备体力")),
-            raise_if_not_found=False,
-            match=backup_stamina_re,
-        )
+        stamina_box = task.wait_read_number(task.box_of_screen(*get_ui_box("F2书体力")), stamina_re)
+        backup_stamina_box = task.read_number(task.box_of_screen(*get_ui_box("F2书后备体力")), backup_stamina_re)
         if stamina_box:
             stamina = int(stamina_box[0].name.split('/')[0])
         else:
@@ -256,10 +264,9 @@ def read_echo_number(task: BaseWWTask, *, retries: int = 3, retry_sleep: float =
             task.sleep(2)
             task.click_relative(0.04, 0.3)
 
-            echo_number_box = task.wait_ocr(
-                box=task.box_of_screen(*get_ui_box("背包声骸数量")),
-                match=echo_number_re,
-                raise_if_not_found=False,
+            echo_number_box = task.wait_read_number(
+                task.box_of_screen(*get_ui_box("背包声骸数量")),
+                echo_number_re,
                 time_out=ocr_timeout,
                 settle_time=0.5,
             )
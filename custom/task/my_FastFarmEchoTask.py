@@ -32,15 +32,19 @@ class FastFarmEchoTask(BaseCombatTask):
     def run(self):
         farm_target = self.config.get('Repeat Farm Count', 0)
         self.info_set("Fight Count", 0)
+        self.profiler.start_session(self.__class__.__name__)
 
         self.ensure_main(esc=True, time_out= 60)
         self.run_until(self.in_combat, 'w', time_out=10, running=True)
 
-        for idx in range(farm_target):
-            self.log_info(f'战斗: {idx + 1}/{farm_target}')
-            self.combat_once(wait_combat_time=300, raise_if_not_found=False)
-            self._pickup_echo()
-            self.info_incr("Fight Count", 1)
+        try:
+            for idx in range(farm_target):
+                self.log_info(f'战斗: {idx + 1}/{farm_target}')
+                self.combat_once(wait_combat_time=300, raise_if_not_found=False)
+                self._pickup_echo()
+                self.info_incr("Fight Count", 1)
+        finally:
+            self.report_char_profiles()
 
         logger.info(f"MY-OK-WW: {farm_target} 次战斗已完成")
         self.info_set("Fight Count", farm_target)
@@ -55,20 +59,27 @@ class FastFarmEchoTask(BaseCombatTask):
         """
         Robust, non-blocking combat detection:
         - Only rely on health bar visibility (no retarget waits).
-        - Keep a short grace window to avoid flapping when the bar flickers.
+        - Skip the health bar check within the adaptive check interval while the fight is stable.
+        - Keep a short grace window (interval + 0.3s) to avoid flapping when the bar flickers.
         """
         now = time.time()
+        if self._in_combat and now - self.last_combat_check < self.combat_check_interval:
+            return True
 
+        start = time.perf_counter()
         if self.check_health_bar():
+            changed = not self._in_combat
             self._in_combat = True
             self.last_combat_check = now
+            self.update_combat_check_interval(time.perf_counter() - start, changed)
             return True
 
         if self._in_combat:
             if self.combat_end_condition and self.combat_end_condition():
                 return self.reset_to_false(recheck=False, reason='end condition reached')
-            if now - self.last_combat_check < 0.8:
+            if now - self.last_combat_check < self.combat_check_interval + 0.3:
                 return True
+            self.update_combat_check_interval(time.perf_counter() - start, True)
         return False
 
     def target_enemy(self, wait=True):
@@ -96,6 +107,12 @@ class FastFarmEchoTask(BaseCombatTask):
         """
         self.sleep(timeout)
 
+    def sleep_until_check_combat(self, deadline, check_combat=True, name='sleep'):
+        """
+        Deadline-based sleeps (continues_normal_attack, sleep_until) skip the combat guard too.
+        """
+        self.timing.sleep_until(deadline, name)
+
     def load_chars(self):
         """
         Detect team once and reuse to avoid repeated team-size changes or resets.
@@ -6,6 +6,7 @@ from ok import Logger
 logger = Logger.get_logger(__name__)
 
 from src.task.BaseWWTask import BaseWWTask
+from src.task.OcrNumber import NUMBER_CHARS
 from custom.ui_boxes import get_ui_box
 
 
@@ -71,7 +72,8 @@ class FiveToOneTask(BaseWWTask):
         """
         Read the current merge count from the bottom-right text "数据融合次数：num".
         """
-        result = self.ocr(*get_ui_box("数据坞数据融合次数"), match=re.compile(r"数据融合次数[:：]\s*\d+"))
+        result = self.read_number(get_ui_box("数据坞数据融合次数"), re.compile(r"数据融合次数[:：]\s*\d+"),
+                                  chars=NUMBER_CHARS + "数据融合次:：")
         if not result:
             return None
         match = re.search(r"数据融合次数[:：]\s*(\d+)", result[0].name)
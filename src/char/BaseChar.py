@@ -7,6 +7,11 @@ import numpy as np  # noqa
 
 from ok import Config, Logger  # noqa
 from src import text_white_color  # noqa
+from src.char import HudGauge  # noqa
+from src.combat.CombatTrace import traced  # noqa
+from src.combat.PriorityTable import FRAME_INPUTS  # noqa
+from src.combat.Rotation import END, Rotation, Step  # noqa
+from src.combat.Timing import ActionQueue, CombatTiming  # noqa
 
 SKILL_TIME_OUT = 10
 
@@ -46,6 +51,7 @@ role_values = [role for role in Role]  # 角色定位枚举值的列表
 
 class BaseChar:
     """角色基类，定义了游戏角色的通用属性和行为。"""
+    priority_inputs = ('skills', 'current')  # 切人优先级依赖的输入, 见 switch_priority_inputs
 
     def __init__(self, task, index, res_cd=20, echo_cd=20, liberation_cd=25, char_name=None, confidence=1,
                  ring_index=-1):
@@ -86,6 +92,7 @@ class BaseChar:
         self.last_outro_time = -1
         self.confidence = confidence
         self.logger = Logger.get_logger(self.name)
+        self.actions = ActionQueue(getattr(task, 'timing', None) or CombatTiming(), self.name)  # 定时动作队列
 
     def skip_combat_check(self):
         """是否在某些操作中跳过战斗状态检查。
@@ -116,13 +123,18 @@ class BaseChar:
             return self.name == other.name and self.index == other.index
         return False
 
+    @traced('action')
     def perform(self):
         """执行当前角色的主要战斗行动序列。"""
         self.last_perform = time.time()
-        if self.need_fast_perform():
-            self.do_fast_perform()
-        else:
-            self.do_perform()
+        profile_start = self.task.profiler.begin_perform(self)
+        try:
+            if self.need_fast_perform():
+                self.do_fast_perform()
+            else:
+                self.do_perform()
+        finally:
+            self.task.profiler.end_perform(self, profile_start)
         self.logger.debug(f'set current char false {self.index}')
 
     def wait_down(self, click=True):
@@ -174,17 +186,8 @@ class BaseChar:
         self.task.click(*args, **kwargs)
 
     def do_perform(self):
-        """执行角色的标准战斗行动。"""
-        if self.has_intro:
-            self.logger.debug('has_intro wait click 1.2 sec')
-            self.continues_normal_attack(1.2, click_resonance_if_ready_and_return=True)
-        self.click_liberation(con_less_than=1)
-        if self.click_resonance()[0]:
-            return self.switch_next_char()
-        if self.click_echo():
-            return self.switch_next_char()
-        self.continues_normal_attack(0.31)
-        self.switch_next_char()
+        """执行角色的标准战斗行动 (见 base_rotation)。"""
+        base_rotation.run(self)
 
     def do_fast_perform(self):
         """执行角色的快速战斗行动 (通常在需要快速切换时)。"""
@@ -226,6 +229,7 @@ class BaseChar:
         """返回角色类名作为其字符串表示。"""
         return self.__class__.__name__
 
+    @traced('action')
     def switch_next_char(self, post_action=None, free_intro=False, target_low_con=False):
         """切换到下一个角色 (代理到 task.switch_next_char)。
 
@@ -251,11 +255,21 @@ class BaseChar:
         if sec > 0:
             self.task.sleep_check_combat(sec + self.sleep_adjust, check_combat=check_combat)
 
+    def sleep_until(self, deadline, check_combat=True):
+        """休眠到截止时间 (self.actions.timing 时钟), 不会因为多次短休眠累积误差。
+
+        Args:
+            deadline (float): 截止时间。
+            check_combat (bool, optional): 是否检查战斗状态。默认为 True。
+        """
+        self.task.sleep_until_check_combat(deadline + self.sleep_adjust, check_combat=check_combat)
+
     def alert_skill_failed(self):
         self.task.log_error(f'Click skill failed, check if the keybinding is correct in ok-ww settings!',
                             notify=True)
         self.task.screenshot('click_resonance too long, breaking')
 
+    @traced('action')
     def click_resonance(self, post_sleep=0, has_animation=False, send_click=True, animation_min_duration=0,
                         check_cd=False):
         """尝试点击并释放共鸣技能。
@@ -377,19 +391,23 @@ class BaseChar:
         current = time.time()
         if current - self.last_res > self.res_cd:  # count the first click only
             self.last_res = time.time()
+            self.task.cooldowns.on_cast(self, 'resonance', self.last_res)
 
     def update_liberation_cd(self):
         """更新共鸣解放的最后使用时间。"""
         current = time.time()
         if current - self.last_liberation > (self.liberation_cd - 2):  # count the first click only
             self.last_liberation = time.time()
+            self.task.cooldowns.on_cast(self, 'liberation', self.last_liberation)
 
     def update_echo_cd(self):
         """更新声骸技能的最后使用时间。"""
         current = time.time()
         if current - self.last_echo > self.echo_cd:  # count the first click only
             self.last_echo = time.time()
+            self.task.cooldowns.on_cast(self, 'echo', self.last_echo)
 
+    @traced('action')
     def click_echo(self, duration=0, sleep_time=0, time_out=1):
         """尝试点击并释放声骸技能。
 
@@ -458,6 +476,7 @@ class BaseChar:
         self._echo_available = False
         self._resonance_available = False
 
+    @traced('action')
     def click_liberation(self, con_less_than=-1, send_click=False, wait_if_cd_ready=0.1):
         """尝试点击并释放共鸣解放。
 
@@ -570,7 +589,7 @@ class BaseChar:
         Returns:
             Priority: 优先级数值。
         """
-        priority = self.do_get_switch_priority(current_char, has_intro, target_low_con)
+        priority = self.task.priority_table.priority(self, current_char, has_intro, target_low_con)
         if priority < Priority.MAX and time.time() - self.last_switch_time < 0.9 and not has_intro:
             return Priority.SWITCH_CD  # switch cd
         else:
@@ -688,7 +707,7 @@ class BaseChar:
         Returns:
             bool: 如果充满/可用则返回 True。
         """
-        box = self.task.box_of_screen_scaled(3840, 2160, 2251, 1993, 2311, 2016, name='forte_full', hcenter=True)
+        box = self.forte_full_box()
         white_percent = self.task.calculate_color_percentage(forte_white_color, box)
         # num_labels, stats = get_connected_area_by_color(box.crop_frame(self.task.frame), forte_white_color,
         #                                                 connectivity=8)
@@ -705,6 +724,73 @@ class BaseChar:
         self.task.draw_boxes('forte_full', box)
         return white_percent > 0.08
 
+    def forte_full_box(self):
+        return self.task.box_of_screen_scaled(3840, 2160, 2251, 1993, 2311, 2016, name='forte_full', hcenter=True)
+
+    def forte_white_percent(self):
+        """共鸣回路图标的白色像素百分比, 供技能事件监视使用 (不绘制调试框)。"""
+        return self.task.calculate_color_percentage(forte_white_color, self.forte_full_box())
+
+    def switch_priority_inputs(self):
+        """切人优先级 (do_get_switch_priority) 依赖的输入, 见 PriorityTable。
+
+        使用声明 priority_inputs 的类中的值; 如果子类又重写了优先级或技能可用判断, 则退化为每帧重新计算。
+
+        Returns:
+            tuple: 输入名称。
+        """
+        cls = type(self)
+        owner = next(c for c in cls.__mro__ if 'priority_inputs' in c.__dict__)
+        if all(getattr(cls, name) is getattr(owner, name) for name in priority_input_methods):
+            return owner.priority_inputs
+        return FRAME_INPUTS
+
+    def switch_priority_cacheable(self):
+        """切人优先级是否可以跨帧复用 (不依赖每帧变化的输入)。
+
+        Returns:
+            bool: 如果可以跨帧复用则返回 True。
+        """
+        return 'frame' not in self.switch_priority_inputs()
+
+    def skill_event_time(self, event_type):
+        """获取本角色最近一次技能事件 (如 SkillEventType.LIBERATION_READY) 发生的时间, 没有则返回 -1。"""
+        return self.task.skill_events.get_event_time(self.index, event_type)
+
+    def calculate_color_percentage_in_masked(self, target_color, box, mask_r1_ratio=0.0, mask_r2_ratio=0.0):
+        """计算技能图标外圈圆环内目标颜色的像素比例。
+
+        Args:
+            target_color (dict): 目标颜色范围。
+            box (Box): 图标区域。
+            mask_r1_ratio (float): 圆环内半径与图标高度之比。
+            mask_r2_ratio (float): 圆环外半径与图标高度之比。
+
+        Returns:
+            float: 目标颜色像素占圆环面积的比例。
+        """
+        cropped = box.crop_frame(self.task.frame)
+        return HudGauge.ring_color_percentage(cropped, target_color, mask_r1_ratio, mask_r2_ratio)
+
+    def calculate_forte_num(self, forte_color, box, num=1, min_freq=39, max_freq=41, min_amp=50):
+        """通过频谱分析计算分格共鸣回路的已充满格数, 从右往左找到第一个有条纹的格。
+
+        Args:
+            forte_color (dict): 共鸣回路条纹颜色范围。
+            box (Box): 共鸣回路区域。
+            num (int): 总格数。
+            min_freq (int): 满格条纹主频下限。
+            max_freq (int): 满格条纹主频上限。
+            min_amp (float): 主频幅度不低于此值也视为满格。
+
+        Returns:
+            int: 已充满的格数。
+        """
+        image = HudGauge.color_mask(box.crop_frame(self.task.frame), forte_color)
+        forte = HudGauge.count_segments_from_right(image, num, min_freq, max_freq, min_amp)
+        self.logger.info(f'Frequncy analysis with forte {forte}')
+        return forte
+
     def liberation_available(self):
         """判断共鸣解放是否可用。
 
@@ -723,6 +809,7 @@ class BaseChar:
         while self.time_elapsed_accounting_for_freeze(self.last_perform) < 1.1:
             self.task.click(interval=0.1)
 
+    @traced('action')
     def wait_switch_cd(self):
         since_last_switch = self.time_elapsed_accounting_for_freeze(self.last_perform)
         if since_last_switch < 1:
@@ -739,14 +826,17 @@ class BaseChar:
             click_resonance_if_ready_and_return (bool, optional): 如果共鸣技能可用, 是否立即释放并返回。默认为 False。
             until_con_full (bool, optional): 是否持续攻击直到协奏值满。默认为 False。
         """
-        start = time.time()
-        while time.time() - start < duration:
+        timing = self.actions.timing
+        start = timing.now()
+        target = start
+        while timing.now() - start < duration:
             if click_resonance_if_ready_and_return and self.resonance_available():
                 return self.click_resonance()
             if until_con_full and self.is_con_full():
                 return
-            self.task.click()
-            self.sleep(interval)
+            self.actions.run_at(target, 'attack', self.task.click)
+            target = max(target + interval, timing.now())  # 落后时不补点, 从当前时间重新计时
+            self.sleep_until(target)
         self.sleep(after_sleep)
 
     def continues_click(self, key, duration, interval=0.1):
@@ -825,14 +915,10 @@ class BaseChar:
             bool: 如果需要则返回 True。
         """
         current_char = self.task.get_current_char(raise_exception=False)
-        for i, char in enumerate(self.task.chars):
-            if char == current_char:
-                pass
-            else:
-                priority = char.do_get_switch_priority(current_char=current_char, has_intro=False, target_low_con=False)
-                if priority >= Priority.FAST_SWITCH:
-                    self.logger.info(f'In lock with {char}')
-                    return True
+        for char, priority in self.task.priority_table.table(current_char):
+            if priority >= Priority.FAST_SWITCH:
+                self.logger.info(f'In lock with {char}')
+                return True
         return False
 
     def check_outro(self):
@@ -1059,3 +1145,20 @@ dot_color = {  # 用于检测技能冷却CD提示点 (通常在技能图标下
     'g': (195, 255),  # Green range
     'b': (195, 255)  # Blue range
 }
+
+priority_input_methods = (  # do_get_switch_priority 读取的方法, 被重写则声明的 priority_inputs 不再成立。
+    'do_get_switch_priority', 'count_base_priority', 'count_liberation_priority', 'count_resonance_priority',
+    'count_echo_priority', 'count_forte_priority', 'resonance_available', 'echo_available', 'liberation_available',
+    'available', 'is_forte_full'
+)
+
+base_rotation = Rotation('base', [  # 标准循环: 入场 -> 解放 -> 共鸣/声骸 -> 普攻 -> 切人
+    Step('intro', lambda c: c.continues_normal_attack(1.2, click_resonance_if_ready_and_return=True),
+         when=lambda c, hud: hud.intro),
+    Step('liberation', lambda c: c.click_liberation(con_less_than=1), when=lambda c, hud: hud.liberation,
+         probes=('liberation', 'resonance', 'echo')),
+    Step('resonance', lambda c: c.click_resonance()[0], when=lambda c, hud: hud.resonance, then='switch'),
+    Step('echo', lambda c: c.click_echo(), when=lambda c, hud: hud.echo, then='switch'),
+    Step('attack', lambda c: c.continues_normal_attack(0.31)),
+    Step('switch', lambda c: c.switch_next_char(), then=END),
+])
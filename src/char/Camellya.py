@@ -1,12 +1,12 @@
 import time
-from decimal import Decimal, ROUND_HALF_UP, ROUND_DOWN, ROUND_UP
-from ok import color_range_to_bound
+from decimal import Decimal, ROUND_HALF_UP
 from src.char.BaseChar import BaseChar, Priority
-import cv2
+from src.char import HudGauge
 import numpy as np
 
 
 class Camellya(BaseChar):
+    priority_inputs = ('skills', 'current')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -117,38 +117,9 @@ class Camellya(BaseChar):
         return red_percent > 0.1
 
     def calculate_color_percentage_in_masked(self, target_color, box, mask_r1_ratio=0.0, mask_r2_ratio=0.0):
-        cropped = box.crop_frame(self.task.frame).copy()
-        if cropped is None or cropped.size == 0:
-            return 0.0
-        h, w = cropped.shape[:2]
-
-        center = (w // 2, h // 2)
-        r1, r2 = h * mask_r1_ratio, h * mask_r2_ratio
-        r1 = Decimal(str(r1)).quantize(Decimal('0'), rounding=ROUND_DOWN)
-        r2 = Decimal(str(r2)).quantize(Decimal('0'), rounding=ROUND_UP)
-
-        ring_mask = np.zeros((h, w), dtype=np.uint8)
-        if r2 > 0:
-            cv2.circle(ring_mask, center, int(r2), 255, -1)
-        if r1 > 0:
-            cv2.circle(ring_mask, center, int(r1), 0, -1)
-        masked_image = cv2.bitwise_and(cropped, cropped, mask=ring_mask)
-
-        if masked_image.ndim == 3:
-            non_black_mask = np.all(masked_image != 0, axis=2)
-        else:
-            return 0.0
-
-        free_space = np.count_nonzero(non_black_mask)
-        if free_space == 0:
-            return 0.0
-
-        lower_bound, upper_bound = color_range_to_bound(target_color)
-        gray = cv2.inRange(masked_image, lower_bound, upper_bound)
-        colored_pixels = np.count_nonzero(gray == 255)
-
-        color_percent = colored_pixels / free_space
-        return color_percent
+        # 图标圆环内有黑色镂空, 以非黑像素为分母
+        cropped = box.crop_frame(self.task.frame)
+        return HudGauge.ring_color_percentage_non_black(cropped, target_color, mask_r1_ratio, mask_r2_ratio)
 
     def ephemeral_cast(self):
         self.check_combat()
@@ -169,104 +140,10 @@ class Camellya(BaseChar):
             self.logger.debug(f'forte_percent {forte_percent * 100:.2f}% budding {budding}')
         return forte_percent
 
-    def detect_stripe_region(self, gray: np.ndarray, white_ratio_range=(0.05, 0.75),
-                             fft_thresh_ratio: float = 0.45, max_fail_count: int = 1) -> tuple:
-        height, width = gray.shape[:2]
-        if height == 0 or width < 64 or not np.any((gray == 0) | (gray == 255)):
-            return -1, -1
-        if not np.any((gray == 255)):
-            return 0, 0
-
-        def remove_short_stripes(gray: np.ndarray, threshold=3) -> np.ndarray:
-            if threshold < 1:
-                return gray
-
-            result = gray.copy()
-            height, width = gray.shape
-
-            for y in range(height):
-                row = gray[y]
-                x = 0
-                while x < width:
-                    if row[x] == 255:
-                        start = x
-                        while x < width and row[x] == 255:
-                            x += 1
-                        length = x - start
-                        if length < threshold:
-                            result[y, start:x] = 0
-                    else:
-                        x += 1
-            return result
-
-        win_w = max(8, int(width * 0.045))
-        step = max(1, int(width * 0.012))
-        gray = remove_short_stripes(gray, int(width * 0.009))
-
-        scores = []
-        positions = []
-        start_x = None
-        end_x = None
-        fail_count = 0
-        x = 0
-        while x + win_w <= width:
-            window = gray[:, x:x + win_w]
-            white_ratio = np.count_nonzero(window == 255) / window.size
-            if not (white_ratio_range[0] <= white_ratio <= white_ratio_range[1]):
-                score = 0
-            else:
-                profile = np.sum(window == 255, axis=0).astype(np.float32)
-                profile -= np.mean(profile)
-                spectrum = np.abs(np.fft.fft(profile))[:win_w // 2]
-                score = np.max(spectrum[1:])
-            scores.append(score)
-            positions.append((x, x + win_w))
-            x += step
-
-        if len(scores) == 0:
-            return -1, -1
-
-        scores = np.array(scores)
-        max_score = np.max(scores)
-        fft_thresh = max(1.5, max_score * fft_thresh_ratio)
-
-        if max_score < 1e-3:
-            return 0, 0
-
-        keep = scores >= fft_thresh
-
-        fail_count = 0
-        end_idx = 0
-        for i in range(len(keep)):
-            if keep[i]:
-                end_idx = i
-                fail_count = 0
-            else:
-                a, b = positions[i]
-                window = gray[:, a:b]
-                white_ratio = np.count_nonzero(window == 255) / window.size
-                if white_ratio < 0.375:
-                    if np.any(scores[i + 1:] > fft_thresh):
-                        return -2, -2
-                    fail_count += 1
-                    if fail_count >= max_fail_count:
-                        break
-
-        start_x = 0
-        if end_idx == 0:
-            end_x = 0
-        else:
-            if positions[end_idx][1] + step >= width:
-                end_x = width
-            else:
-                end_x = positions[end_idx][0]
-        return start_x, end_x
-
     def calculate_forte_percent(self, forte_color, box):
         cropped = box.crop_frame(self.task.frame)
-        lower_bound, upper_bound = color_range_to_bound(forte_color)
-        gray = cv2.inRange(cropped, lower_bound, upper_bound)
-        start_x, end_x = self.detect_stripe_region(gray)
+        gray = HudGauge.color_mask(cropped, forte_color)
+        start_x, end_x = HudGauge.detect_stripe_region(gray)
         if start_x == -2:
             self.logger.debug(f'calculate_forte_percent failed due to interference')
             return -1
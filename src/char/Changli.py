@@ -1,12 +1,11 @@
 import time
-import cv2
-import numpy as np
 
-from ok import color_range_to_bound
 from src.char.BaseChar import BaseChar, Priority, forte_white_color
+from src.combat.Rotation import END, Rotation, Step
 
 
 class Changli(BaseChar):
+    priority_inputs = ('skills', 'current')
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.enhanced_normal = False
@@ -16,40 +15,33 @@ class Changli(BaseChar):
         self.enhanced_normal = False
 
     def do_perform(self):
-        outro = False
-        forte = -1
-        if self.has_intro:
-            self.continues_normal_attack(0.3)
-            self.enhanced_normal = True
-        forte = self.judge_forte()
-        if self.enhanced_normal:
-            self.logger.debug('Changli has enhanced')
-            self.continues_normal_attack(0.2)
-            self.sleep(0.2)
-            if self.check_outro() in {'char_brant'}:
-                self.sleep(0.2)
-                self.do_perform_outro(self.judge_forte())
-                return self.switch_next_char()
-            if forte == 3:
-                self.sleep(0.2)
-                forte = self.judge_forte()
+        changli_rotation.run(self)
+
+    def intro_attack(self):
+        self.continues_normal_attack(0.3)
+        self.enhanced_normal = True
+
+    def brant_outro(self):
+        self.sleep(0.2)
+        self.do_perform_outro(self.judge_forte())
+        return True
+
+    def heavy_forte(self):
         self.enhanced_normal = False
-        if forte == 4 or self.is_mouse_forte_full():
-            if self.flying():
-                self.heavy_attack()
-            self.heavy_click_forte(check_fun=self.is_mouse_forte_full)
-            self.check_combat()
-            return self.switch_next_char()
-        if not (forte >= 3 and self.resonance_available()) and self.liberation_available():
-            if self.liberation_and_heavy():
-                return self.switch_next_char()
+        if self.flying():
+            self.heavy_attack()
+        self.heavy_click_forte(check_fun=self.is_mouse_forte_full)
+        self.check_combat()
+        return True
+
+    def end_enhanced(self):
+        self.enhanced_normal = False
+
+    def enhance_by_resonance(self):
         if self.flick_resonance(send_click=False):
             self.enhanced_normal = True
-            return self.switch_next_char()
-        if self.click_echo():
-            return self.switch_next_char()
-        self.continues_normal_attack(0.1)
-        self.switch_next_char()
+            return True
+        return False
 
     def do_perform_outro(self, forte):
         if forte == 3:
@@ -168,49 +160,29 @@ class Changli(BaseChar):
             return True
         return False
 
-    def judge_frequncy_and_amplitude(self, gray, min_freq, max_freq, min_amp):
-        height, width = gray.shape[:]
-        if height == 0 or width < 64 or not np.array_equal(np.unique(gray), [0, 255]):
-            return 0
-
-        profile = np.sum(gray == 255, axis=0).astype(np.float32)
-        profile -= np.mean(profile)
-        n = np.abs(np.fft.fft(profile))
-        amplitude = 0
-        frequncy = 0
-        i = 1
-        while i < width:
-            if n[i] > amplitude:
-                amplitude = n[i]
-                frequncy = i
-            i += 1
-        self.logger.debug(f'forte with freq {frequncy} & amp {amplitude}')
-        return (min_freq <= frequncy <= max_freq) or amplitude >= min_amp
-
-    def calculate_forte_num(self, forte_color, box, num=1, min_freq=39, max_freq=41, min_amp=50):
-        cropped = box.crop_frame(self.task.frame)
-        lower_bound, upper_bound = color_range_to_bound(forte_color)
-        image = cv2.inRange(cropped, lower_bound, upper_bound)
-
-        forte = 0
-        height, width = image.shape
-        step = int(width / num)
-
-        forte = num
-        left = step * (forte - 1)
-        while forte > 0:
-            gray = image[:, left:left + step]
-            score = self.judge_frequncy_and_amplitude(gray, min_freq, max_freq, min_amp)
-            if score:
-                break
-            left -= step
-            forte -= 1
-        self.logger.info(f'Frequncy analysis with forte {forte}')
-        return forte
-
 
 changli_red_color = {
     'r': (240, 255),  # Red range
     'g': (85, 105),  # Green range
     'b': (95, 115)  # Blue range
 }
+
+
+changli_rotation = Rotation('changli', [
+    Step('intro', Changli.intro_attack, when=lambda c, hud: hud.intro),
+    Step('enhanced', lambda c: c.continues_normal_attack(0.2), when=lambda c, hud: c.enhanced_normal),
+    Step('outro', Changli.brant_outro, when=lambda c, hud: c.enhanced_normal and c.check_outro() in {'char_brant'},
+         delay=lambda c, hud: 0.2 if c.enhanced_normal else 0, then='switch'),
+    # 强化普攻后第3格可能还在充能, 逐帧等待第4格, 不再固定休眠
+    Step('heavy', Changli.heavy_forte, when=lambda c, hud: hud.forte == 4 or hud.mouse_forte_full,
+         timeout=lambda c, hud: 0.2 if c.enhanced_normal and hud.forte == 3 else 0, then='switch',
+         otherwise='settle'),
+    Step('settle', Changli.end_enhanced),
+    Step('liberation', lambda c: c.liberation_and_heavy(),
+         when=lambda c, hud: not (hud.forte >= 3 and hud.resonance) and hud.liberation,
+         probes=('forte', 'resonance', 'liberation'), then='switch'),
+    Step('resonance', Changli.enhance_by_resonance, then='switch'),
+    Step('echo', lambda c: c.click_echo(), then='switch'),
+    Step('attack', lambda c: c.continues_normal_attack(0.1)),
+    Step('switch', lambda c: c.switch_next_char(), then=END),
+], probes={'forte': lambda c: c.judge_forte()})
@@ -1,101 +1,215 @@
-from src.char.Augusta import Augusta
-from src.char.Baizhi import Baizhi
+"""角色注册表: char_dict 把角色模板映射到模块名, get_char_class 在 get_char_by_pos 首次识别到角色时才导入其模块。
+
+队伍预设 (configs/_team_presets.json) 中的角色排在该位置的候选前面, 仍取所有模板中的最佳匹配, 顺序只影响平分时的结果;
+BaseCombatTask 会在后台线程中预先导入这些角色类。
+"""
+import importlib
+import threading
+
+import cv2
+
+from ok import Config, Logger
 from src.char.BaseChar import BaseChar, Elements
-from src.char.Brant import Brant
-from src.char.Calcharo import Calcharo
-from src.char.Camellya import Camellya
-from src.char.Cantarella import Cantarella
-from src.char.Carlotta import Carlotta
-from src.char.Cartethyia import Cartethyia
-from src.char.Changli import Changli
-from src.char.Chisa import Chisa
-from src.char.Chixia import Chixia
-from src.char.Ciaccona import Ciaccona
-from src.char.Danjin import Danjin
-from src.char.Douling import Douling
-from src.char.Encore import Encore
-from src.char.Galbrena import Galbrena
-from src.char.HavocRover import HavocRover
-from src.char.Iuno import Iuno
-from src.char.Jianxin import Jianxin
-from src.char.Jinhsi import Jinhsi
-from src.char.Jiyan import Jiyan
-from src.char.Linnai import Linnai
-from src.char.Lupa import Lupa
-from src.char.Mortefi import Mortefi
-from src.char.Phoebe import Phoebe
-from src.char.Phrolova import Phrolova
-from src.char.Qiuyuan import Qiuyuan
-from src.char.Roccia import Roccia
-from src.char.Sanhua import Sanhua
-from src.char.ShoreKeeper import ShoreKeeper
-from src.char.Taoqi import Taoqi
-from src.char.Verina import Verina
-from src.char.Xiangliyao import Xiangliyao
-from src.char.Yinlin import Yinlin
-from src.char.Youhu import Youhu
-from src.char.Yuanwu import Yuanwu
-from src.char.Zani import Zani
-from src.char.Zhezhi import Zhezhi
+
+logger = Logger.get_logger(__name__)
 
 char_dict = {
-    'char_yinlin': {'cls': Yinlin, 'res_cd': 12, 'echo_cd': 25, 'ring_index': Elements.ELECTRIC},
-    'char_verina': {'cls': Verina, 'res_cd': 12, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
-    'char_shorekeeper': {'cls': ShoreKeeper, 'res_cd': 15, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
-    'char_taoqi': {'cls': Taoqi, 'res_cd': 15, 'echo_cd': 25, 'ring_index': Elements.HAVOC},
-    'char_rover': {'cls': HavocRover, 'res_cd': 12, 'echo_cd': 25},
-    'char_rover_male': {'cls': HavocRover, 'res_cd': 12, 'echo_cd': 25},
-    'char_encore': {'cls': Encore, 'res_cd': 10, 'echo_cd': 25, 'ring_index': Elements.FIRE},
-    'char_jianxin': {'cls': Jianxin, 'res_cd': 12, 'echo_cd': 25, 'ring_index': Elements.WIND},
-    'char_sanhua': {'cls': Sanhua, 'res_cd': 10, 'echo_cd': 25, 'ring_index': Elements.ICE},
-    'char_sanhua2': {'cls': Sanhua, 'res_cd': 10, 'echo_cd': 25, 'ring_index': Elements.ICE},
-    'char_jinhsi': {'cls': Jinhsi, 'res_cd': 3, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
-    'char_jinhsi2': {'cls': Jinhsi, 'res_cd': 3, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
-    'char_yuanwu': {'cls': Yuanwu, 'res_cd': 3, 'echo_cd': 25, 'ring_index': Elements.ELECTRIC},
-    'chang_changli': {'cls': Changli, 'res_cd': 12, 'echo_cd': 25, 'ring_index': Elements.FIRE},
-    'char_changli2': {'cls': Changli, 'res_cd': 12, 'echo_cd': 25, 'ring_index': Elements.FIRE},
-    'char_chixia': {'cls': Chixia, 'res_cd': 9, 'echo_cd': 25, 'ring_index': Elements.FIRE},
-    'char_danjin': {'cls': Danjin, 'res_cd': 9999999, 'echo_cd': 25, 'ring_index': Elements.HAVOC},
-    'char_baizhi': {'cls': Baizhi, 'res_cd': 16, 'echo_cd': 25, 'ring_index': Elements.ICE},
-    'char_calcharo': {'cls': Calcharo, 'res_cd': 99999, 'echo_cd': 25, 'ring_index': Elements.ELECTRIC},
-    'char_jiyan': {'cls': Jiyan, 'res_cd': 16, 'echo_cd': 25, 'ring_index': Elements.WIND},
-    'char_mortefi': {'cls': Mortefi, 'res_cd': 14, 'echo_cd': 25, 'ring_index': Elements.FIRE},
-    'char_zhezhi': {'cls': Zhezhi, 'res_cd': 6, 'echo_cd': 25, 'ring_index': Elements.ICE},
-    'char_xiangliyao': {'cls': Xiangliyao, 'res_cd': 5, 'echo_cd': 25, 'ring_index': Elements.ELECTRIC},
-    'char_camellya': {'cls': Camellya, 'res_cd': 4, 'echo_cd': 25, 'ring_index': Elements.HAVOC},
-    'char_youhu': {'cls': Youhu, 'res_cd': 4, 'echo_cd': 25, 'ring_index': Elements.ICE},
-    'char_carlotta': {'cls': Carlotta, 'res_cd': 10, 'echo_cd': 25, 'ring_index': Elements.ICE},
-    'char_carlotta2': {'cls': Carlotta, 'res_cd': 10, 'echo_cd': 25, 'ring_index': Elements.ICE},
-    'char_roccia': {'cls': Roccia, 'res_cd': 10, 'echo_cd': 25, 'liberation_cd': 20, 'ring_index': Elements.HAVOC},
-    'char_phoebe': {'cls': Phoebe, 'res_cd': 12, 'echo_cd': 25, 'liberation_cd': 25, 'ring_index': Elements.SPECTRO},
-    'char_brant': {'cls': Brant, 'res_cd': 4, 'echo_cd': 25, 'liberation_cd': 24, 'ring_index': Elements.FIRE},
-    'char_cantarella': {'cls': Cantarella, 'res_cd': 10, 'echo_cd': 25, 'liberation_cd': 25,
+    'char_yinlin': {'module': 'Yinlin', 'res_cd': 12, 'echo_cd': 25, 'ring_index': Elements.ELECTRIC},
+    'char_verina': {'module': 'Verina', 'res_cd': 12, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
+    'char_shorekeeper': {'module': 'ShoreKeeper', 'res_cd': 15, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
+    'char_taoqi': {'module': 'Taoqi', 'res_cd': 15, 'echo_cd': 25, 'ring_index': Elements.HAVOC},
+    'char_rover': {'module': 'HavocRover', 'res_cd': 12, 'echo_cd': 25},
+    'char_rover_male': {'module': 'HavocRover', 'res_cd': 12, 'echo_cd': 25},
+    'char_encore': {'module': 'Encore', 'res_cd': 10, 'echo_cd': 25, 'ring_index': Elements.FIRE},
+    'char_jianxin': {'module': 'Jianxin', 'res_cd': 12, 'echo_cd': 25, 'ring_index': Elements.WIND},
+    'char_sanhua': {'module': 'Sanhua', 'res_cd': 10, 'echo_cd': 25, 'ring_index': Elements.ICE},
+    'char_sanhua2': {'module': 'Sanhua', 'res_cd': 10, 'echo_cd': 25, 'ring_index': Elements.ICE},
+    'char_jinhsi': {'module': 'Jinhsi', 'res_cd': 3, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
+    'char_jinhsi2': {'module': 'Jinhsi', 'res_cd': 3, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
+    'char_yuanwu': {'module': 'Yuanwu', 'res_cd': 3, 'echo_cd': 25, 'ring_index': Elements.ELECTRIC},
+    'chang_changli': {'module': 'Changli', 'res_cd': 12, 'echo_cd': 25, 'ring_index': Elements.FIRE},
+    'char_changli2': {'module': 'Changli', 'res_cd': 12, 'echo_cd': 25, 'ring_index': Elements.FIRE},
+    'char_chixia': {'module': 'Chixia', 'res_cd': 9, 'echo_cd': 25, 'ring_index': Elements.FIRE},
+    'char_danjin': {'module': 'Danjin', 'res_cd': 9999999, 'echo_cd': 25, 'ring_index': Elements.HAVOC},
+    'char_baizhi': {'module': 'Baizhi', 'res_cd': 16, 'echo_cd': 25, 'ring_index': Elements.ICE},
+    'char_calcharo': {'module': 'Calcharo', 'res_cd': 99999, 'echo_cd': 25, 'ring_index': Elements.ELECTRIC},
+    'char_jiyan': {'module': 'Jiyan', 'res_cd': 16, 'echo_cd': 25, 'ring_index': Elements.WIND},
+    'char_mortefi': {'module': 'Mortefi', 'res_cd': 14, 'echo_cd': 25, 'ring_index': Elements.FIRE},
+    'char_zhezhi': {'module': 'Zhezhi', 'res_cd': 6, 'echo_cd': 25, 'ring_index': Elements.ICE},
+    'char_xiangliyao': {'module': 'Xiangliyao', 'res_cd': 5, 'echo_cd': 25, 'ring_index': Elements.ELECTRIC},
+    'char_camellya': {'module': 'Camellya', 'res_cd': 4, 'echo_cd': 25, 'ring_index': Elements.HAVOC},
+    'char_youhu': {'module': 'Youhu', 'res_cd': 4, 'echo_cd': 25, 'ring_index': Elements.ICE},
+    'char_carlotta': {'module': 'Carlotta', 'res_cd': 10, 'echo_cd': 25, 'ring_index': Elements.ICE},
+    'char_carlotta2': {'module': 'Carlotta', 'res_cd': 10, 'echo_cd': 25, 'ring_index': Elements.ICE},
+    'char_roccia': {'module': 'Roccia', 'res_cd': 10, 'echo_cd': 25, 'liberation_cd': 20, 'ring_index': Elements.HAVOC},
+    'char_phoebe': {'module': 'Phoebe', 'res_cd': 12, 'echo_cd': 25, 'liberation_cd': 25, 'ring_index': Elements.SPECTRO},
+    'char_brant': {'module': 'Brant', 'res_cd': 4, 'echo_cd': 25, 'liberation_cd': 24, 'ring_index': Elements.FIRE},
+    'char_cantarella': {'module': 'Cantarella', 'res_cd': 10, 'echo_cd': 25, 'liberation_cd': 25,
                         'ring_index': Elements.HAVOC},
-    'char_zani': {'cls': Zani, 'res_cd': 5, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
-    'char_zani2': {'cls': Zani, 'res_cd': 5, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
-    'char_ciaccona': {'cls': Ciaccona, 'res_cd': 10, 'echo_cd': 25, 'liberation_cd': 20, 'ring_index': Elements.WIND},
-    'char_cartethyia': {'cls': Cartethyia, 'res_cd': 14, 'echo_cd': 25, 'liberation_cd': 20,
+    'char_zani': {'module': 'Zani', 'res_cd': 5, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
+    'char_zani2': {'module': 'Zani', 'res_cd': 5, 'echo_cd': 25, 'ring_index': Elements.SPECTRO},
+    'char_ciaccona': {'module': 'Ciaccona', 'res_cd': 10, 'echo_cd': 25, 'liberation_cd': 20, 'ring_index': Elements.WIND},
+    'char_cartethyia': {'module': 'Cartethyia', 'res_cd': 14, 'echo_cd': 25, 'liberation_cd': 20,
                         'ring_index': Elements.WIND},
-    'char_lupa': {'cls': Lupa, 'res_cd': 14, 'echo_cd': 25, 'liberation_cd': 20,
+    'char_lupa': {'module': 'Lupa', 'res_cd': 14, 'echo_cd': 25, 'liberation_cd': 20,
                   'ring_index': Elements.FIRE},
-    'char_phrolova': {'cls': Phrolova, 'res_cd': 12, 'echo_cd': 25, 'liberation_cd': 20,
+    'char_phrolova': {'module': 'Phrolova', 'res_cd': 12, 'echo_cd': 25, 'liberation_cd': 20,
                       'ring_index': Elements.HAVOC},
-    'Augusta': {'cls': Augusta, 'res_cd': 15, 'echo_cd': 25, 'liberation_cd': 25,
+    'Augusta': {'module': 'Augusta', 'res_cd': 15, 'echo_cd': 25, 'liberation_cd': 25,
                 'ring_index': Elements.ELECTRIC},
-    'char_iuno': {'cls': Iuno, 'res_cd': 8, 'echo_cd': 20, 'liberation_cd': 25,
+    'char_iuno': {'module': 'Iuno', 'res_cd': 8, 'echo_cd': 20, 'liberation_cd': 25,
                   'ring_index': Elements.WIND},
-    'char_galbrena': {'cls': Galbrena, 'res_cd': 5, 'echo_cd': 20, 'liberation_cd': 25,
+    'char_galbrena': {'module': 'Galbrena', 'res_cd': 5, 'echo_cd': 20, 'liberation_cd': 25,
                       'ring_index': Elements.FIRE},
-    'char_chouyuan': {'cls': Qiuyuan, 'res_cd': 10, 'echo_cd': 20, 'liberation_cd': 25,
+    'char_chouyuan': {'module': 'Qiuyuan', 'res_cd': 10, 'echo_cd': 20, 'liberation_cd': 25,
                       'ring_index': Elements.WIND},
-    'char_chisa': {'cls': Chisa, 'res_cd': 10, 'echo_cd': 20, 'liberation_cd': 25,
+    'char_chisa': {'module': 'Chisa', 'res_cd': 10, 'echo_cd': 20, 'liberation_cd': 25,
                    'ring_index': Elements.HAVOC},
-    'char_douling': {'cls': Douling, 'res_cd': 15, 'echo_cd': 25, 'liberation_cd': 25, 'ring_index': Elements.ELECTRIC},
-    'char_linnai': {'cls': Linnai, 'res_cd': 15, 'echo_cd': 25, 'liberation_cd': 25, 'ring_index': Elements.SPECTRO},
+    'char_douling': {'module': 'Douling', 'res_cd': 15, 'echo_cd': 25, 'liberation_cd': 25, 'ring_index': Elements.ELECTRIC},
+    'char_linnai': {'module': 'Linnai', 'res_cd': 15, 'echo_cd': 25, 'liberation_cd': 25, 'ring_index': Elements.SPECTRO},
 }
 
 char_names = char_dict.keys()
 
+_char_classes = {}  # 已导入的角色类, 按模块名缓存
+_load_lock = threading.Lock()
+_team_presets = None
+_prewarm_started = False
+
+
+def get_char_class(name):
+    """按 char_dict 中的名称获取角色类, 首次使用时才导入对应模块。
+
+    Args:
+        name (str): char_dict 的键, 例如 'char_yinlin'。
+
+    Returns:
+        type: 角色类。
+    """
+    module = char_dict[name]['module']
+    cls = _char_classes.get(module)
+    if cls is None:
+        with _load_lock:
+            cls = _char_classes.get(module)
+            if cls is None:
+                cls = getattr(importlib.import_module(f'src.char.{module}'), module)
+                _char_classes[module] = cls
+    return cls
+
+
+def loaded_char_classes():
+    """已导入的角色模块名列表。"""
+    return list(_char_classes)
+
+
+def team_presets():
+    """已保存的队伍预设, 持久化到 configs/_team_presets.json。
+
+    每个预设按位置记录角色的 char_dict 名称、ring_index、冷却和头像哈希:
+    {预设名: {'0': {'name': ..., 'ring_index': ..., 'res_cd': ..., 'echo_cd': ..., 'liberation_cd': ..., 'hash': ...}}}
+    """
+    global _team_presets
+    if _team_presets is None:
+        _team_presets = Config('_team_presets', {})
+    return _team_presets
+
+
+def saved_char_names(index=None):
+    """队伍预设中保存的角色名称 (去重, 按预设顺序), index 不为 None 时只取该位置的角色。"""
+    names = []
+    for preset in team_presets().values():
+        slots = preset.values() if index is None else [preset.get(str(index))]
+        for slot in slots:
+            name = slot.get('name') if isinstance(slot, dict) else None
+            if name in char_dict and name not in names:
+                names.append(name)
+    return names
+
+
+def prewarm_saved_team():
+    """导入队伍预设中角色的类, 使第一次识别角色时不必等待模块导入。"""
+    for name in saved_char_names():
+        try:
+            get_char_class(name)
+        except Exception as e:
+            logger.error(f'prewarm {name} failed', e)
+
+
+def prewarm_saved_team_async():
+    """在后台线程中预热一次队伍预设中的角色类。"""
+    global _prewarm_started
+    if _prewarm_started:
+        return
+    _prewarm_started = True
+    threading.Thread(target=prewarm_saved_team, name='char_prewarm', daemon=True).start()
+
+
+def slot_hash(task, box):
+    """队伍栏头像的差值哈希 (dHash, 64位), 用于快速确认该位置的角色没有变化。"""
+    image = box.crop_frame(task.frame)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hash_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def create_char(task, name, index, confidence=1, **overrides):
+    """按 char_dict 名称创建角色对象, overrides 可覆盖 res_cd/echo_cd/liberation_cd/ring_index。"""
+    info = dict(char_dict[name])
+    info.update({key: value for key, value in overrides.items() if value is not None})
+    cls = get_char_class(name)
+    return cls(task, index, info.get('res_cd'), info.get('echo_cd'), info.get('liberation_cd') or 25,
+               char_name=name, confidence=confidence, ring_index=info.get('ring_index', -1))
+
+
+def load_team_preset(task, preset_name):
+    """按预设创建角色对象, 没有预设返回 None。
+
+    Returns:
+        tuple[list[BaseChar], list[int]] | None: (角色列表, 头像哈希列表)。
+    """
+    preset = team_presets().get(preset_name)
+    if not preset:
+        return None
+    chars = []
+    hashes = []
+    for index in range(len(preset)):
+        slot = preset.get(str(index))
+        if not slot or slot.get('name') not in char_dict:
+            return None
+        chars.append(create_char(task, slot['name'], index, ring_index=slot.get('ring_index'),
+                                 res_cd=slot.get('res_cd'), echo_cd=slot.get('echo_cd'),
+                                 liberation_cd=slot.get('liberation_cd')))
+        hashes.append(int(slot.get('hash', '0'), 16))
+    logger.info(f'loaded team preset {preset_name} {chars}')
+    return chars, hashes
+
+
+def save_team_preset(preset_name, chars, hashes):
+    """保存识别到的队伍, 只有全部识别成功且与已保存的预设不同的队伍才会写入。
+
+    Returns:
+        bool: 是否保存。
+    """
+    if any(char is None or char.char_name not in char_dict for char in chars):
+        return False
+    preset = {
+        str(char.index): {'name': char.char_name, 'ring_index': char.ring_index, 'res_cd': char.res_cd,
+                          'echo_cd': char.echo_cd, 'liberation_cd': char.liberation_cd, 'hash': f'{slot:016x}'}
+        for char, slot in zip(chars, hashes)}
+    if team_presets().get(preset_name) == preset:
+        return False
+    team_presets()[preset_name] = preset
+    logger.info(f'saved team preset {preset_name} {chars}')
+    return True
+
 
 def get_char_by_pos(task, box, index, old_char):
     highest_confidence = 0
@@ -108,13 +222,13 @@ def get_char_by_pos(task, box, index, old_char):
             return old_char
 
     if not char:
-        char = task.find_best_match_in_box(box, char_names, threshold=0.6)
+        # 预设中该位置的角色排在前面, 只影响置信度相同时的选择, 仍然在所有角色中取最佳匹配
+        saved = saved_char_names(index)
+        char = task.find_best_match_in_box(box, saved + [other for other in char_names if other not in saved],
+                                           threshold=0.6)
         if char:
-            info = char_dict.get(char.name)
             name = char.name
-            cls = info.get('cls')
-            return cls(task, index, info.get('res_cd'), info.get('echo_cd'), info.get('liberation_cd') or 25,
-                       char_name=name, confidence=char.confidence, ring_index=info.get('ring_index', -1))
+            return create_char(task, name, index, confidence=char.confidence)
     task.log_info(f'could not find char {index} {info} {highest_confidence}')
     if old_char:
         return old_char
@@ -2,6 +2,7 @@ from src.char.BaseChar import BaseChar, Priority
 
 
 class Healer(BaseChar):
+    priority_inputs = ('skills',)
 
     def do_get_switch_priority(self, current_char, has_intro=False, target_low_con=False):
         if not has_intro and self.resonance_available() and self.liberation_available() and self.echo_available():
@@ -0,0 +1,197 @@
+"""角色HUD量表 (技能环、共鸣回路格数、条纹进度条) 的通用像素分析函数。
+
+掩码和颜色阈值按形状缓存, 分段/滑窗的频谱分析用 numpy 批量计算, 避免逐像素的 Python 循环。
+角色通过 BaseChar.calculate_forte_num 和 calculate_color_percentage_in_masked 使用这些函数。
+"""
+import math
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from ok import color_range_to_bound
+
+_bounds_cache = {}
+
+
+def color_bounds(color):
+    """缓存 color_range_to_bound 的结果, 颜色范围字典都是模块级常量。"""
+    key = tuple(color.items())
+    bounds = _bounds_cache.get(key)
+    if bounds is None:
+        bounds = color_range_to_bound(color)
+        _bounds_cache[key] = bounds
+    return bounds
+
+
+def color_mask(image, color):
+    lower_bound, upper_bound = color_bounds(color)
+    return cv2.inRange(image, lower_bound, upper_bound)
+
+
+@lru_cache(maxsize=64)
+def ring_mask(h, w, r1_ratio, r2_ratio):
+    """以图像中心为圆心的圆环掩码, 内半径向下取整, 外半径向上取整。
+
+    Returns:
+        tuple: (掩码, 掩码面积), 外半径不大于内半径时为 (None, 0)。
+    """
+    r1 = int(math.floor(h * r1_ratio))
+    r2 = int(math.ceil(h * r2_ratio))
+    if r2 <= r1:
+        return None, 0
+    mask = np.zeros((h, w), dtype=np.uint8)
+    center = (w // 2, h // 2)
+    cv2.circle(mask, center, r2, 255, -1)
+    if r1 > 0:
+        cv2.circle(mask, center, r1, 0, -1)
+    mask.flags.writeable = False
+    return mask, cv2.countNonZero(mask)
+
+
+def ring_color_percentage(image, color, r1_ratio, r2_ratio):
+    """圆环内目标颜色像素占圆环面积的比例。"""
+    if image is None or image.size == 0:
+        return 0.0
+    h, w = image.shape[:2]
+    mask, area = ring_mask(h, w, r1_ratio, r2_ratio)
+    if area == 0:
+        return 0.0
+    return cv2.countNonZero(cv2.bitwise_and(color_mask(image, color), mask)) / area
+
+
+def ring_color_percentage_non_black(image, color, r1_ratio, r2_ratio):
+    """圆环内目标颜色像素占圆环内非纯黑像素 (三通道都不为0) 的比例。"""
+    if image is None or image.size == 0 or image.ndim != 3:
+        return 0.0
+    h, w = image.shape[:2]
+    mask, area = ring_mask(h, w, r1_ratio, r2_ratio)
+    if area == 0:
+        return 0.0
+    ring = mask > 0
+    pixels = image[ring]
+    free_space = np.count_nonzero(np.all(pixels != 0, axis=1))
+    if free_space == 0:
+        return 0.0
+    lower_bound, upper_bound = color_bounds(color)
+    colored = np.count_nonzero(np.all((pixels >= lower_bound) & (pixels <= upper_bound), axis=1))
+    return colored / free_space
+
+
+def gray_mean_std(image):
+    """灰度均值和标准差, 用于判断图标是否高亮且有纹理。"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    mean, std = cv2.meanStdDev(gray)
+    return float(mean[0][0]), float(std[0][0])
+
+
+def segment_scores(binary, num, min_freq, max_freq, min_amp, count=None):
+    """把二值图按宽度均分为 num 段, 用列投影的频谱判断每段是否有规律的条纹 (即该格已充满)。
+
+    Args:
+        binary (np.ndarray): cv2.inRange 得到的二值图。
+        count (int, optional): 只计算前 count 段, 默认 num 段。
+
+    Returns:
+        tuple: (每段是否满足的 bool 数组, 每段主频, 每段主频幅度)。
+    """
+    height, width = binary.shape[:2]
+    step = int(width / num)
+    if count is None:
+        count = num
+    if count <= 0 or step < 64 or height == 0:
+        empty = np.zeros(max(count, 0))
+        return empty.astype(bool), empty, empty
+    profiles = np.count_nonzero(binary[:, :step * count], axis=0).astype(np.float32).reshape(count, step)
+    totals = profiles.sum(axis=1)
+    two_valued = (totals > 0) & (totals < height * step)
+    profiles -= profiles.mean(axis=1, keepdims=True)
+    spectrum = np.abs(np.fft.rfft(profiles, axis=1))
+    freqs = 1 + np.argmax(spectrum[:, 1:], axis=1)
+    amps = spectrum[np.arange(count), freqs]
+    scores = two_valued & (((min_freq <= freqs) & (freqs <= max_freq)) | (amps >= min_amp))
+    return scores, freqs, amps
+
+
+def count_segments_from_right(binary, num, min_freq, max_freq, min_amp):
+    """从右往左找到第一个满足的格, 返回格数 (0~num)。"""
+    scores, _, _ = segment_scores(binary, num, min_freq, max_freq, min_amp)
+    filled = np.flatnonzero(scores)
+    return int(filled[-1]) + 1 if len(filled) else 0
+
+
+def count_leading_segments(binary, num, min_freq, max_freq, min_amp):
+    """从左往右数连续满足的格数, 最后一段 (右边界贴边时) 不参与判断。"""
+    width = binary.shape[1]
+    step = int(width / num)
+    if step <= 0:
+        return 0
+    count = len(range(0, width - step, step))
+    scores, _, _ = segment_scores(binary, num, min_freq, max_freq, min_amp, count=count)
+    failed = np.flatnonzero(~scores)
+    return int(failed[0]) if len(failed) else int(len(scores))
+
+
+def remove_short_runs(binary, min_len):
+    """去掉每行中长度小于 min_len 的白色连续段。"""
+    if min_len <= 1:
+        return binary
+    white = binary == 255
+    if not white.any():
+        return binary
+    starts = white.copy()
+    starts[:, 1:] &= ~white[:, :-1]
+    run_ids = np.cumsum(starts.ravel()).reshape(white.shape)
+    lengths = np.bincount(run_ids[white])
+    keep = white & (lengths[run_ids] >= min_len)
+    return np.where(keep, binary, 0).astype(binary.dtype)
+
+
+def detect_stripe_region(binary, white_ratio_range=(0.05, 0.75), fft_thresh_ratio=0.45, max_fail_count=1):
+    """滑窗检测条纹进度条从左端开始的有效区域。
+
+    Returns:
+        tuple: (start_x, end_x); (-1, -1) 无法判断, (-2, -2) 有干扰。
+    """
+    height, width = binary.shape[:2]
+    if height == 0 or width < 64:
+        return -1, -1
+    if not np.any(binary == 255):
+        return 0, 0
+
+    win_w = max(8, int(width * 0.045))
+    step = max(1, int(width * 0.012))
+    binary = remove_short_runs(binary, int(width * 0.009))
+
+    column = np.count_nonzero(binary == 255, axis=0).astype(np.float32)
+    windows = np.lib.stride_tricks.sliding_window_view(column, win_w)[::step]
+    white_ratios = windows.sum(axis=1) / (height * win_w)
+    profiles = windows - windows.mean(axis=1, keepdims=True)
+    spectrum = np.abs(np.fft.fft(profiles, axis=1))[:, 1:win_w // 2]
+    scores = spectrum.max(axis=1)
+    scores[(white_ratios < white_ratio_range[0]) | (white_ratios > white_ratio_range[1])] = 0
+
+    max_score = scores.max()
+    fft_thresh = max(1.5, max_score * fft_thresh_ratio)
+    if max_score < 1e-3:
+        return 0, 0
+
+    keep = scores >= fft_thresh
+    fail_count = 0
+    end_idx = 0
+    for i in range(len(keep)):
+        if keep[i]:
+            end_idx = i
+            fail_count = 0
+        elif white_ratios[i] < 0.375:
+            if np.any(scores[i + 1:] > fft_thresh):
+                return -2, -2
+            fail_count += 1
+            if fail_count >= max_fail_count:
+                break
+
+    if end_idx == 0:
+        return 0, 0
+    if end_idx * step + win_w + step >= width:
+        return 0, width
+    return 0, end_idx * step
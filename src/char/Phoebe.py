@@ -1,12 +1,9 @@
 import time
-import cv2
-import numpy as np
-import math
 from enum import Enum
 
 from src.char.BaseChar import BaseChar, Priority, forte_white_color
 from src.char.Healer import Healer
-from ok import color_range_to_bound
+from src.char import HudGauge
 
 
 class State(Enum):
@@ -225,35 +222,6 @@ class Phoebe(BaseChar):
     def heavy_attack_ready(self):
         return self.is_forte_full()
 
-    def calculate_color_percentage_in_masked(self, target_color, box, mask_r1_ratio=0.0, mask_r2_ratio=0.0):
-        cropped = box.crop_frame(self.task.frame)
-        if cropped is None or cropped.size == 0:
-            return 0.0
-        h, w = cropped.shape[:2]
-
-        r1 = int(math.floor(h * mask_r1_ratio))
-        r2 = int(math.ceil(h * mask_r2_ratio))
-        if r2 <= r1:
-            return 0.0
-
-        center = (w // 2, h // 2)
-        ring_mask = np.zeros((h, w), dtype=np.uint8)
-        cv2.circle(ring_mask, center, r2, 255, -1)
-        if r1 > 0:
-            cv2.circle(ring_mask, center, r1, 0, -1)
-
-        lower_bound, upper_bound = color_range_to_bound(target_color)
-
-        color_mask = cv2.inRange(cropped, lower_bound, upper_bound)
-
-        combined_mask = cv2.bitwise_and(color_mask, ring_mask)
-
-        match_count = cv2.countNonZero(combined_mask)
-        total_mask_area = cv2.countNonZero(ring_mask)
-        if total_mask_area == 0:
-            return 0.0
-        return match_count / total_mask_area
-
     def get_prayer_condition(self):
         if not self.check_middle_star():
             return self.is_forte_full
@@ -353,52 +321,10 @@ class Phoebe(BaseChar):
             self.attribute = 1
         self.logger.debug(f"set attribute: {'support' if self.attribute == 2 else 'attacker'}")
 
-    def judge_frequncy_and_amplitude(self, gray, min_freq, max_freq, min_amp):
-        height, width = gray.shape[:]
-        if height == 0 or width < 64 or not np.array_equal(np.unique(gray), [0, 255]):
-            return 0
-
-        white_ratio = np.count_nonzero(gray == 255) / gray.size
-        profile = np.sum(gray == 255, axis=0).astype(np.float32)
-        profile -= np.mean(profile)
-        n = np.abs(np.fft.fft(profile))
-        amplitude = 0
-        frequncy = 0
-        i = 1
-        while i < width:
-            if n[i] > amplitude:
-                amplitude = n[i]
-                frequncy = i
-            i += 1
-        return (min_freq <= i <= max_freq) or amplitude >= min_amp
-
     def calculate_forte_num(self, forte_color, box, num=1, min_freq=39, max_freq=41, min_amp=50):
-        cropped = box.crop_frame(self.task.frame)
-        lower_bound, upper_bound = color_range_to_bound(forte_color)
-        image = cv2.inRange(cropped, lower_bound, upper_bound)
-
-        forte = 0
-        height, width = image.shape
-        step = int(width / num)
-        left = 0
-        fail_count = 0
-        warning = False
-        while left + step < width:
-            gray = image[:, left:left + step]
-            score = self.judge_frequncy_and_amplitude(gray, min_freq, max_freq, min_amp)
-            if fail_count == 0:
-                if score:
-                    forte += 1
-                else:
-                    fail_count += 1
-            else:
-                if score:
-                    warning = True
-                else:
-                    fail_count += 1
-            left += step
-        if warning:
-            self.logger.debug('Frequncy analysis error, return the forte before mistake.')
+        # 菲比的条纹主频不稳定, 只按幅度从左往右数连续满格
+        image = HudGauge.color_mask(box.crop_frame(self.task.frame), forte_color)
+        forte = HudGauge.count_leading_segments(image, num, -1, -1, min_amp)
         self.logger.debug(f'Frequncy analysis with forte {forte}')
         return forte
 
@@ -435,10 +361,7 @@ class Phoebe(BaseChar):
         self.task.draw_boxes(box.name, box)
         mean_val = contrast_val = 0
         if self.task.calculate_color_percentage(forte_white_color, box) > 0.08:
-            cropped = box.crop_frame(self.task.frame)
-            gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
-            mean_val = np.mean(gray)
-            contrast_val = np.std(gray)
+            mean_val, contrast_val = HudGauge.gray_mean_std(box.crop_frame(self.task.frame))
             self.logger.debug(f'is_forte_full mean {mean_val} contrast {contrast_val}')
         return mean_val > 190 and contrast_val > 40
 
@@ -1,12 +1,9 @@
 import time
 from decimal import Decimal, ROUND_UP, ROUND_HALF_UP
 from enum import Enum
-import cv2
-import numpy as np
-import math
 
 from src.char.BaseChar import BaseChar, Priority, forte_white_color
-from ok import color_range_to_bound
+from src.char import HudGauge
 
 class State(Enum):
     FORTE_FULL = 1
@@ -243,34 +240,6 @@ class Zani(BaseChar):
             return True
         return False
 
-    def calculate_color_percentage_in_masked(self, target_color, box, mask_r1_ratio=0.0, mask_r2_ratio=0.0):
-        cropped = box.crop_frame(self.task.frame)
-        if cropped is None or cropped.size == 0:
-            return 0.0
-        h, w = cropped.shape[:2]
-
-        r1 = int(math.floor(h * mask_r1_ratio))
-        r2 = int(math.ceil(h * mask_r2_ratio))
-        if r2 <= r1:
-            return 0.0
-
-        center = (w // 2, h // 2)
-        ring_mask = np.zeros((h, w), dtype=np.uint8)
-        cv2.circle(ring_mask, center, r2, 255, -1)
-        if r1 > 0:
-            cv2.circle(ring_mask, center, r1, 0, -1)
-
-        lower_bound, upper_bound = color_range_to_bound(target_color)
-
-        color_mask = cv2.inRange(cropped, lower_bound, upper_bound)
-
-        combined_mask = cv2.bitwise_and(color_mask, ring_mask)
-        match_count = cv2.countNonZero(combined_mask)
-        total_mask_area = cv2.countNonZero(ring_mask)
-        if total_mask_area == 0:
-            return 0.0
-        return match_count / total_mask_area
-    
     def nightfall_time_left(self):
         if self.nightfall_time <= 0:
             return 0
@@ -432,10 +401,7 @@ class Zani(BaseChar):
         self.task.draw_boxes(box.name, box)
         mean_val = contrast_val = 0
         if self.task.calculate_color_percentage(forte_white_color, box) > 0.08:
-            cropped = box.crop_frame(self.task.frame)
-            gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
-            mean_val = np.mean(gray)
-            contrast_val = np.std(gray)
+            mean_val, contrast_val = HudGauge.gray_mean_std(box.crop_frame(self.task.frame))
             self.logger.debug(f'is_forte_full mean {mean_val} contrast {contrast_val}')
         return mean_val > 200 and contrast_val > 40
 
@@ -1,9 +1,7 @@
 import time
-import cv2
-import numpy as np
 
-from ok import color_range_to_bound
 from src.char.BaseChar import BaseChar, Priority, text_white_color
+from src.combat.Rotation import END, Rotation, Step
 
 
 class Zhezhi(BaseChar):
@@ -20,25 +18,18 @@ class Zhezhi(BaseChar):
         self.forte = 0
 
     def do_perform(self):
-        if self.char_carlotta is not None:
-            return self.do_perform_interlock()
-        if self.has_intro:
-            self.continues_normal_attack(1.5)
-        self.click_liberation()
-        if (self._resonance_blue or self.resonance_blue()) and self.resonance_available():
-            self._resonance_blue = False
-            self.resonance_until_not_blue()
-            return self.switch_next_char()
-        elif self.resonance_available() and not self.is_forte_full():
-            pass
-        elif self.resonance_available() and self.is_forte_full():
-            self.click_resonance()
-            self.continues_normal_attack(0.8)
-            self._resonance_blue = True
-            return self.switch_next_char()
-        if not self.click_echo():
-            self.continues_normal_attack(0.1)
-        self.switch_next_char()
+        zhezhi_rotation.run(self)
+
+    def release_blue_resonance(self):
+        self._resonance_blue = False
+        self.resonance_until_not_blue()
+        return True
+
+    def kagane_resonance(self):
+        self.click_resonance()
+        self.continues_normal_attack(0.8)
+        self._resonance_blue = True
+        return True
 
     def resonance_until_not_blue(self):
         start = time.time()
@@ -117,46 +108,6 @@ class Zhezhi(BaseChar):
         self.logger.debug(f'zhezhi_kagane percent: {blue_percent}')
         return blue_percent > 0.3
 
-    def judge_frequncy_and_amplitude(self, gray, min_freq, max_freq, min_amp):
-        height, width = gray.shape[:]
-        if height == 0 or width < 64 or not np.array_equal(np.unique(gray), [0, 255]):
-            return 0
-
-        profile = np.sum(gray == 255, axis=0).astype(np.float32)
-        profile -= np.mean(profile)
-        n = np.abs(np.fft.fft(profile))
-        amplitude = 0
-        frequncy = 0
-        i = 1
-        while i < width:
-            if n[i] > amplitude:
-                amplitude = n[i]
-                frequncy = i
-            i += 1
-        self.logger.info(f'forte with freq {frequncy} & amp {amplitude}')
-        return (min_freq <= frequncy <= max_freq) or amplitude >= min_amp
-
-    def calculate_forte_num(self, forte_color, box, num=1, min_freq=39, max_freq=41, min_amp=50):
-        cropped = box.crop_frame(self.task.frame)
-        lower_bound, upper_bound = color_range_to_bound(forte_color)
-        image = cv2.inRange(cropped, lower_bound, upper_bound)
-
-        forte = 0
-        height, width = image.shape
-        step = int(width / num)
-
-        forte = num
-        left = step * (forte - 1)
-        while forte > 0:
-            gray = image[:, left:left + step]
-            score = self.judge_frequncy_and_amplitude(gray, min_freq, max_freq, min_amp)
-            if score:
-                break
-            left -= step
-            forte -= 1
-        self.logger.info(f'Frequncy analysis with forte {forte}')
-        return forte
-
     def resonance_available(self, current=None, check_ready=False, check_cd=False):
         if self.is_current_char and self.resonance_blue():
             return True
@@ -174,3 +125,18 @@ zhezhi_blue_color = {
     'g': (240, 255),  # Green range
     'b': (245, 255)  # Blue range
 }
+
+
+zhezhi_rotation = Rotation('zhezhi', [
+    Step('interlock', lambda c: c.do_perform_interlock() or True, when=lambda c, hud: c.char_carlotta is not None,
+         then=END),
+    Step('intro', lambda c: c.continues_normal_attack(1.5), when=lambda c, hud: hud.intro),
+    Step('liberation', lambda c: c.click_liberation(), when=lambda c, hud: hud.liberation,
+         probes=('liberation', 'resonance', 'resonance_blue')),
+    Step('blue', Zhezhi.release_blue_resonance,
+         when=lambda c, hud: (c._resonance_blue or hud.resonance_blue) and hud.resonance, then='switch'),
+    Step('kagane', Zhezhi.kagane_resonance, when=lambda c, hud: hud.resonance and hud.forte_full, then='switch'),
+    Step('echo', lambda c: c.click_echo(), then='switch'),
+    Step('attack', lambda c: c.continues_normal_attack(0.1)),
+    Step('switch', lambda c: c.switch_next_char(), then=END),
+], probes={'resonance_blue': lambda c: c.resonance_blue()})
@@ -0,0 +1,66 @@
+"""自适应战斗检测间隔: CombatCheck 用它调整 combat_check_interval, 并在信息面板显示为 Combat Check。
+
+上下限取自 CombatCheck.combat_check_min_interval 和 combat_check_max_interval, 子类可以覆盖。
+"""
+
+
+class AdaptiveInterval:
+    """根据检测耗时和状态变化频率自适应调整战斗检测间隔。
+
+    - 状态稳定 (连续检测结果不变) 时逐步放大间隔, 最多到 max_interval;
+    - 状态变化 (丢失目标/需要重新锁定/战斗结束) 或 boss 低血量时立即收缩到 min_interval;
+    - 间隔不低于 cost_ratio 倍的平均检测耗时, 避免检测本身占满帧时间。
+    """
+
+    def __init__(self, interval=0.5, min_interval=0.2, max_interval=1.0, grow=1.25, shrink=0.5, cost_ratio=5,
+                 low_hp_ratio=0.3):
+        self.base_interval = interval
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.grow = grow
+        self.shrink = shrink
+        self.cost_ratio = cost_ratio
+        self.low_hp_ratio = low_hp_ratio
+        self.avg_cost = 0.0
+        self.checks = 0
+        self.changes = 0
+        self.stable_streak = 0
+
+    def reset(self):
+        self.interval = self.base_interval
+        self.stable_streak = 0
+
+    def record(self, cost, changed, hp_ratio=-1.0):
+        """记录一次检测。
+
+        Args:
+            cost (float): 本次检测耗时 (秒), 仅在状态未变化时计入平均耗时。
+            changed (bool): 状态是否发生变化。
+            hp_ratio (float, optional): boss 剩余血量比例, 未知为 -1。
+
+        Returns:
+            float: 新的检测间隔 (秒)。
+        """
+        self.checks += 1
+        if changed:  # 状态变化时的检测包含重新锁定等等待, 不计入耗时
+            self.changes += 1
+            self.stable_streak = 0
+            interval = self.interval * self.shrink
+        else:
+            self.avg_cost = cost if self.avg_cost == 0 else self.avg_cost * 0.8 + cost * 0.2
+            self.stable_streak += 1
+            interval = self.interval * self.grow if self.stable_streak >= 2 else self.interval
+        upper = self.max_interval
+        if 0 <= hp_ratio < self.low_hp_ratio:
+            upper = self.min_interval
+        lower = max(self.min_interval, self.avg_cost * self.cost_ratio)
+        self.interval = max(lower, min(upper, interval))
+        return self.interval
+
+    @property
+    def change_rate(self):
+        return self.changes / self.checks if self.checks else 0
+
+    def stats(self):
+        return f'{self.interval:.2f}s cost {self.avg_cost * 1000:.1f}ms change {self.change_rate:.0%}'
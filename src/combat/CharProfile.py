@@ -0,0 +1,207 @@
+"""按角色的耗时统计 (task.profiler), 每次运行结束时保存到 configs/char_profile.db。
+
+FarmEchoTask 和 FastFarmEchoTask 每次运行开始一个会话, 结束时调用 report_char_profiles(): 按空闲时间排序,
+并标出每次行动的空闲时间比最近几次会话明显变长的角色。
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from ok import Logger
+
+logger = Logger.get_logger(__name__)
+
+
+class CharProfile:
+    """一个角色在本次运行中的耗时统计 (秒)。"""
+    __slots__ = ('performs', 'field', 'probe', 'input', 'sleep', 'switches', 'switch_time')
+
+    def __init__(self, performs=0, field=0.0, probe=0.0, input=0.0, sleep=0.0, switches=0, switch_time=0.0):
+        self.performs = performs
+        self.field = field
+        self.probe = probe
+        self.input = input
+        self.sleep = sleep
+        self.switches = switches
+        self.switch_time = switch_time
+
+    @property
+    def idle_per_perform(self):
+        return self.sleep / self.performs if self.performs else 0
+
+    @property
+    def switch_latency(self):
+        return self.switch_time / self.switches if self.switches else 0
+
+    def as_row(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __str__(self):
+        field = self.field or 1
+        return (f'{self.performs} performs, field {self.field:.1f}s, probe {self.probe / field:.0%}, '
+                f'input {self.input / field:.0%}, idle {self.sleep / field:.0%} '
+                f'({self.idle_per_perform * 1000:.0f}ms/perform), switch {self.switch_latency * 1000:.0f}ms')
+
+
+class CharProfiler:
+    """按角色统计场上时间及其中HUD探测/输入/等待的耗时和切人延迟, 每次运行保存到本地 sqlite 数据库。
+
+    区间类型: probe (找图/颜色/OCR), input (按键/点击), sleep (休眠/等待下一帧)。
+    嵌套的统计区间互斥计时 (例如按键后的 sleep 计入等待而不是输入); 没有角色在场上时不统计。
+    """
+
+    def __init__(self, db_path=os.path.join('configs', 'char_profile.db'), history=5, regression_ratio=1.25,
+                 regression_min=0.1):
+        """
+        Args:
+            db_path (str): 数据库路径。
+            history (int): 与之前多少次运行比较。
+            regression_ratio (float): 每次行动的等待时间超过历史平均多少倍视为退化。
+            regression_min (float): 同时至少增加多少秒才视为退化。
+        """
+        self.db_path = db_path
+        self.history = history
+        self.regression_ratio = regression_ratio
+        self.regression_min = regression_min
+        self.profiles = {}  # char_name -> CharProfile
+        self.session_id = None
+        self.task_name = ''
+        self._char = None
+        self._stack = []  # [kind, 区间开始或恢复的时间]
+
+    def start_session(self, task_name):
+        """开始一次新的运行统计。"""
+        self.profiles.clear()
+        self.session_id = None
+        self.task_name = task_name
+
+    def _profile(self, char):
+        profile = self.profiles.get(char.char_name)
+        if profile is None:
+            profile = self.profiles[char.char_name] = CharProfile()
+        return profile
+
+    def begin_perform(self, char):
+        self._char = char
+        self._stack.clear()
+        return time.perf_counter()
+
+    def end_perform(self, char, start):
+        profile = self._profile(char)
+        profile.performs += 1
+        profile.field += time.perf_counter() - start
+        self._char = None
+        self._stack.clear()
+
+    def enter(self, kind):
+        """进入一个统计区间, 暂停外层区间的计时。"""
+        if self._char is None:
+            return
+        now = time.perf_counter()
+        if self._stack:
+            outer = self._stack[-1]
+            self._add(outer[0], now - outer[1])
+        self._stack.append([kind, now])
+
+    def exit(self):
+        if self._char is None or not self._stack:
+            return
+        now = time.perf_counter()
+        kind, start = self._stack.pop()
+        self._add(kind, now - start)
+        if self._stack:
+            self._stack[-1][1] = now
+
+    @contextmanager
+    def measure(self, kind):
+        self.enter(kind)
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def _add(self, kind, elapsed):
+        profile = self._profile(self._char)
+        setattr(profile, kind, getattr(profile, kind) + elapsed)
+
+    def record_switch(self, char, latency):
+        """记录一次从 char 切出的耗时 (从计算优先级开始到新角色在场上)。"""
+        profile = self._profile(char)
+        profile.switches += 1
+        profile.switch_time += latency
+
+    def ranking(self):
+        """按等待时间从多到少排序的 [(char_name, CharProfile)]。"""
+        return sorted(self.profiles.items(), key=lambda item: item[1].sleep, reverse=True)
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY AUTOINCREMENT, task TEXT, '
+                     'start REAL, end REAL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS char_stats (session_id INTEGER, char TEXT, performs INTEGER, '
+                     'field REAL, probe REAL, input REAL, sleep REAL, switches INTEGER, switch_time REAL, '
+                     'PRIMARY KEY (session_id, char))')
+        return conn
+
+    def save(self):
+        """保存本次运行的统计, 可以多次调用 (例如每场战斗结束)。"""
+        if not self.profiles:
+            return
+        try:
+            with self._connect() as conn:
+                now = time.time()
+                if self.session_id is None:
+                    self.session_id = conn.execute('INSERT INTO sessions (task, start, end) VALUES (?, ?, ?)',
+                                                   (self.task_name, now, now)).lastrowid
+                else:
+                    conn.execute('UPDATE sessions SET end = ? WHERE id = ?', (now, self.session_id))
+                conn.executemany('INSERT OR REPLACE INTO char_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                 [(self.session_id, name) + profile.as_row() for name, profile in
+                                  self.profiles.items()])
+            conn.close()
+        except Exception as e:
+            logger.error('save char profile failed', e)
+
+    def previous(self, char_name):
+        """之前几次运行中该角色的统计, 最近的在前。"""
+        try:
+            conn = self._connect()
+            rows = conn.execute(
+                'SELECT performs, field, probe, input, sleep, switches, switch_time FROM char_stats '
+                'WHERE char = ? AND session_id != ? AND performs > 0 ORDER BY session_id DESC LIMIT ?',
+                (char_name, self.session_id or -1, self.history)).fetchall()
+            conn.close()
+        except Exception as e:
+            logger.error('load char profile failed', e)
+            return []
+        return [CharProfile(*row) for row in rows]
+
+    def regression(self, char_name, profile):
+        """与之前的运行相比每次行动的等待时间明显增加时, 返回 (历史平均, 本次), 否则返回 None。"""
+        history = self.previous(char_name)
+        if not history or not profile.performs:
+            return None
+        baseline = sum(p.idle_per_perform for p in history) / len(history)
+        current = profile.idle_per_perform
+        if current > baseline * self.regression_ratio and current - baseline > self.regression_min:
+            return baseline, current
+        return None
+
+    def report(self):
+        """保存并输出按等待时间排序的角色报告, 标记相对之前运行的退化。
+
+        Returns:
+            list[str]: 报告的每一行。
+        """
+        self.save()
+        lines = []
+        for name, profile in self.ranking():
+            line = f'{name}: {profile}'
+            if regression := self.regression(name, profile):
+                line += f' [REGRESSION idle {regression[0] * 1000:.0f} -> {regression[1] * 1000:.0f}ms/perform]'
+            lines.append(line)
+        for line in lines:
+            logger.info(f'char profile {line}')
+        return lines
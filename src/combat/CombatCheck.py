@@ -1,18 +1,20 @@
 import re
 import time
 
-import win32api
-
 from ok import find_boxes_by_name, Logger, calculate_color_percentage
-from ok import find_color_rectangles, get_mask_in_color_range, is_pure_black
+from ok import get_mask_in_color_range, is_pure_black
 from src import text_white_color
-from src.char.Roccia import Roccia
+from src.combat.AdaptiveInterval import AdaptiveInterval
+from src.combat.HealthBarTracker import HealthBarTracker
+from src.combat.CombatTrace import traced
 from src.task.BaseWWTask import BaseWWTask
 
 logger = Logger.get_logger(__name__)
 
 
 class CombatCheck(BaseWWTask):
+    combat_check_min_interval = 0.2  # combat_check_interval 的下限, boss 低血量或状态变化时收缩到这里
+    combat_check_max_interval = 1.0  # combat_check_interval 的上限, 状态稳定时逐步放大到这里
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -28,6 +30,13 @@ class CombatCheck(BaseWWTask):
         self.boss_health = None
         self.out_of_combat_reason = ""
         self.combat_check_interval = 0.5
+        self.combat_check_scheduler = AdaptiveInterval(self.combat_check_interval,
+                                                       min_interval=self.combat_check_min_interval,
+                                                       max_interval=self.combat_check_max_interval)
+        self.boss_health_ratio = -1.0
+        self.enemy_health_tracker = HealthBarTracker(enemy_health_color_red)
+        self.boss_health_tracker = HealthBarTracker(boss_health_color, pad_x=0.01, pad_y=0.01, downscale=1,
+                                                    full_width_ratio=(2533 - 1269) / 3840)
         self.last_in_realm_not_combat = 0
         self._last_liberation = 0
         self.target_enemy_time_out = 3
@@ -35,8 +44,6 @@ class CombatCheck(BaseWWTask):
         self.combat_end_condition = None
         self.has_lavitator = False
         self.target_enemy_error_notified = False
-        self.cds = {
-        }
         self.cd_refreshed = False
         self.esc_count = 0
 
@@ -70,7 +77,6 @@ class CombatCheck(BaseWWTask):
         return False
 
     def do_reset_to_false(self):
-        self.cds = {}
         self.cd_refreshed = False
         self._in_combat = False
         self.boss_lv_mask = None
@@ -78,6 +84,11 @@ class CombatCheck(BaseWWTask):
         self.boss_lv_template = None
         self.in_liberation = False  # return True
         self.has_count_down = False
+        self.boss_health_ratio = -1.0
+        self.enemy_health_tracker.reset()
+        self.boss_health_tracker.reset()
+        self.combat_check_scheduler.reset()
+        self.combat_check_interval = self.combat_check_scheduler.interval
         self.last_out_of_combat_time = 0
         self.last_combat_check = 0
         self.boss_lv_box = None
@@ -124,6 +135,7 @@ class CombatCheck(BaseWWTask):
     def is_boss(self):
         return self.find_one('boss_break_shield') or self.find_one('boss_break_lock')
 
+    @traced('frame')
     def in_combat(self):
         if self.in_liberation or self.recent_liberation():
             return True
@@ -134,19 +146,10 @@ class CombatCheck(BaseWWTask):
                     if current_char.skip_combat_check():
                         return True
                 self.last_combat_check = now
-                if not self.on_combat_check():
-                    self.log_info('on_combat_check failed')
-                    return self.reset_to_false(recheck=False, reason='on_combat_check failed')
-                if self.has_target():
-                    self.last_in_realm_not_combat = 0
-                    return True
-                if self.combat_end_condition is not None and self.combat_end_condition():
-                    return self.reset_to_false(recheck=True, reason='end condition reached')
-                if self.target_enemy(wait=True):
-                    logger.debug(f'retarget enemy succeeded')
-                    return True
-                logger.error('target_enemy failed, try recheck break out of combat')
-                return self.reset_to_false(recheck=True, reason='target enemy failed')
+                start = time.perf_counter()
+                result, changed = self.periodic_combat_check()
+                self.update_combat_check_interval(time.perf_counter() - start, changed)
+                return result
             else:
                 return True
         else:
@@ -165,13 +168,35 @@ class CombatCheck(BaseWWTask):
                 self._in_combat = self.load_chars()
                 return self._in_combat
 
+    def periodic_combat_check(self):
+        """战斗中的定期检查, 返回 (是否仍在战斗, 状态是否变化)。"""
+        if not self.on_combat_check():
+            self.log_info('on_combat_check failed')
+            return self.reset_to_false(recheck=False, reason='on_combat_check failed'), True
+        if self.has_target():
+            self.last_in_realm_not_combat = 0
+            self.update_boss_health()
+            return True, False
+        if self.combat_end_condition is not None and self.combat_end_condition():
+            return self.reset_to_false(recheck=True, reason='end condition reached'), True
+        if self.target_enemy(wait=True):
+            logger.debug(f'retarget enemy succeeded')
+            return True, True
+        logger.error('target_enemy failed, try recheck break out of combat')
+        return self.reset_to_false(recheck=True, reason='target enemy failed'), True
+
+    def update_combat_check_interval(self, cost, changed):
+        """根据本次检查耗时和状态变化调整 combat_check_interval, 并在信息面板显示。"""
+        self.combat_check_interval = self.combat_check_scheduler.record(cost, changed, self.boss_health_ratio)
+        self.info['Combat Check'] = self.combat_check_scheduler.stats()
+
     def ensure_levitator(self):
         if not self.config.get('Check Levitator', True):
             return True
         if levi := self.find_one('edge_levitator', threshold=0.6):
             self.log_debug('edge levitator found {}'.format(levi))
             return True
-        if self.has_char(Roccia):
+        if self.has_char('Roccia'):
             if self.find_one('levitator_roccia', threshold=0.6):
                 return True
         if self.is_open_world_auto_combat():
@@ -194,6 +219,7 @@ class CombatCheck(BaseWWTask):
         if not levitator:
             self.send_key_up(self.key_config.get('Wheel Key'))
             raise Exception('no levitator tool in the tab wheel!')
+        import win32api  # Windows only, imported lazily so combat logic can be replayed offline
         old = win32api.GetCursorPos()
         self.move(levitator.x, levitator.y)
         abs_pos = self.executor.interaction.capture.get_abs_cords(levitator.x, levitator.y)
@@ -203,7 +229,7 @@ class CombatCheck(BaseWWTask):
         self.sleep(0.2)
         win32api.SetCursorPos(old)
         if not self.wait_feature('edge_levitator', threshold=0.6, time_out=1):
-            if self.has_char(Roccia):
+            if self.has_char('Roccia'):
                 if self.find_one('levitator_roccia', threshold=0.6):
                     return True
         self.log_debug(f'ensuring leviator succees {levitator}')
@@ -266,6 +292,11 @@ class CombatCheck(BaseWWTask):
                 return self.wait_until(self.has_target, time_out=self.target_enemy_time_out,
                                        pre_action=lambda: self.middle_click(interval=0.2))
 
+    @property
+    def health_bar_confidence(self):
+        return max(self.enemy_health_tracker.confidence, self.boss_health_tracker.confidence)
+
+    @traced('frame')
     def has_health_bar(self):
         if self._in_combat:
             min_height = self.height_of_screen(12 / 2160)
@@ -276,23 +307,34 @@ class CombatCheck(BaseWWTask):
             max_height = min_height * 3
             min_width = self.width_of_screen(100 / 3840)
 
-        boxes = find_color_rectangles(self.frame, enemy_health_color_red, min_width, min_height, max_height=max_height)
+        boxes = self.enemy_health_tracker.find(self.frame, min_width, min_height, max_height=max_height)
 
         if len(boxes) > 0:
             self.draw_boxes('enemy_health_bar_red', boxes, color='blue')
             return True
         else:
-            boxes = find_color_rectangles(self.frame, boss_health_color, min_width, min_height * 1.3,
-                                          box=self.box_of_screen(1269 / 3840, 58 / 2160, 2533 / 3840, 200 / 2160))
-            if len(boxes) == 1:
-                self.boss_health_box = boxes[0]
-                self.boss_health_box.width = 10
-                self.boss_health_box.x += 6
-                self.boss_health = self.boss_health_box.crop_frame(self.frame)
-                self.draw_boxes('boss_health', boxes, color='blue')
-                return True
+            return self.find_boss_health_bar(min_width, min_height)
+
+    def find_boss_health_bar(self, min_width, min_height):
+        """查找 boss 血条, 并把填充比例更新到 boss_health_ratio, 找不到时为 -1。"""
+        boxes = self.boss_health_tracker.find(self.frame, min_width, min_height * 1.3,
+                                              box=self.box_of_screen(1269 / 3840, 58 / 2160, 2533 / 3840,
+                                                                     200 / 2160))
+        if len(boxes) == 1:
+            self.boss_health_ratio = self.boss_health_tracker.fill_ratio
+            self.boss_health_box = boxes[0]
+            self.boss_health_box.width = 10
+            self.boss_health_box.x += 6
+            self.boss_health = self.boss_health_box.crop_frame(self.frame)
+            self.draw_boxes('boss_health', boxes, color='blue')
+            return True
+        self.boss_health_ratio = -1.0
         return False
 
+    def update_boss_health(self):
+        """战斗中的定期检查只看 has_target, 这里顺带读取 boss 血量供 combat_check_scheduler 使用。"""
+        return self.find_boss_health_bar(self.width_of_screen(12 / 3840), self.height_of_screen(12 / 2160))
+
     def check_health_bar(self):
         return self.has_health_bar() or self.is_boss()
 
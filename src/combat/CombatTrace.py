@@ -0,0 +1,123 @@
+"""战斗耗时追踪: 记录轮换动作和逐帧检查的耗时, 战斗结束时写入 logs/combat_trace.json (Chrome trace 格式)。
+
+默认关闭, 设置环境变量 OK_WW_TRACE=1 开启。jsonl_to_chrome_trace 把 dump_jsonl 导出的记录转换为 Chrome trace。
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from ok import Logger
+
+logger = Logger.get_logger(__name__)
+
+
+class CombatTracer:
+    """可选的战斗动作耗时追踪, 记录到环形缓冲区, 可导出为 Chrome trace (chrome://tracing / Perfetto)。
+
+    默认关闭, 设置环境变量 OK_WW_TRACE=1 或调用 enable() 开启。关闭时只多一次布尔判断。
+    每条记录: (name, cat, char, start_ns, dur_ns, tid)。
+    """
+
+    def __init__(self, capacity=20000, enabled=False):
+        self.enabled = enabled
+        self.spans = deque(maxlen=capacity)
+
+    def enable(self, capacity=None):
+        if capacity is not None and capacity != self.spans.maxlen:
+            self.spans = deque(self.spans, maxlen=capacity)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self.spans.clear()
+
+    def record(self, name, cat, char, start_ns, dur_ns):
+        self.spans.append((name, cat, char, start_ns, dur_ns, threading.get_ident()))
+
+    @contextmanager
+    def span(self, name, cat='action', char=None):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, cat, char, start, time.perf_counter_ns() - start)
+
+    def dump_jsonl(self, path):
+        """按行写出原始记录, 便于离线合并多次战斗。"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for name, cat, char, start_ns, dur_ns, tid in list(self.spans):
+                f.write(json.dumps({'name': name, 'cat': cat, 'char': char, 'start_ns': start_ns,
+                                    'dur_ns': dur_ns, 'tid': tid}, ensure_ascii=False))
+                f.write('\n')
+
+    def export_chrome_trace(self, path, spans=None):
+        """导出为 Chrome trace event 格式 (complete events, 时间单位微秒)。"""
+        if spans is None:
+            spans = list(self.spans)
+        events = []
+        for name, cat, char, start_ns, dur_ns, tid in spans:
+            event = {'name': name, 'cat': cat, 'ph': 'X', 'ts': start_ns / 1000, 'dur': dur_ns / 1000,
+                     'pid': os.getpid(), 'tid': tid}
+            if char:
+                event['args'] = {'char': char}
+            events.append(event)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        logger.info(f'exported {len(events)} spans to {path}')
+        return len(events)
+
+    def summary(self):
+        """按 (cat, name) 汇总次数、总耗时和最大耗时 (毫秒)。"""
+        result = {}
+        for name, cat, char, start_ns, dur_ns, tid in list(self.spans):
+            stat = result.setdefault(f'{cat}:{name}', [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += dur_ns / 1e6
+            stat[2] = max(stat[2], dur_ns / 1e6)
+        return result
+
+
+tracer = CombatTracer(enabled=os.environ.get('OK_WW_TRACE', '').strip().lower() in {'1', 'true', 'yes', 'on'})
+
+
+def traced(cat='action', name=None):
+    """方法装饰器, 追踪开启时记录一次耗时; self 为角色时附带角色名。"""
+
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not tracer.enabled:
+                return func(self, *args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                tracer.record(span_name, cat, getattr(self, 'char_name', None), start,
+                              time.perf_counter_ns() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def jsonl_to_chrome_trace(jsonl_path, out_path):
+    """将 dump_jsonl 的输出转换为 Chrome trace 文件。"""
+    spans = []
+    with open(jsonl_path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                spans.append((row['name'], row['cat'], row.get('char'), row['start_ns'], row['dur_ns'], row['tid']))
+    return tracer.export_chrome_trace(out_path, spans)
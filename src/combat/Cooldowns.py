@@ -0,0 +1,146 @@
+"""技能冷却推算 (task.cooldowns): 代替每帧对冷却数字的 OCR, get_cd/has_cd 只在推算不确定时 OCR 当前角色。
+
+BaseCombatTask.send_key、send_key_down 和 click 检测技能按键, 直接按技能键的角色也会使推算失效。
+场下角色和 SkillEventWatcher 直接使用推算值。信息面板的 Cooldown OCR 显示 OCR 次数与检查次数。
+"""
+import time
+
+from ok import Logger
+
+logger = Logger.get_logger(__name__)
+
+cd_skills = ('resonance', 'echo', 'liberation')
+
+# 技能 -> 角色上记录基础冷却的属性 (来自 char_dict)
+base_cd_attrs = {
+    'resonance': 'res_cd',
+    'echo': 'echo_cd',
+    'liberation': 'liberation_cd',
+}
+
+
+class CooldownEntry:
+    """某个角色某个技能的冷却: start 时刻剩余 remaining 秒。"""
+    __slots__ = ('start', 'remaining', 'source', 'verified', 'settled')
+
+    def __init__(self, start, remaining, source, verified, settled=False):
+        self.start = start
+        self.remaining = remaining
+        self.source = source  # 'cast' (按基础冷却推算) 或 'ocr'
+        self.verified = verified  # 最近一次 OCR 校对的时间, 没有则为 0
+        self.settled = settled  # OCR 已确认没有冷却, 图标不亮是其他原因 (例如能量不足)
+
+    def __repr__(self):
+        return f'CooldownEntry({self.remaining:.1f}, {self.source})'
+
+
+class CooldownModel:
+    """根据释放事件和基础冷却推算每个角色技能的剩余冷却, 只在推算不确定时才需要 OCR 校对。
+
+    推算扣除冻结/卡肉时间 (task.time_elapsed_accounting_for_freeze)。以下情况认为不确定:
+    - 没有记录, 或基础冷却未知 (char_dict 中用极大值表示);
+    - 推算值接近冷却结束 (margin 秒内), 实际冷却可能被缩短或延长;
+    - 颜色探测与推算矛盾 (图标未亮但推算已就绪);
+    - 仍在冷却中的推算超过 max_age 秒没有校对;
+    - OCR 确认已就绪的技能超过 ready_max_age 秒没有校对 (可能被不经过 on_key 的方式释放)。
+    同一技能两次校对至少间隔 min_interval 秒。
+    """
+
+    def __init__(self, task, margin=0.6, max_age=3.0, ready_max_age=1.0, min_interval=0.4, max_base_cd=120):
+        self.task = task
+        self.margin = margin
+        self.max_age = max_age
+        self.ready_max_age = ready_max_age
+        self.min_interval = min_interval
+        self.max_base_cd = max_base_cd
+        self.entries = {}  # (char_index, skill) -> CooldownEntry
+        self.dirty = set()  # 颜色探测与推算矛盾, 需要校对的 (char_index, skill)
+        self.checks = 0
+        self.ocr_count = 0
+
+    def reset(self):
+        """更换队伍或退出战斗时清空记录。"""
+        self.entries.clear()
+        self.dirty.clear()
+
+    def clear_stats(self):
+        self.checks = 0
+        self.ocr_count = 0
+
+    def on_cast(self, char, skill, at=None):
+        """记录一次技能释放, 按 char_dict 中的基础冷却开始推算。"""
+        base_cd = getattr(char, base_cd_attrs[skill], None)
+        key = (char.index, skill)
+        self.dirty.discard(key)
+        if base_cd is None or base_cd > self.max_base_cd:
+            self.entries.pop(key, None)  # 冷却未知, 交给 OCR
+            return
+        self.entries[key] = CooldownEntry(time.time() if at is None else at, base_cd, 'cast', 0)
+
+    def on_key(self, char_index, skill):
+        """发送了技能按键。推算已就绪的技能可能已被释放 (不经过 on_cast 的释放路径), 丢弃推算等待 OCR 校对。"""
+        key = (char_index, skill)
+        entry = self.entries.get(key)
+        if entry is not None and self._remaining(entry) <= 0:
+            del self.entries[key]
+
+    def observe(self, char_index, cds, at=None):
+        """记录一次 OCR 结果。
+
+        Args:
+            char_index (int): 角色位置。
+            cds (dict): 技能 -> OCR 读到的剩余冷却, 没有数字为 0。
+            at (float, optional): 截图时间。
+        """
+        at = time.time() if at is None else at
+        for skill, remaining in cds.items():
+            key = (char_index, skill)
+            previous = self.entries.get(key)
+            if previous is not None and previous.source == 'cast':
+                predicted = self._remaining(previous)
+                if abs(predicted - remaining) > self.margin and (remaining > 0 or predicted > self.margin):
+                    logger.debug(f'cooldown {char_index} {skill} predicted {predicted:.1f} ocr {remaining:.1f}')
+            settled = remaining <= 0 and key in self.dirty
+            self.entries[key] = CooldownEntry(at, remaining, 'ocr', at, settled)
+            self.dirty.discard(key)
+        self.ocr_count += 1
+
+    def _remaining(self, entry):
+        return entry.remaining - self.task.time_elapsed_accounting_for_freeze(entry.start)
+
+    def remaining(self, char_index, skill):
+        """推算的剩余冷却 (秒), 没有记录返回 0。"""
+        entry = self.entries.get((char_index, skill))
+        return self._remaining(entry) if entry is not None else 0
+
+    def check_probe(self, char_index, skill, probe_ready):
+        """用技能图标的颜色探测结果检查推算, 图标未亮而推算已就绪时标记为需要校对。"""
+        if probe_ready:
+            return
+        entry = self.entries.get((char_index, skill))
+        if entry is None or (not entry.settled and self._remaining(entry) <= 0):
+            self.dirty.add((char_index, skill))
+
+    def needs_reconcile(self, char_index, skill):
+        """推算是否不确定, 需要对当前角色 OCR 校对。"""
+        self.checks += 1
+        key = (char_index, skill)
+        entry = self.entries.get(key)
+        if entry is None:
+            return True
+        now = time.time()
+        if entry.verified and now - entry.verified < self.min_interval:
+            return False
+        if key in self.dirty:
+            return True
+        if entry.source == 'ocr' and entry.remaining <= 0:
+            return now - entry.verified > self.ready_max_age  # OCR 确认已就绪, 定期复查
+        remaining = self._remaining(entry)
+        if remaining <= -self.margin:
+            return False
+        if remaining < self.margin:
+            return True
+        return now - max(entry.verified, entry.start) > self.max_age
+
+    def stats(self):
+        return f'{self.ocr_count} ocr / {self.checks} checks'
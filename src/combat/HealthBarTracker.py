@@ -0,0 +1,113 @@
+"""血条跟踪: CombatCheck.has_health_bar 用它在上次位置附近查找敌人血条, 代替每帧的全图搜索。
+
+boss 血条的 fill_ratio 写入 CombatCheck.boss_health_ratio, 战斗中每次定期检查仍锁定目标时都会更新。
+"""
+import cv2
+
+from ok import Box, find_color_rectangles
+
+
+class HealthBarTracker:
+    """增量跟踪血条位置。
+
+    找到血条后, 之后的帧只在上次位置附近的小区域内搜索; 跟踪丢失时才回退到降采样的全图搜索。
+    confidence 表示跟踪的可信度 (0~1), fill_ratio 为当前红色填充宽度与见过的最大宽度 (或已知满血宽度) 之比,
+    可作为血量估计。
+    """
+
+    def __init__(self, color_range, pad_x=0.06, pad_y=0.04, downscale=0.5, full_width_ratio=0.0):
+        """
+        Args:
+            color_range (dict): 血条颜色范围。
+            pad_x (float): 局部搜索时左右扩展的宽度 (相对屏幕宽度)。
+            pad_y (float): 局部搜索时上下扩展的高度 (相对屏幕高度)。
+            downscale (float): 全图搜索时的缩放比例, 1 为不缩放。
+            full_width_ratio (float): 已知的满血宽度 (相对屏幕宽度), 0 表示用见过的最大宽度代替。
+        """
+        self.color_range = color_range
+        self.pad_x = pad_x
+        self.pad_y = pad_y
+        self.downscale = downscale
+        self.full_width_ratio = full_width_ratio
+        self.last_box = None
+        self.max_width = 0
+        self.misses = 0
+        self.confidence = 0.0
+        self.fill_ratio = -1.0
+        self.local_searches = 0
+        self.full_searches = 0
+
+    def reset(self):
+        self.last_box = None
+        self.max_width = 0
+        self.misses = 0
+        self.confidence = 0.0
+        self.fill_ratio = -1.0
+
+    def find(self, frame, min_width, min_height, max_height=-1, box=None):
+        """查找血条, 返回 Box 列表 (原图坐标)。
+
+        Args:
+            box (Box, optional): 全图搜索时限定的区域, 例如 boss 血条区域。
+        """
+        if self.last_box is not None:
+            self.local_searches += 1
+            boxes = find_color_rectangles(frame, self.color_range, min_width, min_height, max_height=max_height,
+                                          box=self._search_region(frame))
+            if boxes:
+                return self._update(frame, boxes)
+            self.misses += 1
+            self.last_box = None
+            self.max_width = 0
+            self.confidence *= 0.5
+        self.full_searches += 1
+        boxes = self._full_search(frame, min_width, min_height, max_height, box)
+        if boxes:
+            return self._update(frame, boxes)
+        self.confidence = 0.0
+        return []
+
+    def _search_region(self, frame):
+        height, width = frame.shape[:2]
+        pad_x = int(width * self.pad_x)
+        pad_y = int(height * self.pad_y)
+        x = max(0, self.last_box.x - pad_x)
+        y = max(0, self.last_box.y - pad_y)
+        to_x = min(width, self.last_box.x + max(self.max_width, self.last_box.width) + pad_x)
+        to_y = min(height, self.last_box.y + self.last_box.height + pad_y)
+        return Box(x, y, to_x=to_x, to_y=to_y, name='health_bar_track')
+
+    def _full_search(self, frame, min_width, min_height, max_height, box):
+        scale = self.downscale
+        if scale >= 1:
+            return find_color_rectangles(frame, self.color_range, min_width, min_height, max_height=max_height,
+                                         box=box)
+        if box is not None:
+            image = frame[box.y:box.y + box.height, box.x:box.x + box.width]
+            x_offset, y_offset = box.x, box.y
+        else:
+            image = frame
+            x_offset, y_offset = 0, 0
+        # 最近邻缩放不混合颜色, 颜色阈值依然有效
+        small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+        boxes = find_color_rectangles(small, self.color_range, max(1, int(min_width * scale)),
+                                      max(1, int(min_height * scale)),
+                                      max_height=max_height * scale if max_height > 0 else -1)
+        return [Box(x_offset + b.x / scale, y_offset + b.y / scale, b.width / scale, b.height / scale,
+                    confidence=b.confidence) for b in boxes]
+
+    def _update(self, frame, boxes):
+        best = max(boxes, key=lambda b: b.width)
+        self.last_box = Box(best.x, best.y, best.width, best.height, confidence=best.confidence)  # 调用方可能修改返回的 box
+        self.misses = 0
+        self.confidence = min(1.0, self.confidence + 0.34) * best.confidence
+        self.max_width = max(self.max_width, best.width)
+        if self.full_width_ratio > 0:
+            full_width = frame.shape[1] * self.full_width_ratio
+        else:
+            full_width = self.max_width
+        self.fill_ratio = min(1.0, best.width / full_width) if full_width else -1.0
+        return boxes
+
+    def stats(self):
+        return f'conf {self.confidence:.2f} fill {self.fill_ratio:.2f} local {self.local_searches} full {self.full_searches}'
@@ -0,0 +1,77 @@
+"""切人优先级表 (task.priority_table): 优先级只在角色声明的输入变化时重新计算。
+
+覆盖了优先级或技能可用性方法却没有重新声明输入的子类, 退回到每帧重新计算。命中率在战斗结束时显示为 Priority Cache。
+"""
+from ok import Logger
+
+logger = Logger.get_logger(__name__)
+
+# 每帧都会变化的输入, 依赖它的优先级只在同一帧内复用
+FRAME_INPUTS = ('frame',)
+
+
+class PriorityTable:
+    """切人优先级表, need_fast_perform 和 switch_next_char 共用。
+
+    每个角色通过 char.switch_priority_inputs() 声明优先级依赖的输入:
+    - 'skills': 该角色的技能事件版本 (SkillEventWatcher), 技能就绪/使用或切人时变化;
+    - 'current': 当前场上角色;
+    - 'con': 该角色记录的协奏值;
+    - 'frame': 当前帧, 依赖计时器、队友状态等无法追踪的输入时使用。
+    只要输入和参数 (has_intro, target_low_con) 不变, 就复用上次计算的优先级 (不含切换CD)。
+    """
+
+    def __init__(self, task):
+        self.task = task
+        self.entries = {}  # char_index -> (key, priority)
+        self.hits = 0
+        self.misses = 0
+        self._frame = None
+        self._frame_serial = 0
+
+    def reset(self):
+        self.entries.clear()
+
+    def _frame_id(self):
+        frame = self.task.frame
+        if frame is not self._frame:
+            self._frame = frame
+            self._frame_serial += 1
+        return self._frame_serial
+
+    def _input(self, name, char, current_char):
+        if name == 'skills':
+            return self.task.skill_events.version(char.index)
+        if name == 'current':
+            return current_char.index if current_char is not None else -1
+        if name == 'con':
+            return char.current_con
+        if name == 'frame':
+            return self._frame_id()
+        raise ValueError(f'unknown priority input {name}')
+
+    def priority(self, char, current_char, has_intro=False, target_low_con=False):
+        """返回 char.do_get_switch_priority 的结果, 输入未变化时直接复用。"""
+        key = (has_intro, target_low_con) + tuple(
+            self._input(name, char, current_char) for name in char.switch_priority_inputs())
+        cached = self.entries.get(char.index)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        priority = char.do_get_switch_priority(current_char, has_intro, target_low_con)
+        self.entries[char.index] = (key, priority)
+        return priority
+
+    def table(self, current_char, has_intro=False, target_low_con=False):
+        """当前角色以外所有队友的优先级列表 [(char, priority)]。"""
+        return [(char, self.priority(char, current_char, has_intro, target_low_con)) for char in self.task.chars
+                if char is not None and char != current_char]
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+    def stats(self):
+        return f'hit {self.hit_rate:.0%} ({self.hits}/{self.hits + self.misses})'
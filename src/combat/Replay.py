@@ -0,0 +1,468 @@
+"""离线战斗回放: 用录制的帧序列代替游戏画面, 记录发出的按键/鼠标操作, 在无游戏环境下确定性地运行战斗逻辑。
+
+录制目录格式: frames.jsonl, 每行 {"t": 秒, "file": "000001.png"}; 没有 frames.jsonl 时按文件名 (毫秒) 排序。
+FrameRecorder 写出这种目录。回放结束后 ReplayReport 给出每秒决策数和每帧分析耗时。
+"""
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from ok import Logger, DoNothingInteraction
+
+logger = Logger.get_logger(__name__)
+
+
+class ReplayFinished(BaseException):
+    """录制帧播放完毕。继承 BaseException, 避免被任务代码中的 except Exception 吞掉。"""
+
+
+class ReplayClock:
+    """虚拟时钟, sleep 只推进时间不真正等待。"""
+
+    def __init__(self, start=1_000_000.0):
+        self.start = start
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def sleep(self, sec):
+        if sec > 0:
+            self.now += sec
+
+    def elapsed(self):
+        return self.now - self.start
+
+    @contextmanager
+    def patch_modules(self, prefixes=('src.', 'custom.'), names=()):
+        """回放期间把任务代码模块中的 time 换成 ClockedTime, 不修改全局的 time 模块。
+
+        只替换名称以 prefixes 开头或在 names 中、以 import time 引用 time 模块的模块 (本模块除外),
+        日志和其他框架模块使用的 time 不受影响。
+        """
+        clocked = ClockedTime(self)
+        patched = [module for name, module in list(sys.modules.items())
+                   if (name.startswith(prefixes) or name in names) and name != __name__
+                   and getattr(module, 'time', None) is time]
+        for module in patched:
+            module.time = clocked
+        try:
+            yield self
+        finally:
+            for module in patched:
+                module.time = time
+
+
+class ClockedTime:
+    """time 模块的替身: time/sleep 使用虚拟时钟, 其余属性 (perf_counter 等) 转发给真实的 time 模块。"""
+
+    def __init__(self, clock):
+        self._clock = clock
+
+    def time(self):
+        return self._clock.time()
+
+    def sleep(self, sec):
+        self._clock.sleep(sec)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+class Recording:
+    """录制的帧序列, 按需解码并缓存最近使用的帧。"""
+
+    def __init__(self, folder, cache_size=8):
+        self.folder = folder
+        self.times, self.files = self._load_index(folder)
+        if not self.files:
+            raise ValueError(f'no frames found in {folder}')
+        self.cache_size = cache_size
+        self._cache = {}
+
+    @staticmethod
+    def _load_index(folder):
+        index_path = os.path.join(folder, 'frames.jsonl')
+        rows = []
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        rows.append((float(row['t']), row['file']))
+        else:
+            for name in os.listdir(folder):
+                stem, ext = os.path.splitext(name)
+                if ext.lower() in ('.png', '.jpg', '.bmp'):
+                    try:
+                        rows.append((float(stem) / 1000, name))
+                    except ValueError:
+                        continue
+        rows.sort()
+        if rows:
+            first = rows[0][0]
+            rows = [(t - first, name) for t, name in rows]
+        return [row[0] for row in rows], [row[1] for row in rows]
+
+    @property
+    def duration(self):
+        return self.times[-1]
+
+    def __len__(self):
+        return len(self.files)
+
+    def index_at(self, t):
+        return max(0, bisect.bisect_right(self.times, t) - 1)
+
+    def frame(self, index):
+        frame = self._cache.get(index)
+        if frame is None:
+            path = os.path.join(self.folder, self.files[index])
+            frame = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                raise ValueError(f'Cannot load image: {path}')
+            if len(self._cache) >= self.cache_size:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[index] = frame
+        return frame
+
+
+class FrameRecorder:
+    """把实时画面保存成 Recording 可读取的目录, 用于制作回放素材。"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.start = -1
+        self.count = 0
+        os.makedirs(folder, exist_ok=True)
+        self._index = open(os.path.join(folder, 'frames.jsonl'), 'w', encoding='utf-8')
+
+    def add(self, frame, t=None):
+        if t is None:
+            t = time.time()
+        if self.start < 0:
+            self.start = t
+        self.count += 1
+        name = f'{self.count:06d}.png'
+        cv2.imwrite(os.path.join(self.folder, name), frame)
+        self._index.write(json.dumps({'t': round(t - self.start, 4), 'file': name}) + '\n')
+
+    def close(self):
+        self._index.close()
+
+
+class ReplayCapture:
+    """假的截图设备: 每次取帧推进一个帧间隔, 返回虚拟时间对应的录制帧, 并统计两次取帧之间的真实耗时。"""
+
+    def __init__(self, recording, clock, fps=30):
+        self.recording = recording
+        self.clock = clock
+        self.frame_interval = 1 / fps
+        self.frames_served = 0
+        self.frame_costs = []  # 两次取帧之间任务代码的真实耗时 (秒)
+        self._last_return = None
+        first = recording.frame(0)
+        self.height, self.width = first.shape[:2]
+
+    def get_frame(self):
+        if self._last_return is not None:
+            self.frame_costs.append(time.perf_counter() - self._last_return)
+        self.clock.sleep(self.frame_interval)
+        t = self.clock.elapsed()
+        if t > self.recording.duration + self.frame_interval:
+            raise ReplayFinished()
+        frame = self.recording.frame(self.recording.index_at(t))
+        self.frames_served += 1
+        self._last_return = time.perf_counter()
+        return frame
+
+    def connected(self):
+        return True
+
+    def get_abs_cords(self, x, y):
+        return x, y
+
+
+class RecordingInteraction(DoNothingInteraction):
+    """假的操作层: 不发送任何输入, 只按虚拟时间记录。"""
+
+    def __init__(self, capture, clock):
+        super().__init__(capture)
+        self.clock = clock
+        self.events = []
+
+    def _record(self, action, *args):
+        self.events.append((round(self.clock.elapsed(), 4), action, *args))
+
+    def should_capture(self):
+        return True
+
+    def send_key(self, key, down_time=0.02):
+        self._record('key', str(key))
+        self.clock.sleep(down_time)
+
+    def send_key_down(self, key):
+        self._record('key_down', str(key))
+
+    def send_key_up(self, key):
+        self._record('key_up', str(key))
+
+    def click(self, x=-1, y=-1, move_back=False, name=None, move=True, down_time=0.05, key="left"):
+        self._record('click', key, x, y)
+        self.clock.sleep(down_time)
+
+    def mouse_down(self, x=-1, y=-1, name=None, key="left"):
+        self._record('mouse_down', key, x, y)
+
+    def mouse_up(self, key="left"):
+        self._record('mouse_up', key)
+
+    def move(self, x, y):
+        self._record('move', x, y)
+
+    def scroll(self, x, y, scroll_amount):
+        self._record('scroll', x, y, scroll_amount)
+
+    def swipe(self, from_x, from_y, to_x, to_y, duration, settle_time=0):
+        self._record('swipe', from_x, from_y, to_x, to_y)
+
+    def back(self, *args, **kwargs):
+        self.send_key('esc')
+
+
+class NoTextOcr:
+    """未提供 OCR 时使用: 任何区域都识别不到文字 (例如技能CD全部视为就绪)。"""
+
+    def ocr(self, *args, **kwargs):
+        return [[]]
+
+    def __call__(self, *args, **kwargs):
+        return None, None
+
+    def run(self, *args, **kwargs):
+        return []
+
+    def predict(self, *args, **kwargs):
+        return []
+
+
+class ReplayGlobalConfig:
+
+    def __init__(self, config_options):
+        self.configs = {option.name: dict(option.default_config) for option in config_options}
+
+    def get_config(self, option):
+        name = option if isinstance(option, str) else option.name
+        return self.configs.setdefault(name, {})
+
+    def get_config_desc(self, option):
+        return {}
+
+
+class ReplayExecutor:
+    """实现任务用到的 TaskExecutor 接口子集, 时间全部走虚拟时钟。"""
+
+    def __init__(self, recording, config, feature_set=None, ocr_lib=None, fps=30):
+        self.clock = ReplayClock()
+        self.method = ReplayCapture(recording, self.clock, fps=fps)
+        self.interaction = RecordingInteraction(self.method, self.clock)
+        self.device_manager = SimpleNamespace(supported_ratio=None, hwnd_window=None, capture_method=self.method,
+                                              interaction=self.interaction, get_preferred_device=lambda: None)
+        self.config = config
+        self.global_config = ReplayGlobalConfig(config.get('global_configs', []))
+        self.feature_set = feature_set
+        self._ocr_lib = ocr_lib or NoTextOcr()
+        self.text_fix = {}
+        self.ocr_po_translation = None
+        self.exit_event = threading.Event()
+        self.scene = None
+        self.current_scene = None
+        self.current_task = None
+        self.debug = False
+        self.debug_mode = True
+        self.paused = False
+        self.wait_scene_timeout = 10
+        self.wait_until_settle_time = config.get('wait_until_settle_time', 0)
+        self._frame = None
+
+    def ocr_lib(self, name='default', *args, **kwargs):
+        return self._ocr_lib
+
+    def get_task_by_class(self, cls):
+        return None
+
+    def check_enabled(self, check_pause=True):
+        pass
+
+    def reset_scene(self, check_enabled=True):
+        self._frame = None
+
+    def nullable_frame(self):
+        return self._frame
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            self.next_frame()
+        return self._frame
+
+    def next_frame(self, time_out=6):
+        self.reset_scene()
+        self._frame = self.method.get_frame()
+        return self._frame
+
+    def sleep(self, timeout):
+        self.reset_scene(check_enabled=False)
+        self.clock.sleep(timeout)
+
+    def wait_condition(self, condition, time_out=0, pre_action=None, post_action=None, settle_time=-1,
+                       raise_if_not_found=False):
+        from ok import WaitFailedException
+        self.reset_scene()
+        start = self.clock.time()
+        if time_out == 0:
+            time_out = self.wait_scene_timeout
+        if settle_time == -1:
+            settle_time = self.wait_until_settle_time
+        settled = 0
+        while True:
+            if pre_action is not None:
+                pre_action()
+            self.next_frame()
+            result = condition()
+            if result:
+                if settle_time <= 0:
+                    return result
+                now = self.clock.time()
+                if settled > 0 and now - settled > settle_time:
+                    return result
+                if settled == 0:
+                    settled = now
+                continue
+            settled = 0
+            if post_action is not None:
+                post_action()
+            if self.clock.time() - start > time_out:
+                break
+        if raise_if_not_found:
+            raise WaitFailedException()
+        return None
+
+
+class ReplayReport:
+
+    def __init__(self, executor, real_duration, error=None):
+        capture = executor.method
+        self.frames = capture.frames_served
+        self.virtual_duration = executor.clock.elapsed()
+        self.real_duration = real_duration
+        self.events = executor.interaction.events
+        self.error = error
+        costs = sorted(capture.frame_costs)
+        self.frame_cost_mean = sum(costs) / len(costs) if costs else 0
+        self.frame_cost_p95 = costs[int(len(costs) * 0.95)] if costs else 0
+        self.frame_cost_max = costs[-1] if costs else 0
+
+    @property
+    def decisions(self):
+        return sum(1 for event in self.events if event[1] in ('key', 'key_down', 'click', 'mouse_down'))
+
+    @property
+    def switches(self):
+        return sum(1 for event in self.events if event[1] == 'key' and event[2] in ('1', '2', '3'))
+
+    @property
+    def decisions_per_second(self):
+        return self.decisions / self.virtual_duration if self.virtual_duration > 0 else 0
+
+    def to_dict(self):
+        return {
+            'frames': self.frames,
+            'virtual_duration': round(self.virtual_duration, 3),
+            'real_duration': round(self.real_duration, 3),
+            'decisions': self.decisions,
+            'switches': self.switches,
+            'decisions_per_second': round(self.decisions_per_second, 2),
+            'frame_cost_mean_ms': round(self.frame_cost_mean * 1000, 3),
+            'frame_cost_p95_ms': round(self.frame_cost_p95 * 1000, 3),
+            'frame_cost_max_ms': round(self.frame_cost_max * 1000, 3),
+            'error': repr(self.error) if self.error else None,
+        }
+
+    def __str__(self):
+        return ' '.join(f'{key}={value}' for key, value in self.to_dict().items())
+
+
+def load_feature_set(config):
+    """按 config 中的 template_matching 配置加载 FeatureSet (box_char_1 等区域依赖它)。"""
+    from ok import FeatureSet
+    template_matching = config['template_matching']
+    return FeatureSet(False, template_matching['coco_feature_json'],
+                      default_horizontal_variance=template_matching.get('default_horizontal_variance', 0.002),
+                      default_vertical_variance=template_matching.get('default_vertical_variance', 0.002),
+                      default_threshold=template_matching.get('default_threshold', 0.8),
+                      feature_processor=template_matching.get('feature_processor'))
+
+
+def create_task(task_cls, executor):
+    # ok 各版本 ExecutorOperation 的构造参数不同
+    try:
+        task = task_cls(executor=executor)
+    except TypeError:
+        task = task_cls(executor, None)
+    task.scene = None
+    return task
+
+
+def import_char_modules():
+    """角色模块按需导入, 回放前全部导入, 使 patch_modules 能替换它们的时钟。"""
+    from src.char.CharFactory import char_names, get_char_class
+    for name in char_names:
+        get_char_class(name)
+
+
+def replay(task_cls, folder, action=None, config=None, feature_set=None, ocr_lib=None, fps=30):
+    """在录制帧上运行 action(task) (默认 combat_once), 返回 ReplayReport。
+
+    任务代码 (src.* 和 custom.* 模块及任务基类所在的模块) 中的 time.time/time.sleep 在回放期间走虚拟时钟,
+    time 模块本身不被修改。
+
+    Args:
+        task_cls: 战斗任务类, 例如 BaseCombatTask 或其子类。
+        folder (str): 录制目录。
+        action (callable, optional): 要执行的逻辑。默认为 task.combat_once(wait_combat_time=5)。
+        ocr_lib (optional): OCR 实现; 不提供时识别结果恒为空。
+    """
+    if config is None:
+        from config import config
+    recording = Recording(folder)
+    executor = ReplayExecutor(recording, config, feature_set=feature_set, ocr_lib=ocr_lib, fps=fps)
+    if action is None:
+        action = lambda task: task.combat_once(wait_combat_time=5, raise_if_not_found=False)
+    if executor.feature_set is None:
+        executor.feature_set = load_feature_set(config)
+    import_char_modules()
+    error = None
+    real_start = time.perf_counter()
+    # 任务基类所在的框架模块 (例如 click 的 interval 检查) 也使用虚拟时钟
+    with executor.clock.patch_modules(names={cls.__module__ for cls in task_cls.__mro__}):
+        task = create_task(task_cls, executor)
+        if timing := getattr(task, 'timing', None):  # 截止时间也使用虚拟时钟, 不自旋
+            timing.clock = executor.clock.time
+            timing.spin_limit = 0
+        try:
+            action(task)
+        except ReplayFinished:
+            pass
+        except Exception as e:
+            logger.error('replay stopped by exception', e)
+            error = e
+    return ReplayReport(executor, time.perf_counter() - real_start, error)
@@ -0,0 +1,214 @@
+"""声明式角色循环: 由 Step 组成的跳转图, 每一步有动作、HUD前置条件、时间窗口和 then/otherwise 跳转。
+
+BaseChar.do_perform、Changli 和 Zhezhi 使用它。每个循环的空闲时间和探测次数在信息面板显示为 Rotation <name>,
+并以 rotation 分类写入战斗追踪。
+"""
+import time
+
+from ok import Logger
+from src.combat.CombatTrace import tracer
+
+logger = Logger.get_logger(__name__)
+
+END = 'end'  # 跳转到 END 结束本次循环
+
+# 通用的HUD探测, 角色可在 Rotation(probes=...) 中补充或覆盖
+default_probes = {
+    'intro': lambda char: char.has_intro,
+    'resonance': lambda char: char.resonance_available(),
+    'echo': lambda char: char.echo_available(),
+    'liberation': lambda char: char.liberation_available(),
+    'forte_full': lambda char: char.is_forte_full(),
+    'mouse_forte_full': lambda char: char.is_mouse_forte_full(),
+    'con_full': lambda char: char.is_con_full(),
+    'flying': lambda char: char.flying(),
+}
+
+
+class HudState:
+    """一帧内的HUD探测结果, 同一帧内每个探测只计算一次, 换帧后自动失效。
+
+    通过属性访问探测结果, 例如 hud.resonance。
+    """
+
+    def __init__(self, char, probes):
+        self._char = char
+        self._probes = probes
+        self._frame = None
+        self._values = {}
+        self.probe_count = 0
+
+    def get(self, name):
+        frame = self._char.task.frame
+        if frame is not self._frame:
+            self._frame = frame
+            self._values.clear()
+        if name not in self._values:
+            self.probe_count += 1
+            self._values[name] = self._probes[name](self._char)
+        return self._values[name]
+
+    def prefetch(self, names):
+        """一次性计算当前帧需要的全部探测。"""
+        for name in names:
+            self.get(name)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self.get(name)
+        except KeyError:
+            raise AttributeError(f'unknown hud probe {name}')
+
+
+class Step:
+    """循环中的一步: 动作 + HUD前置条件 + 时间窗口。
+
+    时间窗口以上一步结束为起点: 在 delay 秒后开始检查前置条件, 条件满足立即执行,
+    超过 delay + timeout 仍不满足则跳过。delay 和 timeout 也可以是 (char, hud) -> float 的函数。
+    """
+
+    __slots__ = ('name', 'action', 'when', 'probes', 'delay', 'timeout', 'then', 'otherwise')
+
+    def __init__(self, name, action=None, when=None, probes=(), delay=0.0, timeout=0.0, then=None,
+                 otherwise=None):
+        """
+        Args:
+            name (str): 步骤名, 用于跳转和日志。
+            action (callable, optional): action(char), 返回值为真视为成功。None 视为成功。
+            when (callable, optional): when(char, hud), 前置条件, None 表示无条件。
+            probes (tuple): 检查前置条件前需要一次性计算的HUD探测。
+            then (str, optional): 成功后跳转的步骤, 默认下一步。
+            otherwise (str, optional): 动作失败或条件超时后跳转的步骤, 默认下一步。
+        """
+        self.name = name
+        self.action = action
+        self.when = when
+        self.probes = probes
+        self.delay = delay
+        self.timeout = timeout
+        self.then = then
+        self.otherwise = otherwise
+
+
+class RotationStats:
+    """累计的循环耗时, idle 为等待前置条件或时间窗口的时间。"""
+
+    def __init__(self):
+        self.runs = 0
+        self.total = 0.0
+        self.idle = 0.0
+        self.actions = 0
+        self.skipped = 0
+        self.probes = 0
+
+    def record(self, total, idle, actions, skipped, probes):
+        self.runs += 1
+        self.total += total
+        self.idle += idle
+        self.actions += actions
+        self.skipped += skipped
+        self.probes += probes
+
+    @property
+    def idle_per_run(self):
+        return self.idle / self.runs if self.runs else 0
+
+    def __str__(self):
+        if not self.runs:
+            return 'no runs'
+        return (f'{self.runs} runs, {self.total / self.runs:.2f}s/run, idle {self.idle_per_run * 1000:.0f}ms/run, '
+                f'probes {self.probes / self.runs:.1f}/run')
+
+
+class Rotation:
+    """声明式的角色循环, 按每帧的HUD状态调度步骤。
+
+    每一步在时间窗口内逐帧检查前置条件, 不会休眠超过下一个可执行的时间点。
+    """
+
+    def __init__(self, name, steps, probes=None):
+        self.name = name
+        self.steps = list(steps)
+        self.index = {step.name: i for i, step in enumerate(self.steps)}
+        if len(self.index) != len(self.steps):
+            raise ValueError(f'duplicate step names in rotation {name}')
+        for step in self.steps:
+            for target in (step.then, step.otherwise):
+                if target is not None and target != END and target not in self.index:
+                    raise ValueError(f'rotation {name} step {step.name} jumps to unknown step {target}')
+        self.probes = dict(default_probes)
+        if probes:
+            self.probes.update(probes)
+        for step in self.steps:
+            for probe in step.probes:
+                if probe not in self.probes:
+                    raise ValueError(f'rotation {name} step {step.name} uses unknown probe {probe}')
+        self.stats = RotationStats()
+
+    def _next(self, i, target):
+        if target == END:
+            return len(self.steps)
+        if target is None:
+            return i + 1
+        return self.index[target]
+
+    @staticmethod
+    def _value(value, char, hud):
+        return value(char, hud) if callable(value) else value
+
+    def run(self, char):
+        """执行一次循环。
+
+        Returns:
+            str: 最后执行成功的步骤名, 没有则为 None。
+        """
+        hud = HudState(char, self.probes)
+        task = char.task
+        start = time.time()
+        idle = 0.0
+        actions = 0
+        skipped = 0
+        last = None
+        step_end = start
+        i = 0
+        while i < len(self.steps):
+            step = self.steps[i]
+            earliest = step_end + self._value(step.delay, char, hud)
+            wait = earliest - time.time()
+            if wait > 0:
+                idle_start = time.time()
+                char.sleep(wait)
+                idle += time.time() - idle_start
+            deadline = max(earliest, time.time()) + self._value(step.timeout, char, hud)
+            while True:
+                hud.prefetch(step.probes)
+                ready = step.when is None or step.when(char, hud)
+                if ready or time.time() >= deadline:
+                    break
+                idle_start = time.time()
+                char.check_combat()
+                task.next_frame()
+                idle += time.time() - idle_start
+            if not ready:
+                skipped += 1
+                i = self._next(i, step.otherwise)
+            else:
+                if step.action is None:
+                    success = True
+                else:
+                    with tracer.span(f'{self.name}.{step.name}', 'rotation', char.char_name):
+                        success = step.action(char)
+                    actions += 1
+                if success:
+                    last = step.name
+                    i = self._next(i, step.then)
+                else:
+                    i = self._next(i, step.otherwise)
+            step_end = time.time()
+        total = time.time() - start
+        self.stats.record(total, idle, actions, skipped, hud.probe_count)
+        task.info[f'Rotation {self.name}'] = str(self.stats)
+        logger.debug(f'{self.name} rotation done last {last} cost {total:.2f}s idle {idle:.2f}s')
+        return last
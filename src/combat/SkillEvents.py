@@ -0,0 +1,141 @@
+"""技能事件: 跨帧监视各角色的技能图标, 在就绪/释放/协奏满等状态变化时产生事件。
+
+事件版本号供 PriorityTable 判断切人优先级能否复用, BaseChar.get_switch_priority 和 need_fast_perform 因此
+不必每帧重新计算。
+"""
+import time
+from collections import deque
+from enum import StrEnum
+
+from ok import Logger
+from src import text_white_color
+from src.combat.Cooldowns import cd_skills
+
+logger = Logger.get_logger(__name__)
+
+
+class SkillEventType(StrEnum):
+    """技能状态变化事件类型。"""
+    RESONANCE_READY = 'resonance_ready'
+    RESONANCE_USED = 'resonance_used'
+    ECHO_READY = 'echo_ready'
+    ECHO_USED = 'echo_used'
+    LIBERATION_READY = 'liberation_ready'
+    LIBERATION_USED = 'liberation_used'
+    FORTE_FULL = 'forte_full'
+    FORTE_EMPTY = 'forte_empty'
+
+
+# 技能 -> (就绪事件, 失效事件)
+skill_event_types = {
+    'resonance': (SkillEventType.RESONANCE_READY, SkillEventType.RESONANCE_USED),
+    'echo': (SkillEventType.ECHO_READY, SkillEventType.ECHO_USED),
+    'liberation': (SkillEventType.LIBERATION_READY, SkillEventType.LIBERATION_USED),
+    'forte': (SkillEventType.FORTE_FULL, SkillEventType.FORTE_EMPTY),
+}
+
+class SkillEvent:
+    """一次技能状态变化。"""
+    __slots__ = ('char_index', 'type', 'time')
+
+    def __init__(self, char_index, event_type, event_time):
+        self.char_index = char_index
+        self.type = event_type
+        self.time = event_time
+
+    def __repr__(self):
+        return f'SkillEvent({self.char_index}, {self.type}, {self.time:.3f})'
+
+
+class SkillEventWatcher:
+    """跨帧监视技能图标, 在状态变化时产生事件, 事件版本号用于 PriorityTable 复用切人优先级。
+
+    场上角色通过技能图标白色像素判断 (只做颜色计算, 不做OCR);
+    场下角色根据冷却模型 (task.cooldowns) 推算。
+    """
+
+    def __init__(self, task, max_events=128):
+        self.task = task
+        self.events = deque(maxlen=max_events)
+        self.states = {}  # char_index -> {skill: bool}
+        self.last_event_time = {}  # (char_index, SkillEventType) -> time
+        self.versions = {}  # char_index -> 每次事件或切人后递增
+        self.current_index = -1
+
+    def reset(self):
+        """更换队伍或战斗结束时清空状态。"""
+        self.current_index = -1
+        self.events.clear()
+        self.states.clear()
+        self.last_event_time.clear()
+        self.versions.clear()
+
+    def invalidate(self, char_index):
+        """递增某个角色的事件版本, 使其优先级缓存失效 (例如切人后)。"""
+        self.versions[char_index] = self.versions.get(char_index, 0) + 1
+        self.states.pop(char_index, None)
+
+    def version(self, char_index):
+        return self.versions.get(char_index, 0)
+
+    def poll(self, current_char=None):
+        """采样一次当前帧, 返回本次产生的事件列表。"""
+        if self.task.frame is None:
+            return []
+        if current_char is None:
+            current_char = self.task.get_current_char(raise_exception=False)
+        if current_char is None:
+            return []
+        if current_char.index != self.current_index:
+            # 场上/场下的判断方式不同, 切人后重新建立基准, 避免误报
+            if self.current_index >= 0:
+                self.invalidate(self.current_index)
+            self.invalidate(current_char.index)
+            self.current_index = current_char.index
+        now = time.time()
+        emitted = []
+        for char in self.task.chars:
+            if char is None:
+                continue
+            if char.index == current_char.index:
+                sample = self._sample_current(char)
+            else:
+                sample = self._sample_off_field(char)
+            self._update(char.index, sample, now, emitted)
+        return emitted
+
+    def _sample_current(self, char):
+        sample = {}
+        for skill in cd_skills:
+            sample[skill] = self.task.calculate_color_percentage(text_white_color,
+                                                                 self.task.get_box_by_name(f'box_{skill}')) > 0
+        sample['forte'] = char.forte_white_percent() > 0.08
+        return sample
+
+    def _sample_off_field(self, char):
+        cooldowns = self.task.cooldowns
+        return {skill: cooldowns.remaining(char.index, skill) <= 0 for skill in cd_skills}
+
+    def _update(self, char_index, sample, now, emitted):
+        previous = self.states.get(char_index)
+        self.states[char_index] = sample
+        if previous is None:
+            return
+        for skill, ready in sample.items():
+            if skill not in previous or previous[skill] == ready:
+                continue
+            ready_type, used_type = skill_event_types[skill]
+            event = SkillEvent(char_index, ready_type if ready else used_type, now)
+            self.events.append(event)
+            self.last_event_time[(char_index, event.type)] = now
+            self.versions[char_index] = self.versions.get(char_index, 0) + 1
+            emitted.append(event)
+            logger.debug(f'skill event {event}')
+
+    def get_event_time(self, char_index, event_type):
+        """返回某角色最近一次发生该事件的时间, 没有则返回 -1。"""
+        return self.last_event_time.get((char_index, event_type), -1)
+
+    def events_since(self, start, char_index=None):
+        return [event for event in self.events if
+                event.time >= start and (char_index is None or event.char_index == char_index)]
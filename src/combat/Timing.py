@@ -0,0 +1,155 @@
+"""按截止时间计时的战斗等待: task.timing 为 CombatTiming, 每个角色的 char.actions 为 ActionQueue。
+
+sleep_check_combat、sleep_until_check_combat 和 BaseChar.sleep_until 都睡到绝对截止时间, continues_normal_attack
+按固定的 interval 网格点击。请求与实际时间的偏差在战斗结束时写入日志, 并显示为 Timing Drift。
+"""
+import heapq
+import time
+from collections import deque
+
+
+class DriftStats:
+    """请求时间与实际时间的偏差 (实际 - 请求, 秒), 保留最近 size 个样本。"""
+
+    def __init__(self, size=512):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, drift):
+        self.samples.append(drift)
+        self.count += 1
+
+    def summary(self):
+        """返回 (平均, p95, 最大) 偏差, 单位毫秒。"""
+        if not self.samples:
+            return 0.0, 0.0, 0.0
+        ordered = sorted(self.samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return sum(ordered) / len(ordered) * 1000, p95 * 1000, ordered[-1] * 1000
+
+    def __str__(self):
+        mean, p95, worst = self.summary()
+        return f'n {self.count} mean {mean:.1f}ms p95 {p95:.1f}ms max {worst:.1f}ms'
+
+
+class CombatTiming:
+    """基于截止时间的计时服务。
+
+    使用单调高精度时钟; 较长的等待交给 coarse_sleep (任务的 sleep, 保留暂停/退出检查),
+    最后几毫秒自旋到截止时间, 抵消系统 sleep 的粒度误差。每次等待的实际唤醒时间与截止时间之差按名称记录。
+    """
+
+    def __init__(self, coarse_sleep=None, clock=None, spin_limit=0.004):
+        """
+        Args:
+            coarse_sleep (callable, optional): 粗粒度 sleep, 默认 time.sleep。
+            clock (callable, optional): 单调时钟, 默认 time.perf_counter。
+            spin_limit (float): 自旋等待的最长时间 (秒), 0 表示不自旋。
+        """
+        self.clock = clock or time.perf_counter
+        self.coarse_sleep = coarse_sleep or time.sleep
+        self.spin_limit = spin_limit
+        self.oversleep = 0.001  # coarse_sleep 超时的滑动平均
+        self.drifts = {}
+
+    def now(self):
+        return self.clock()
+
+    def deadline(self, delay):
+        return self.clock() + delay
+
+    def sleep_until(self, deadline, name=None):
+        """等待到截止时间。
+
+        Returns:
+            float: 实际唤醒时间与截止时间之差 (秒), 正数为晚到。
+        """
+        remaining = deadline - self.clock()
+        if remaining > 0:
+            margin = min(self.spin_limit, self.oversleep * 1.5 + 0.0005) if self.spin_limit > 0 else 0
+            coarse = remaining - margin
+            if coarse > 0:
+                before = self.clock()
+                self.coarse_sleep(coarse)
+                overshoot = max(0.0, self.clock() - before - coarse)
+                self.oversleep = self.oversleep * 0.9 + overshoot * 0.1
+            if self.spin_limit > 0:
+                while self.clock() < deadline:
+                    time.sleep(0)
+        late = self.clock() - deadline
+        if name is not None:
+            self.record(name, late)
+        return late
+
+    def sleep(self, sec, name=None):
+        return self.sleep_until(self.clock() + sec, name)
+
+    def record(self, name, drift):
+        stats = self.drifts.get(name)
+        if stats is None:
+            stats = self.drifts[name] = DriftStats()
+        stats.add(drift)
+
+    def report(self):
+        return {name: str(stats) for name, stats in self.drifts.items()}
+
+    def clear(self):
+        self.drifts.clear()
+
+
+class ActionQueue:
+    """单个角色的定时动作队列, 按目标时间依次执行, 并记录执行时间相对目标时间的偏差。"""
+
+    def __init__(self, timing, owner=''):
+        self.timing = timing
+        self.owner = owner
+        self._heap = []
+        self._seq = 0
+
+    def schedule_at(self, at, name, action):
+        heapq.heappush(self._heap, (at, self._seq, name, action))
+        self._seq += 1
+
+    def schedule(self, delay, name, action):
+        self.schedule_at(self.timing.now() + delay, name, action)
+
+    def next_time(self):
+        return self._heap[0][0] if self._heap else None
+
+    def clear(self):
+        self._heap.clear()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _execute(self, at, name, action):
+        self.timing.record(f'{self.owner}.{name}' if self.owner else name, self.timing.now() - at)
+        return action()
+
+    def run_at(self, at, name, action, sleep_until=None):
+        """等待到 at 后立即执行 action。
+
+        Args:
+            sleep_until (callable, optional): 自定义等待函数 (例如带战斗检查的), 默认 timing.sleep_until。
+        """
+        (sleep_until or self.timing.sleep_until)(at)
+        return self._execute(at, name, action)
+
+    def run_due(self):
+        """执行所有已到时间的动作, 返回执行的数量。"""
+        count = 0
+        now = self.timing.now()
+        while self._heap and self._heap[0][0] <= now:
+            at, _, name, action = heapq.heappop(self._heap)
+            self._execute(at, name, action)
+            count += 1
+        return count
+
+    def run(self, stop=None, sleep_until=None):
+        """按时间顺序执行队列中的全部动作; stop() 为真时清空剩余动作并返回。"""
+        while self._heap:
+            if stop is not None and stop():
+                self.clear()
+                break
+            at, _, name, action = heapq.heappop(self._heap)
+            self.run_at(at, name, action, sleep_until)
@@ -1,3 +1,4 @@
+import os
 import re
 import time
 from decimal import Decimal, ROUND_UP, ROUND_DOWN
@@ -11,9 +12,16 @@ from ok import safe_get
 from src import text_white_color
 from src.char import BaseChar
 from src.char.BaseChar import Priority, dot_color  # noqa
-from src.char.CharFactory import get_char_by_pos
+from src.char.CharFactory import get_char_by_pos, prewarm_saved_team_async, slot_hash, hash_distance, \
+    load_team_preset, save_team_preset
 from src.char.Healer import Healer
 from src.combat.CombatCheck import CombatCheck
+from src.combat.CharProfile import CharProfiler
+from src.combat.CombatTrace import traced, tracer
+from src.combat.Cooldowns import CooldownModel, cd_skills
+from src.combat.PriorityTable import PriorityTable
+from src.combat.SkillEvents import SkillEventWatcher
+from src.combat.Timing import CombatTiming
 from src.task.BaseWWTask import isolate_white_text_to_black, binarize_for_matching
 
 logger = Logger.get_logger(__name__)
@@ -54,6 +62,8 @@ class BaseCombatTask(CombatCheck):
         """
         super().__init__(*args, **kwargs)
         self.chars = [None, None, None]  # 角色列表
+        self.preset_hashes = None  # 当前队伍预设的头像哈希, None 表示还未加载预设
+        self.loaded_preset = None  # preset_hashes 对应的预设名称, 配置项 Team Preset 变化时重新加载
         self.char_texts = ['char_1_text', 'char_2_text', 'char_3_text']  # 角色文本标识符列表
         self.mouse_pos = None  # 当前鼠标位置
         self.combat_start = 0  # 战斗开始时间戳
@@ -61,6 +71,12 @@ class BaseCombatTask(CombatCheck):
         self.char_texts = ['char_1_text', 'char_2_text', 'char_3_text']
         self.add_text_fix({'Ｅ': 'e'})
         self.use_liberation = True
+        self.skill_events = SkillEventWatcher(self)  # 技能就绪事件, 用于增量计算切人优先级
+        self.priority_table = PriorityTable(self)  # 切人优先级表, 输入未变化时复用
+        self.cooldowns = CooldownModel(self)  # 推算技能冷却, 只在不确定时 OCR 校对
+        self.profiler = CharProfiler()  # 按角色统计场上耗时, 见 report_char_profiles
+        self.timing = CombatTiming(coarse_sleep=self.sleep)  # 基于截止时间的等待, 记录动作时间偏差
+        prewarm_saved_team_async()  # 角色类按需导入, 后台预先导入上次队伍的角色
 
     def add_freeze_duration(self, start, duration=-1.0, freeze_time=0.1):
         """添加冻结持续时间。用于精确计算技能冷却等。
@@ -133,18 +149,14 @@ class BaseCombatTask(CombatCheck):
             self.next_frame()
         logger.info(f'send_key_and_wait_animation timed out {key}')
 
+    @traced('frame')
     def refresh_cd(self):
+        """OCR 当前角色的技能冷却数字, 校对冷却模型 (每帧最多一次)。"""
         if self.cd_refreshed:
             return
         index = self.get_current_char().index
-        cds = self.cds.get(index)
-        if cds is None:
-            cds = {}
-            self.cds[index] = cds
-        cds['time'] = time.time()
-        cds['resonance'] = 0
-        cds['liberation'] = 0
-        cds['echo'] = 0
+        cds = {'resonance': 0, 'liberation': 0, 'echo': 0}
+        start = time.time()
         texts = self.ocr(0.81, 0.86, 0.97, 0.93, frame_processor=isolate_white_text_to_black, match=cd_regex)
         for text in texts:
             cd = convert_cd(text)
@@ -154,26 +166,84 @@ class BaseCombatTask(CombatCheck):
                 cds['liberation'] = cd
             else:
                 cds['echo'] = cd
+        self.cooldowns.observe(index, cds, start)
         self.cd_refreshed = True
-        self.log_debug(f'cd refreshed: {cds} {time.time() - cds["time"]}')
+        self.log_debug(f'cd refreshed: {cds} {time.time() - start}')
 
     def get_cd(self, box_name, char_index=None):
-        self.refresh_cd()
+        """技能剩余冷却 (秒)。
+
+        由冷却模型根据释放时间推算, 只有当前角色的推算不确定时才 OCR 校对。
+        """
+        current_char = self.get_current_char()
         if char_index is None:
-            char_index = self.get_current_char().index
-        if cds := self.cds.get(char_index):
-            time_elapsed = self.time_elapsed_accounting_for_freeze(cds['time'])
-            return cds[box_name] - time_elapsed
-        else:
-            return 0
+            char_index = current_char.index
+        if char_index == current_char.index and self.cooldowns.needs_reconcile(char_index, box_name):
+            self.refresh_cd()
+        return self.cooldowns.remaining(char_index, box_name)
 
     def next_frame(self):
         self.cd_refreshed = False
-        return super().next_frame()
+        with self.profiler.measure('sleep'):
+            frame = super().next_frame()
+        if self._in_combat:
+            with tracer.span('skill_events.poll', 'frame'), self.profiler.measure('probe'):
+                self.skill_events.poll()
+        return frame
 
     def sleep(self, *args, **kwargs):
         self.cd_refreshed = False
-        super().sleep(*args, **kwargs)
+        with self.profiler.measure('sleep'):
+            super().sleep(*args, **kwargs)
+
+    def _on_skill_key(self, key):
+        """发送了技能按键 (包括角色直接按键, 不经过 send_resonance_key 等), 通知冷却模型重新校对。"""
+        skill = {self.get_resonance_key(): 'resonance', self.get_echo_key(): 'echo',
+                 self.get_liberation_key(): 'liberation'}.get(key)
+        if skill is not None:
+            current_char = self.get_current_char(raise_exception=False)
+            if current_char is not None:
+                self.cooldowns.on_key(current_char.index, skill)
+
+    def send_key(self, key, *args, **kwargs):
+        self._on_skill_key(key)
+        with self.profiler.measure('input'):
+            return super().send_key(key, *args, **kwargs)
+
+    def send_key_down(self, key, *args, **kwargs):
+        self._on_skill_key(key)
+        return super().send_key_down(key, *args, **kwargs)
+
+    def click(self, *args, **kwargs):
+        self._on_skill_key(kwargs.get('key'))
+        with self.profiler.measure('input'):
+            return super().click(*args, **kwargs)
+
+    def ocr(self, *args, **kwargs):
+        with self.profiler.measure('probe'):
+            return super().ocr(*args, **kwargs)
+
+    def find_feature(self, *args, **kwargs):
+        with self.profiler.measure('probe'):
+            return super().find_feature(*args, **kwargs)
+
+    def calculate_color_percentage(self, *args, **kwargs):
+        with self.profiler.measure('probe'):
+            return super().calculate_color_percentage(*args, **kwargs)
+
+    def report_char_profiles(self):
+        """输出本次运行按等待时间排序的角色耗时报告, 并与之前的运行比较。"""
+        lines = self.profiler.report()
+        if lines:
+            self.info['Char Profile'] = lines[0]
+            self.info['Char Profile Regressions'] = sum('REGRESSION' in line for line in lines)
+        return lines
+
+    def do_reset_to_false(self):
+        super().do_reset_to_false()
+        self.cooldowns.reset()
+        self.skill_events.reset()
+        self.priority_table.reset()
 
     def revive_action(self):
         pass
@@ -232,9 +302,12 @@ class BaseCombatTask(CombatCheck):
                                                       self.get_box_by_name(f'box_{name}'))
         else:
             current = 1
+        if check_color and check_cd and name in cd_skills:
+            self.cooldowns.check_probe(self.get_current_char().index, name, current > 0)
         if current > 0 and (not check_cd or not self.has_cd(name)):
             return True
 
+    @traced('action')
     def combat_once(self, wait_combat_time=200, raise_if_not_found=True):
         """执行一次完整的战斗流程。
 
@@ -256,11 +329,12 @@ class BaseCombatTask(CombatCheck):
         self.combat_end()
         self.wait_in_team_and_world(time_out=10, raise_if_not_found=False)
 
-    def run_in_circle_to_find_echo(self, circle_count=3):
+    def run_in_circle_to_find_echo(self, circle_count=3, time_out=None):
         """通过绕圈移动来尝试拾取声骸。
 
         Args:
             circle_count (int, optional): 绕圈的次数。默认为 3。
+            time_out (float, optional): 最多绕圈的秒数, 默认不限制。
 
         Returns:
             bool: 如果成功拾取到声骸则返回 True, 否则 False。
@@ -269,9 +343,12 @@ class BaseCombatTask(CombatCheck):
         step = 0.8
         duration = 0.8
         total_index = 0
+        start = time.time()
         for count in range(circle_count):
             logger.debug(f'running first circle_count{circle_count} circle {total_index} duration:{duration}')
             for direction in directions:
+                if time_out is not None and time.time() - start > time_out:
+                    return False
                 if total_index > 2 and (total_index + 1) % 2 == 0:
                     if not (count == circle_count - 1 and direction == directions[-1]):
                         duration += step
@@ -287,6 +364,7 @@ class BaseCombatTask(CombatCheck):
             self.log_debug('boss is broken, use f')
             self.send_key('f', after_sleep=0.1)
 
+    @traced('action')
     def switch_next_char(self, current_char, post_action=None, free_intro=False, target_low_con=False):
         """切换到下一个最优角色。
 
@@ -296,12 +374,14 @@ class BaseCombatTask(CombatCheck):
             free_intro (bool, optional): 是否强制认为拥有入场技 (通常在协奏值满时)。默认为 False。
             target_low_con (bool, optional): 是否优先切换到协奏值较低的角色。默认为 False。
         """
+        switch_start = time.time()
         max_priority = Priority.MIN
         switch_to = current_char
         has_intro = free_intro
         current_con = 0
         self.update_lib_portrait_icon()
         current_char.wait_switch_cd()
+        self.skill_events.poll(current_char)
         if not has_intro:
             current_con = current_char.get_current_con()
             if current_con > 0.8 and current_con != 1:
@@ -354,7 +434,7 @@ class BaseCombatTask(CombatCheck):
             if now - last_click > 0.1 and not switch_to.wait_switch():
                 self.send_key(switch_to.index + 1)
                 last_click = now
-                self.sleep(0.05)
+                self.timing.sleep(0.05, 'switch')
             in_team, current_index, size = self.in_team()
             if not in_team:
                 logger.info(f'not in team while switching chars_{current_char}_to_{switch_to} {now - start}')
@@ -386,6 +466,7 @@ class BaseCombatTask(CombatCheck):
                     self.add_freeze_duration(current_time, switch_to.intro_motion_freeze_duration, -100)
                     current_char.last_outro_time = current_time
                 break
+        self.profiler.record_switch(current_char, time.time() - switch_start)
 
         if post_action:
             logger.debug(f'post_action {post_action}')
@@ -461,7 +542,15 @@ class BaseCombatTask(CombatCheck):
         current_char = self.get_current_char(raise_exception=False)
         if current_char:
             self.get_current_char().on_combat_end(self.chars)
-
+        if tracer.enabled:
+            tracer.export_chrome_trace(os.path.join('logs', 'combat_trace.json'))
+        if self.timing.drifts:
+            logger.info(f'combat timing drift {self.timing.report()}')
+            self.info['Timing Drift'] = str(self.timing.drifts.get('sleep', ''))
+        self.info['Priority Cache'] = self.priority_table.stats()
+        self.info['Cooldown OCR'] = self.cooldowns.stats()
+
+    @traced('action')
     def sleep_check_combat(self, timeout, check_combat=True):
         """休眠指定时间, 并在休眠前后检查战斗状态。
 
@@ -469,10 +558,19 @@ class BaseCombatTask(CombatCheck):
             timeout (float): 休眠的秒数。
             check_combat (bool, optional): 是否在休眠前检查战斗状态。默认为 True。
         """
-        start = time.time()
+        self.sleep_until_check_combat(self.timing.deadline(timeout), check_combat)
+
+    def sleep_until_check_combat(self, deadline, check_combat=True, name='sleep'):
+        """休眠到 timing 时钟的截止时间, 并在休眠前检查战斗状态。
+
+        Args:
+            deadline (float): self.timing.now() 时间轴上的截止时间。
+            check_combat (bool, optional): 是否在休眠前检查战斗状态。默认为 True。
+            name (str, optional): 记录时间偏差使用的名称。默认为 'sleep'。
+        """
         if check_combat and not self.in_combat():
             self.raise_not_in_combat('sleep check not in combat')
-        self.sleep(timeout - (time.time() - start))
+        self.timing.sleep_until(deadline, name)
 
     def check_combat(self):
         """检查当前是否处于战斗状态, 如果不是则抛出异常。"""
@@ -509,31 +607,57 @@ class BaseCombatTask(CombatCheck):
         return self.key_config
 
     def has_char(self, char_cls):
+        """查找队伍中的指定角色。
+
+        Args:
+            char_cls (type | str): 角色类, 或角色类名 (不必导入角色模块)。
+
+        Returns:
+            BaseChar: 找到的角色, 没有则返回 None。
+        """
         for char in self.chars:
-            if isinstance(char, char_cls):
+            if isinstance(char_cls, str):
+                if any(cls.__name__ == char_cls for cls in type(char).__mro__):
+                    return char
+            elif isinstance(char, char_cls):
                 return char
 
     def load_chars(self):
-        """加载队伍中的角色信息。"""
+        """加载队伍中的角色信息。
+
+        设置了队伍预设 (配置项 Team Preset) 时先用头像哈希确认队伍与预设一致, 一致则跳过角色识别;
+        不一致时重新识别, 并且只在队伍或哈希确实变化时改写预设。
+        """
         self.load_hotkey()
         in_team, current_index, count = self.in_team()
         if not in_team:
             return
         # self.log_info('load chars')
-        self.chars[0] = get_char_by_pos(self, self.get_box_by_name('box_char_1'), 0, safe_get(self.chars, 0))
-        self.chars[1] = get_char_by_pos(self, self.get_box_by_name('box_char_2'), 1, safe_get(self.chars, 1))
-
-        if count == 3:
-            new_char = get_char_by_pos(self, self.get_box_by_name('box_char_3'), 2, safe_get(self.chars, 2))
-            if len(self.chars) == 2:
-                self.chars.append(new_char)
+        previous = list(self.chars)
+        hashes = None
+        if self.team_preset_name():
+            hashes = [slot_hash(self, self.get_box_by_name(f'box_char_{i + 1}')) for i in range(count)]
+        if hashes is None or not self.verify_team_preset(hashes, current_index, count):
+            self.chars[0] = get_char_by_pos(self, self.get_box_by_name('box_char_1'), 0, safe_get(self.chars, 0))
+            self.chars[1] = get_char_by_pos(self, self.get_box_by_name('box_char_2'), 1, safe_get(self.chars, 1))
+
+            if count == 3:
+                new_char = get_char_by_pos(self, self.get_box_by_name('box_char_3'), 2, safe_get(self.chars, 2))
+                if len(self.chars) == 2:
+                    self.chars.append(new_char)
+                else:
+                    self.chars[2] = new_char
             else:
-                self.chars[2] = new_char
-        else:
-            if len(self.chars) == 3:
-                self.chars = self.chars[:2]
-            logger.info(f'team size changed to 2')
-
+                if len(self.chars) == 3:
+                    self.chars = self.chars[:2]
+                logger.info(f'team size changed to 2')
+            if hashes is not None:
+                self.update_team_preset(hashes, current_index, previous)
+
+        # load_chars 在切人循环中也会调用, 只有队伍变化时才清空按角色记录的状态
+        if len(previous) != len(self.chars) or any(a is not b for a, b in zip(previous, self.chars)):
+            self.skill_events.reset()
+            self.priority_table.reset()
         healer_count = 0
         for char in self.chars:
             if char is not None:
@@ -548,6 +672,60 @@ class BaseCombatTask(CombatCheck):
         if len(self.chars) >= 2:
             return True
 
+    def team_preset_name(self):
+        """当前使用的队伍预设名称 (配置项 Team Preset), 未设置时返回 None, 不使用也不保存预设。"""
+        return (self.config.get('Team Preset') if self.config else None) or None
+
+    def apply_team_preset(self):
+        """按队伍预设预先创建角色对象 (任务开始时调用), 没有预设时不做任何事。"""
+        name = self.team_preset_name()
+        self.loaded_preset = name
+        loaded = load_team_preset(self, name) if name else None
+        if loaded is None:
+            self.preset_hashes = []
+            return False
+        self.chars, self.preset_hashes = loaded
+        return True
+
+    def verify_team_preset(self, hashes, current_index, count, max_distance=10):
+        """确认队伍与预设一致, 一致时不必重新识别角色。
+
+        场下角色比较头像哈希; 场上角色的头像栏没有数字, 哈希不可靠, 改为只匹配预设角色的模板。
+
+        Returns:
+            bool: 队伍与预设一致则返回 True。
+        """
+        if self.preset_hashes is None or self.loaded_preset != self.team_preset_name():
+            self.apply_team_preset()
+        if len(self.preset_hashes) != count or len(self.chars) != count:
+            return False
+        for index, char in enumerate(self.chars):
+            if char is None:
+                return False
+            if index == current_index or not self.preset_hashes[index]:
+                if not self.find_one(char.char_name, box=self.get_box_by_name(f'box_char_{index + 1}'),
+                                     threshold=0.6):
+                    return False
+            elif hash_distance(hashes[index], self.preset_hashes[index]) > max_distance:
+                logger.info(f'team preset slot {index} changed, recognize team again')
+                return False
+        if any(not self.preset_hashes[index] for index in range(count) if index != current_index):
+            self.update_team_preset(hashes, current_index, self.chars)
+        return True
+
+    def update_team_preset(self, hashes, current_index, previous):
+        """识别队伍后更新预设, 场上角色的头像哈希沿用预设中同一角色的值 (没有则在下次场下时补上)。"""
+        saved = []
+        for index, char in enumerate(self.chars):
+            if index != current_index:
+                saved.append(hashes[index])
+            elif index < len(self.preset_hashes) and char is safe_get(previous, index):
+                saved.append(self.preset_hashes[index])
+            else:
+                saved.append(0)
+        if save_team_preset(self.team_preset_name(), self.chars, saved):
+            self.preset_hashes = saved
+
     @staticmethod
     def should_update(the_char, old_char):
         """判断是否应该更新角色对象 (例如, 识别到新角色或角色类型变化)。
@@ -624,6 +802,7 @@ class BaseCombatTask(CombatCheck):
         return self.box_of_screen_scaled(3840, 2160, 1431, 1942, 1557, 2068, name='con_full',
                                          hcenter=True)
 
+    @traced('frame')
     def get_current_con(self):
         """获取当前角色的协奏值百分比。
 
@@ -758,6 +937,7 @@ class BaseCombatTask(CombatCheck):
 
         return the_area, is_full
 
+    @traced('frame')
     def update_lib_portrait_icon(self):
         # self.ensure_con_lib_boxes()
         for i in range(len(self.chars)):
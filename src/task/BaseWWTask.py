@@ -1,14 +1,27 @@
 import math
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import numpy as np
 
-from ok import BaseTask, Logger, find_boxes_by_name, og, find_color_rectangles, mask_white
+from ok import BaseTask, Box, Logger, find_boxes_by_name, og, find_color_rectangles, mask_white, relative_box, \
+    sort_boxes
 from ok import CannotFindException
 import cv2
 
+from src.task.ClimbMonitor import ClimbMonitor
+from src.task.MapLocator import MapLocator, MapTileIndex
+from src.task.OcrBatch import scale_crop, split_results, stack_crops
+from src.task.OcrCache import OcrCache
+from src.task.OcrNumber import NUMBER_CHARS, recognize_line, tight_crop
+from src.task.OcrService import completed, get_ocr_service
+from src.task.RegionWatch import RegionWatch
+from src.task.Route import Route, RoutePlayer, RouteRecorder
+from src.task.Steering import SteeringController, screen_offset_to_angle
+from src.task.TargetTracker import TargetTracker
+
 logger = Logger.get_logger(__name__)
 number_re = re.compile(r'^(\d+)$')
 stamina_re = re.compile(r'^(\d+)/(\d+)$')
@@ -18,10 +31,20 @@ f_white_color = {
     'b': (235, 255)  # Blue range
 }
 processed_feature = False
+_sweep_executor = None
 
 
 class BaseWWTask(BaseTask):
     map_zoomed = False
+    _steering = None
+    _map_locator = None
+    last_echo_confidence = 0  # highest echo detection confidence of the last yolo_find_echo
+    analog_steering = False  # opt in: keep w held and steer with the camera, needs relative mouse input
+    camera_pixels_per_degree = 0  # relative mouse movement per degree of camera yaw, measured by calibrate_camera
+    stamina_region = (0.49, 0.0, 0.92, 0.10)  # current/backup stamina in the F2 book and the stamina dialog
+    reward_region = (0.2, 0.3, 0.8, 0.75)  # items on the reward screen after claiming a domain/tacet reward
+    ocr_settle_time = 0.2  # how long a region must stay still before wait_ocr reads it again
+    _region_watch = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -31,6 +54,225 @@ class BaseWWTask(BaseTask):
         self.key_config = self.get_global_config('Game Hotkey Config')  # 游戏热键配置
         self.next_monthly_card_start = 0
         self._logged_in = False
+        self.ocr_cache = OcrCache()
+
+    def ocr(self, x=0, y=0, to_x=1, to_y=1, match=None, width=0, height=0, box=None, name=None, frame=None,
+            cache=True, **kwargs):
+        """OCR with an LRU cache keyed by the hash of the cropped region, so unchanged regions return instantly."""
+        image = frame if frame is not None else self.frame
+        if not cache or image is None or kwargs.get('log') or kwargs.get('screenshot'):
+            return super().ocr(x=x, y=y, to_x=to_x, to_y=to_y, match=match, width=width, height=height, box=box,
+                               name=name, frame=frame, **kwargs)
+        if isinstance(box, str):
+            box = self.get_box_by_name(box)
+        if box is None:
+            box = relative_box(image.shape[1], image.shape[0], x, y, to_x, to_y, width, height, name)
+        crop = box.crop_frame(image)
+        key = self.ocr_cache.key(crop, box, match, kwargs)
+        framework_ocr = super().ocr
+
+        def read():
+            boxes = self.ocr_cache.get(key)
+            if boxes is None:
+                start = time.time()
+                boxes = framework_ocr(match=match, box=box, name=name, frame=frame, **kwargs)
+                self.ocr_cache.put(key, boxes, time.time() - start)
+            return boxes
+
+        if self._region_watch is not None and frame is None:
+            result = self._region_watch.read((box.x, box.y, box.width, box.height), crop, read)
+            self.info['Region Watch'] = self._region_watch.stats()
+        else:
+            result = read()
+        self.info['OCR Cache'] = self.ocr_cache.stats()
+        return result
+
+    def wait_ocr(self, *args, watch=True, settle_time=-1, **kwargs):
+        """wait_ocr that only runs OCR once the region has changed and then stayed still for settle_time.
+
+        A region that keeps changing is still OCR'd at least every quarter of time_out.
+
+        Args:
+            watch (bool | RegionWatch): False polls OCR every frame, a RegionWatch is reused across calls.
+        """
+        if watch is False:
+            return super().wait_ocr(*args, settle_time=settle_time, **kwargs)
+        previous = self._region_watch
+        self._region_watch = watch if isinstance(watch, RegionWatch) else \
+            RegionWatch(settle_time=settle_time if settle_time > 0 else self.ocr_settle_time)
+        try:
+            with self._region_watch.limit_interval(kwargs.get('time_out', 0)):
+                return super().wait_ocr(*args, settle_time=settle_time, **kwargs)
+        finally:
+            self._region_watch = previous
+
+    def _region_box(self, region, name=None):
+        if isinstance(region, str):
+            return self.get_box_by_name(region)
+        if isinstance(region, (tuple, list)):
+            return self.box_of_screen(*region, name=name)
+        return region
+
+    def ocr_batch(self, regions, threshold=0, target_height=0, frame=None, lib='default'):
+        """OCR several named regions at once, one detection and one batched recognition call on onnxocr.
+
+        Args:
+            regions (dict): name -> (region, match), region is a Box, a box name or relative (x, y, to_x, to_y).
+
+        Returns:
+            dict: name -> matched boxes, the same as ocr() returns for each region.
+        """
+        image = frame if frame is not None else self.frame
+        if image is None:
+            return {name: [] for name in regions}
+        threshold = threshold or self.ocr_default_threshold
+        options = {'threshold': threshold, 'target_height': target_height, 'lib': lib}
+        results = {}
+        pending = []
+        for name, (region, match) in regions.items():
+            box = self._region_box(region, name)
+            key = self.ocr_cache.key(box.crop_frame(image), box, match, options)
+            cached = self.ocr_cache.get(key)
+            if cached is not None:
+                results[name] = cached
+            else:
+                pending.append((name, box, match, key))
+        if pending and self.ocr_fun(lib) != self.onnx_ocr:
+            for name, box, match, key in pending:
+                results[name] = self.ocr(box=box, match=match, threshold=threshold, target_height=target_height,
+                                         frame=frame, lib=lib)
+            pending = []
+        if pending:
+            start = time.time()
+            crops, scales = [], []
+            for _, box, _, _ in pending:
+                crop, scale = scale_crop(box.crop_frame(image), image.shape[0], target_height)
+                crops.append(crop)
+                scales.append(scale)
+            found = {}
+            for canvas, placements in stack_crops(crops):
+                found.update(split_results(self.executor.ocr_lib(lib).ocr(canvas)[0], placements))
+            elapsed = (time.time() - start) / len(pending)
+            for i, (name, box, match, key) in enumerate(pending):
+                boxes = []
+                for text_box in found.get(i, []):
+                    if text_box.confidence < threshold:
+                        continue
+                    boxes.append(Box(box.x + round(text_box.x / scales[i]), box.y + round(text_box.y / scales[i]),
+                                     round(text_box.width / scales[i]), round(text_box.height / scales[i]),
+                                     text_box.confidence, text_box.name))
+                self.fix_texts(boxes)
+                if match is not None:
+                    boxes = find_boxes_by_name(boxes, self.fix_match_regex(match))
+                results[name] = sort_boxes(boxes)
+                self.ocr_cache.put(key, results[name], elapsed)
+            self.info['OCR Cache'] = self.ocr_cache.stats()
+        return results
+
+    def wait_ocr_batch(self, regions, required=None, time_out=0, settle_time=-1, raise_if_not_found=False):
+        """wait_ocr for ocr_batch, waits until every required region matches.
+
+        Returns:
+            dict: the first complete result, or the last partial result after time out.
+        """
+        required = list(regions) if required is None else required
+        last = {name: [] for name in regions}
+
+        def read():
+            last.update(self.ocr_batch(regions))
+            return dict(last) if all(last[name] for name in required) else None
+
+        return self.wait_until(read, time_out=time_out, settle_time=settle_time,
+                               raise_if_not_found=raise_if_not_found) or last
+
+    def read_number(self, box, pattern, chars=NUMBER_CHARS, threshold=0, frame=None, lib='default'):
+        """Read a single line of digits in a fixed box with recognition only, skipping text detection.
+
+        The text is cropped tightly, scaled to the recogniser's input height and decoded with only chars allowed.
+        Falls back to ocr() when the ocr lib is not onnxocr.
+
+        Returns:
+            list[Box]: the same as ocr(box=box, match=pattern).
+        """
+        box = self._region_box(box)
+        threshold = threshold or self.ocr_default_threshold
+        if self.ocr_fun(lib) != self.onnx_ocr:
+            return self.ocr(box=box, match=pattern, threshold=threshold, frame=frame, lib=lib)
+        image = frame if frame is not None else self.frame
+        if image is None:
+            return []
+        crop = box.crop_frame(image)
+        key = self.ocr_cache.key(crop, box, pattern, {'chars': chars, 'threshold': threshold, 'lib': lib})
+        boxes = self.ocr_cache.get(key)
+        if boxes is None:
+            start = time.time()
+            boxes = []
+            line = tight_crop(crop)
+            if line is not None:
+                line_image, (x, y, width, height) = line
+                text, confidence = recognize_line(self.executor.ocr_lib(lib).text_recognizer, line_image, chars)
+                if text and confidence >= threshold:
+                    boxes.append(Box(box.x + x, box.y + y, width, height, confidence, text))
+            self.fix_texts(boxes)
+            if pattern is not None:
+                boxes = find_boxes_by_name(boxes, self.fix_match_regex(pattern))
+            self.ocr_cache.put(key, boxes, time.time() - start)
+        self.info['OCR Cache'] = self.ocr_cache.stats()
+        return boxes
+
+    def wait_read_number(self, box, pattern, chars=NUMBER_CHARS, time_out=0, settle_time=-1):
+        """wait_ocr for read_number, reads once more with full ocr() if it times out."""
+        box = self._region_box(box)
+        return self.wait_until(lambda: self.read_number(box, pattern, chars), time_out=time_out,
+                               settle_time=settle_time, raise_if_not_found=False) or self.ocr(box=box, match=pattern)
+
+    def ocr_async(self, x=0, y=0, to_x=1, to_y=1, match=None, box=None, name=None, threshold=0, frame=None):
+        """OCR on the OCR service worker threads, so the task can keep sending keys while it runs.
+
+        The region is cropped from the current frame before returning. Runs ocr() right away if the service
+        is not started or not warmed up yet.
+
+        Returns:
+            Future[list[Box]]: resolves to the boxes ocr() would return.
+        """
+        image = frame if frame is not None else self.frame
+        if image is None:
+            return completed([])
+        box = self._region_box(box, name) if box is not None else \
+            relative_box(image.shape[1], image.shape[0], x, y, to_x, to_y, 0, 0, name)
+        threshold = threshold or self.ocr_default_threshold
+        service = get_ocr_service()
+        if service is None or not service.ready:
+            return completed(self.ocr(box=box, match=match, threshold=threshold, frame=frame))
+        crop = box.crop_frame(image).copy()
+        key = self.ocr_cache.key(crop, box, match, {'threshold': threshold})
+        cached = self.ocr_cache.get(key)
+        if cached is not None:
+            return completed(cached)
+        match = self.fix_match_regex(match)
+
+        def read(engine):
+            start = time.time()
+            boxes = []
+            for text_box in split_results(engine.ocr(crop)[0], [(0, 0, crop.shape[0])], pad=0)[0]:
+                if text_box.confidence >= threshold:
+                    boxes.append(Box(box.x + round(text_box.x), box.y + round(text_box.y), text_box.width,
+                                     text_box.height, text_box.confidence, text_box.name))
+            self.fix_texts(boxes)
+            if match is not None:
+                boxes = find_boxes_by_name(boxes, match)
+            boxes = sort_boxes(boxes)
+            self.ocr_cache.put(key, boxes, time.time() - start)
+            return boxes
+
+        self.info['OCR Service'] = service.stats()
+        return service.submit(read)
+
+    def log_rewards(self, rewards):
+        """Log the texts of an ocr_async of reward_region once it is done."""
+        texts = ' '.join(box.name for box in rewards.result())
+        self.info_set('Last Rewards', texts)
+        logger.info(f'rewards: {texts}')
 
     def is_open_world_auto_combat(self):
         from src.task.AutoCombatTask import AutoCombatTask
@@ -139,6 +381,8 @@ class BaseWWTask(BaseTask):
         last_direction = None
         start = time.time()
         no_echo_start = 0
+        tracker = TargetTracker(lambda: self.find_echos(threshold=echo_threshold))
+        steering = SteeringController() if self.can_steer_camera() else None
         while time.time() - start < time_out:
             self.next_frame()
             if self.pick_f():
@@ -149,8 +393,8 @@ class BaseWWTask(BaseTask):
                 self.log_debug('pick echo has_target return fail')
                 self._stop_last_direction(last_direction)
                 return False
-            echos = self.find_echos(threshold=echo_threshold)
-            if not echos:
+            echo = tracker.update(self.frame)
+            if not echo:
                 if no_echo_start == 0:
                     no_echo_start = time.time()
                 elif time.time() - no_echo_start > 3:
@@ -159,10 +403,12 @@ class BaseWWTask(BaseTask):
                 next_direction = 'w'
             else:
                 no_echo_start = 0
-                echo = echos[0]
                 center_distance = echo.center()[0] - self.width_of_screen(0.5)
                 threshold = 0.05 if not last_direction else 0.15
-                if abs(center_distance) < self.height_of_screen(threshold):
+                if steering is not None and echo.y + echo.height <= self.height_of_screen(0.65):
+                    next_direction = 'w'
+                    self.turn_camera(steering.update(screen_offset_to_angle(center_distance / self.screen_width)))
+                elif abs(center_distance) < self.height_of_screen(threshold):
                     if echo.y + echo.height > self.height_of_screen(0.65):
                         next_direction = 's'
                     else:
@@ -174,6 +420,7 @@ class BaseWWTask(BaseTask):
             last_direction = self._walk_direction(last_direction, next_direction)
             if update_function is not None:
                 update_function()
+        self.log_debug(f'walk_to_yolo_echo tracker {tracker.stats()}')
         self._stop_last_direction(last_direction)
 
     def _walk_direction(self, last_direction, next_direction):
@@ -183,6 +430,47 @@ class BaseWWTask(BaseTask):
                 self.send_key_down(next_direction)
         return next_direction
 
+    def can_steer_camera(self):
+        """Whether analog steering is on and usable: the interaction sends relative mouse moves (PostMessage does
+        not turn the camera) and camera_pixels_per_degree has been calibrated."""
+        if not self.analog_steering or not hasattr(self.executor.interaction, 'move_mouse_relative'):
+            return False
+        if self.camera_pixels_per_degree <= 0 and not self.calibrate_camera():
+            BaseWWTask.analog_steering = False
+            return False
+        return True
+
+    def calibrate_camera(self, pixels=200):
+        """Measure camera_pixels_per_degree by moving the mouse right then back and phase correlating the frames."""
+        if not self.in_team_and_world():
+            return False
+
+        def view():
+            self.next_frame()
+            band = self.frame[int(self.frame.shape[0] * 0.2):int(self.frame.shape[0] * 0.6)]
+            return np.float32(cv2.cvtColor(band, cv2.COLOR_BGR2GRAY))
+
+        before = view()
+        self.executor.interaction.move_mouse_relative(pixels, 0)
+        self.sleep(0.2)
+        after = view()
+        self.executor.interaction.move_mouse_relative(-pixels, 0)
+        self.sleep(0.2)
+        (shift, _), response = cv2.phaseCorrelate(before, after)
+        degrees = abs(screen_offset_to_angle(shift / before.shape[1]))
+        if response < 0.1 or degrees < 1:
+            logger.info(f'calibrate_camera failed shift {shift:.1f} response {response:.2f}, use key turns')
+            return False
+        BaseWWTask.camera_pixels_per_degree = pixels / degrees
+        logger.info(f'calibrate_camera {BaseWWTask.camera_pixels_per_degree:.2f} pixels per degree')
+        return True
+
+    def turn_camera(self, degrees):
+        """Turn the camera yaw with a relative mouse move, positive is right. Only call if can_steer_camera()."""
+        dx = int(degrees * self.camera_pixels_per_degree)
+        if dx:
+            self.executor.interaction.move_mouse_relative(dx, 0)
+
     def _stop_last_direction(self, last_direction):
         if last_direction:
             self.send_key_up(last_direction)
@@ -209,18 +497,16 @@ class BaseWWTask(BaseTask):
         running = False
         last_target = None
         centered = False
+        tracker = TargetTracker(lambda: self._as_box_list(find_function()))
+        climb = ClimbMonitor(self)
         while time.time() - start < time_out:
             self.next_frame()
+            climb.begin()
             if end_condition:
                 ended = end_condition()
                 if ended:
                     break
-            treasure_icon = find_function()
-            if isinstance(treasure_icon, list):
-                if len(treasure_icon) > 0:
-                    treasure_icon = treasure_icon[0]
-                else:
-                    treasure_icon = None
+            treasure_icon = tracker.update(self.frame)
             if treasure_icon:
                 last_target = treasure_icon
             if last_target is None:
@@ -255,21 +541,23 @@ class BaseWWTask(BaseTask):
                 last_direction = next_direction
                 if next_direction:
                     self.send_key_down(next_direction)
+            climb.observe(self.frame, next_direction == 'w')
             if running:
-                if not self.find_one('on_the_wall', threshold=0.7):
+                if not climb.wall():
                     self.log_info('not on the wall, stop running')
+                    running = False
                     self.mouse_up(key='right')
             else:
-                if next_direction == 'w' and self.find_one('on_the_wall', threshold=0.7):
+                if next_direction == 'w' and climb.wall():
                     self.log_info('on the wall, start running')
                     running = True
                     self.mouse_down(key='right')
                     self.sleep(0.1)
-            if use_hook and next_direction == 'w':
-                if self.find_one('tool_teleport', 0.75):
-                    self.send_key(self.key_config['Tool Key'])
-                    self.sleep(3)
-                    continue
+            if use_hook and climb.hook():
+                self.send_key(self.key_config['Tool Key'])
+                self.sleep(3)
+            climb.end()
+        logger.debug(f'do_walk_to_box {climb.stats()} {tracker.stats()}')
         if last_direction:
             self.send_key_up(last_direction)
             self.sleep(0.001)
@@ -280,6 +568,12 @@ class BaseWWTask(BaseTask):
         else:
             return ended
 
+    @staticmethod
+    def _as_box_list(found):
+        if isinstance(found, list):
+            return found
+        return [found] if found else []
+
     def opposite_direction(self, direction):
         if direction == 'w':
             return 's'
@@ -386,9 +680,42 @@ class BaseWWTask(BaseTask):
         else:
             return True
 
-    def get_stamina(self):
-        boxes = self.wait_ocr(0.49, 0.0, 0.92, 0.10, raise_if_not_found=False,
-                              match=[number_re, stamina_re])
+    def walk_route(self, name, end_condition, record=False, time_out=60, raise_if_not_found=True):
+        """Replay a recorded route until end_condition, or record one while the user walks it.
+
+        Returns None if the route was not recorded yet, so the caller can fall back to its own walking.
+        Once playback has started the character is somewhere along the route, so a scripted walk from the
+        teleport point would start from the wrong position: if end_condition is not met, this raises
+        (or returns False when raise_if_not_found is False) instead of letting the caller fall back.
+        """
+        if record:
+            self.log_info(f'recording route {name}, walk to the target manually without turning the camera',
+                          notify=True)
+            self.middle_click(after_sleep=0.2)
+            recorder = RouteRecorder(self, name)
+            recorder.begin()
+            reached = False
+            try:
+                reached = bool(self.wait_until(lambda: recorder.poll() or end_condition(), time_out=time_out))
+            finally:
+                recorder.end(save=reached)
+        else:
+            route = Route.load(name)
+            if route is None:
+                logger.info(f'route {name} not recorded')
+                return None
+            player = RoutePlayer(self, route)
+            player.play()
+            logger.info(f'route {name} played, {player.corrections} corrections')
+            reached = bool(self.wait_until(end_condition, time_out=2))
+        if not reached and raise_if_not_found:
+            raise Exception(f'route {name} did not reach the target, record it again')
+        return reached
+
+    def get_stamina(self, boxes=None):
+        if boxes is None:
+            boxes = self.wait_ocr(*self.stamina_region, raise_if_not_found=False,
+                                  match=[number_re, stamina_re])
         if not boxes:
             self.screenshot('stamina_error')
             return -1, -1, -1
@@ -408,8 +735,12 @@ class BaseWWTask(BaseTask):
 
     def use_stamina(self, once, must_use=0, prefer_single=False):
         self.sleep(1)
-        double = self.ocr(0.55, 0.56, 0.75, 0.69, match=[re.compile(str(once * 2))])
-        current, back_up, total = self.get_stamina()
+        texts = self.wait_ocr_batch({
+            'double': ((0.55, 0.56, 0.75, 0.69), [re.compile(str(once * 2))]),
+            'stamina': (self.stamina_region, [number_re, stamina_re]),
+        }, required=['stamina'])
+        double = texts['double']
+        current, back_up, total = self.get_stamina(texts['stamina'])
         y = 0.62
         if not double:  # 找不到双倍数字, 说明有UP, 点击右边
             x = 0.67
@@ -535,14 +866,60 @@ class BaseWWTask(BaseTask):
             list: List of dictionaries containing detection information such as class_id, class_name, confidence, etc.
         """
         # Load the ONNX model
-        ret = og.my_app.yolo_detect(self.frame, threshold=threshold, label=0)
+        ret = self._detect_echos(self.frame, threshold)
+        self.draw_boxes("echo", ret)
+        return ret
 
+    @staticmethod
+    def _detect_echos(frame, threshold):
+        ret = og.my_app.yolo_detect(frame, threshold=threshold, label=0)
         for box in ret:
             box.y += box.height * 1 / 3
             box.height = 1
-        self.draw_boxes("echo", ret)
         return ret
 
+    def sweep_find_echo(self, threshold=0.5, step=30, settle=0.02, early_stop=0.75):
+        """Turn the camera a full circle while YOLO runs on a worker thread, then face the best echo.
+
+        Each detection is tagged with the camera yaw at capture, so the sweep never stops to wait for the model.
+        Turns in step-degree mouse moves and stops early once an echo reaches early_stop confidence. yolo_find_echo
+        tries it before the stepped `a` turns when can_steer_camera() is True.
+        Returns the detected echo count, 0 if none was found (the camera is then back where it started).
+        """
+        global _sweep_executor
+        if _sweep_executor is None:
+            _sweep_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='echo_sweep')
+        yaw = 0
+        pending = []
+        best = None  # (confidence, heading)
+        max_count = 0
+        for i in range(360 // step):
+            if i:
+                self.turn_camera(step)
+                yaw += step
+                self.sleep(settle)
+            self.next_frame()
+            pending.append((yaw, _sweep_executor.submit(self._detect_echos, self.frame, threshold)))
+            while pending and (pending[0][1].done() or i == 360 // step - 1):
+                capture_yaw, future = pending.pop(0)
+                echos = future.result()
+                max_count = max(max_count, len(echos))
+                for echo in echos:
+                    offset = (echo.center()[0] - self.width_of_screen(0.5)) / self.screen_width
+                    heading = capture_yaw + screen_offset_to_angle(offset)
+                    if best is None or echo.confidence > best[0]:
+                        best = (echo.confidence, heading)
+            if best is not None and best[0] >= early_stop:
+                break
+        for _, future in pending:
+            future.cancel()
+        to_turn = ((best[1] if best is not None else 0) - yaw + 180) % 360 - 180
+        self.log_debug(f'sweep_find_echo best {best} yaw {yaw} turn {to_turn:.0f}')
+        self.last_echo_confidence = best[0] if best is not None else 0
+        self.turn_camera(to_turn)
+        self.sleep(settle)
+        return max_count if best is not None else 0
+
     def yolo_find_all(self, threshold=0.3):
         """
         Main function to load ONNX model, perform inference, draw bounding boxes, and display the output image.
@@ -584,16 +961,23 @@ class BaseWWTask(BaseTask):
 
     def yolo_find_echo(self, use_color=False, turn=True, update_function=None, time_out=8, threshold=0.5):
         max_echo_count = 0
+        self.last_echo_confidence = 0
         if self.pick_echo():
             self.sleep(0.5)
             return True, True
         front_box = self.box_of_screen(0.35, 0.35, 0.65, 0.53, hcenter=True)
         color_threshold = 0.02
+        if turn and self.can_steer_camera():
+            self.center_camera()
+            if echo_count := self.sweep_find_echo(threshold=threshold):
+                return self.walk_to_yolo_echo(update_function=update_function, time_out=time_out), echo_count > 1
+            self.log_debug('sweep_find_echo found nothing, fall back to stepped search')
         for i in range(4):
             if turn:
                 self.center_camera()
             echos = self.find_echos(threshold=threshold)
             max_echo_count = max(max_echo_count, len(echos))
+            self.last_echo_confidence = max([self.last_echo_confidence] + [echo.confidence for echo in echos])
             self.log_debug(f'max_echo_count {max_echo_count}')
             if echos:
                 self.log_info(f'yolo found echo {echos}')
@@ -763,8 +1147,99 @@ class BaseWWTask(BaseTask):
         self.log_info(f'angle: {my_angle}, to_turn: {to_turn}')
         return to_turn
 
+    def map_locator(self):
+        """The minimap locator, None if no world-map tiles are cached in configs/map_tiles."""
+        if self._map_locator is None:
+            if not MapTileIndex.available():
+                return None
+            index = MapTileIndex()
+            index.load()
+            BaseWWTask._map_locator = MapLocator(index)
+        return self._map_locator
+
+    def locate_on_map(self):
+        """World position and heading of the player from the minimap, None if it can't be located."""
+        locator = self.map_locator()
+        if locator is None:
+            return None
+        return locator.locate(self.get_box_by_name('box_minimap').crop_frame(self.frame))
+
+    def map_path(self, name):
+        locator = self.map_locator()
+        return locator.index.paths().get(name) if locator is not None else None
+
+    def follow_map_path(self, waypoints, end_condition=None, time_out=30, arrive_distance=12, lost_time_out=2):
+        """Walk through world-map waypoints, steering by the located position instead of a minimap icon.
+
+        Returns True if end_condition was met or the last waypoint was reached, False if the map is unavailable,
+        localisation was lost for lost_time_out seconds or it timed out.
+        """
+        locator = self.map_locator()
+        if locator is None or not waypoints:
+            return False
+        locator.reset()
+        remaining = list(waypoints)
+        current_direction = None
+        current_adjust = None
+        lost_since = None
+        result = False
+        start = time.time()
+        try:
+            while time.time() - start < time_out:
+                self.next_frame()
+                if end_condition is not None and end_condition():
+                    result = True
+                    break
+                pose = self.locate_on_map()
+                if pose is None:
+                    lost_since = lost_since or time.time()
+                    if time.time() - lost_since > lost_time_out:
+                        self.log_info('lost map position, stop following path')
+                        break
+                    continue
+                lost_since = None
+                while remaining and pose.distance_to(*remaining[0]) < arrive_distance:
+                    remaining.pop(0)
+                if not remaining:
+                    result = True
+                    break
+                bearing = pose.bearing_to(*remaining[0])
+                heading = pose.heading if pose.heading is not None else self.get_my_angle()
+                angle = self.get_angle_between(heading, bearing)
+                current_direction, current_adjust, _ = self._navigate_based_on_angle(angle, current_direction,
+                                                                                     current_adjust)
+                if abs(angle) > 45 or pose.heading is None:
+                    locator.heading = bearing  # turned towards the waypoint, motion heading is stale
+        finally:
+            if current_adjust:
+                self.send_key_up(current_adjust)
+            self._stop_movement(current_direction)
+        logger.info(f'follow_map_path {result} {len(remaining)} waypoints left, {locator.stats()}')
+        return result
+
+    def record_map_path(self, name, end_condition, time_out=120, spacing=40):
+        """Save the located positions as waypoints while the user walks a path, e.g. around obstacles to a boss."""
+        locator = self.map_locator()
+        if locator is None:
+            return False
+        locator.reset()
+        waypoints = []
+
+        def poll():
+            pose = self.locate_on_map()
+            if pose is not None and (not waypoints or pose.distance_to(*waypoints[-1]) >= spacing):
+                waypoints.append((pose.x, pose.y))
+            return end_condition()
+
+        reached = self.wait_until(poll, time_out=time_out)
+        if reached and waypoints:
+            locator.index.save_path(name, waypoints)
+            self.log_info(f'saved map path {name} with {len(waypoints)} waypoints')
+        return bool(reached)
+
     def _stop_movement(self, current_direction):
         """Releases keys and mouse to stop character movement."""
+        self._steering = None
         if current_direction is not None:
             self.mouse_up(key='right')
             self.send_key_up(current_direction)
@@ -780,6 +1255,11 @@ class BaseWWTask(BaseTask):
         - should_continue: A boolean indicating if the calling loop should `continue`.
         """
         # 1. Handle minor adjustments if already moving forward
+        if current_direction == 'w' and -80 <= angle <= 80 and self.can_steer_camera():
+            if self._steering is None:
+                self._steering = SteeringController()
+            self.turn_camera(self._steering.update(angle))
+            return current_direction, current_adjust, True
         if current_direction == 'w':
             if 10 <= angle <= 80:
                 minor_adjust = 'd'
@@ -815,6 +1295,7 @@ class BaseWWTask(BaseTask):
         # 4. Change direction if needed
         if current_direction != new_direction:
             self.log_info(f'changed direction {angle} {current_direction} -> {new_direction}')
+            self._steering = None
             if current_direction:
                 self.mouse_up(key='right')
                 self.send_key_up(current_direction)
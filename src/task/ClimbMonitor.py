@@ -0,0 +1,103 @@
+"""爬墙和钩索提示的检测调度: do_walk_to_box 只在提示可能变化时找图, 而不是每次循环都找。
+
+离开墙面后停止奔跑, 到下一面墙可以重新开始。每次循环的耗时和检测次数记录为 do_walk_to_box ... wall checks N。
+"""
+import time
+
+import cv2
+import numpy as np
+
+
+class ClimbMonitor:
+    """do_walk_to_box 中爬墙 (on_the_wall) 和钩索 (tool_teleport) 提示的检测调度。
+
+    原来每次循环都找图; 这里只在提示可能变化时才检测:
+    - 刚开始向前走, 或向前走时画面停止变化 (撞墙/开始爬墙) 超过 stall_time 秒;
+    - 地面上每 ground_interval 秒, 爬墙时每 climb_interval 秒兜底检测一次 (爬到顶/掉下来)。
+    钩索提示在向前走时每 hook_interval 秒检测一次, 停滞时立即检测。
+    画面变化用缩小到 64x36 的灰度图的平均差值估计。
+    """
+
+    def __init__(self, task, stall_threshold=2.0, stall_time=0.25, ground_interval=0.6, climb_interval=0.3,
+                 hook_interval=0.3, min_interval=0.1):
+        """
+        Args:
+            stall_threshold (float): 相邻两帧缩略图平均差值低于此值视为画面停止变化。
+            stall_time (float): 画面停止变化持续多少秒视为停滞。
+            min_interval (float): 同一提示两次检测的最短间隔。
+        """
+        self.task = task
+        self.stall_threshold = stall_threshold
+        self.stall_time = stall_time
+        self.ground_interval = ground_interval
+        self.climb_interval = climb_interval
+        self.hook_interval = hook_interval
+        self.min_interval = min_interval
+        self.on_wall = False
+        self.forward = False
+        self.started_forward = False
+        self.still_since = None
+        self.last_thumb = None
+        self.last_wall_check = 0
+        self.last_hook_check = 0
+        self.iterations = 0
+        self.wall_checks = 0
+        self.hook_checks = 0
+        self.iteration_time = 0.0
+        self._iteration_start = 0
+
+    def begin(self):
+        self._iteration_start = time.perf_counter()
+
+    def end(self):
+        self.iterations += 1
+        self.iteration_time += time.perf_counter() - self._iteration_start
+
+    def observe(self, frame, forward):
+        """记录本次循环的画面和是否在向前走。"""
+        self.started_forward = forward and not self.forward
+        self.forward = forward
+        thumb = cv2.cvtColor(cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        now = time.time()
+        if self.last_thumb is not None and np.mean(cv2.absdiff(thumb, self.last_thumb)) < self.stall_threshold:
+            if self.still_since is None:
+                self.still_since = now
+        else:
+            self.still_since = None
+        self.last_thumb = thumb
+
+    @property
+    def stalled(self):
+        return self.forward and self.still_since is not None and time.time() - self.still_since >= self.stall_time
+
+    def _wall_due(self):
+        elapsed = time.time() - self.last_wall_check
+        if elapsed < self.min_interval:
+            return False
+        if self.started_forward or self.stalled:
+            return True
+        return elapsed >= (self.climb_interval if self.on_wall else self.ground_interval)
+
+    def wall(self):
+        """是否在墙上, 只在需要时找图, 其余时间返回上次结果。"""
+        if self._wall_due():
+            self.wall_checks += 1
+            self.last_wall_check = time.time()
+            self.on_wall = self.task.find_one('on_the_wall', threshold=0.7) is not None
+        return self.on_wall
+
+    def hook(self):
+        """向前走时按需检测钩索提示, 不需要检测时返回 None。"""
+        elapsed = time.time() - self.last_hook_check
+        if not self.forward or elapsed < self.min_interval:
+            return None
+        if not (self.started_forward or self.stalled or elapsed >= self.hook_interval):
+            return None
+        self.hook_checks += 1
+        self.last_hook_check = time.time()
+        return self.task.find_one('tool_teleport', 0.75)
+
+    def stats(self):
+        average = self.iteration_time / self.iterations * 1000 if self.iterations else 0
+        return (f'{self.iterations} iterations {average:.1f}ms, wall checks {self.wall_checks}, '
+                f'hook checks {self.hook_checks}')
@@ -16,6 +16,7 @@ logger = Logger.get_logger(__name__)
 
 
 class DailyTask(WWOneTimeTask, BaseCombatTask):
+    daily_points_region = (0.19, 0.8, 0.30, 0.93)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -114,19 +115,25 @@ class DailyTask(WWOneTimeTask, BaseCombatTask):
         self.log_info('open_daily')
         gray_book_quest = self.openF2Book("gray_book_quest")
         self.click_box(gray_book_quest, after_sleep=1.5)
-        progress = self.ocr(0.1, 0.1, 0.5, 0.75, match=re.compile(r'^(\d+)/180$'))
-        if not progress:
+        regions = {
+            'progress': ((0.1, 0.1, 0.5, 0.75), re.compile(r'^(\d+)/180$')),
+            'points': (self.daily_points_region, number_re),
+        }
+        texts = self.ocr_batch(regions)
+        if not texts['progress']:
             self.click(0.961, 0.6, after_sleep=1)
-            progress = self.ocr(0.1, 0.1, 0.5, 0.75, match=re.compile(r'^(\d+)/180$'))
+            texts = self.ocr_batch(regions)
+        progress = texts['progress']
         if progress:
             current = int(progress[0].name.split('/')[0])
         else:
             current = 0
         self.info_set('current daily progress', current)
-        return current, self.get_total_daily_points() >= 100
+        return current, self.get_total_daily_points(texts['points']) >= 100
 
-    def get_total_daily_points(self):
-        points_boxes = self.ocr(0.19, 0.8, 0.30, 0.93, match=number_re)
+    def get_total_daily_points(self, points_boxes=None):
+        if points_boxes is None:
+            points_boxes = self.ocr(*self.daily_points_region, match=number_re)
         if points_boxes:
             points = int(points_boxes[0].name)
         else:
@@ -47,7 +47,9 @@ class DomainTask(WWOneTimeTask, BaseCombatTask):
             self.info_incr('used stamina', used)
             must_use -= used
             self.sleep(4)
+            rewards = self.ocr_async(*self.reward_region)  # 后台识别奖励, 同时继续点击
             if not can_continue:
+                self.log_rewards(rewards)
                 self.log_info("used all stamina")
                 break
             self.click(0.68, 0.84, after_sleep=1)  # farm again
@@ -63,6 +65,7 @@ class DomainTask(WWOneTimeTask, BaseCombatTask):
                     relative_x=-1, raise_if_not_found=False,
                     threshold=0.6,
                     time_out=1)
+            self.log_rewards(rewards)
             self.wait_in_team_and_world(time_out=self.teleport_timeout)
             self.sleep(1)
         #
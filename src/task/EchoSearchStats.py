@@ -0,0 +1,140 @@
+"""找声骸的统计 (configs/echo_search.db): FarmEchoTask 按 Boss 配置学习找声骸和等待下一场战斗的超时。
+
+YOLO 阈值只在出现误报后才调整, 且不超出默认值 -0.1/+0.15 的范围。拾取方式 Auto 先轮流尝试各方式,
+样本足够后选择每秒成功率最高的方式。样本不足时使用原来的固定值。
+"""
+import os
+import sqlite3
+import time
+
+from ok import Logger
+
+logger = Logger.get_logger(__name__)
+
+
+def quantile(values, q):
+    """已排序列表的分位数 (线性插值)。"""
+    if not values:
+        return None
+    position = (len(values) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class EchoSearchStats:
+    """按 Boss 记录打完后找声骸的结果, 用历史分布代替固定的超时、阈值和拾取方式。
+
+    每次找声骸记录: 方式、是否拾取、耗时、YOLO 看到的最高置信度 (拾取失败但看到了即误报)。
+    每次等待下一场战斗记录: 是否掉落、等待时间、是否进入战斗。
+    样本不足 min_samples 时返回默认值; 只使用最近 window 条记录, 适应版本和队伍的变化。
+    """
+
+    def __init__(self, db_path=os.path.join('configs', 'echo_search.db'), window=50, min_samples=8, q=0.95,
+                 margin=1.2, padding=0.3):
+        """
+        Args:
+            db_path (str): 数据库路径。
+            window (int): 使用最近多少条记录。
+            min_samples (int): 至少多少条记录才替换默认值。
+            q (float): 超时取拾取耗时的分位数。
+            margin (float): 超时在分位数上乘的余量。
+            padding (float): 超时在分位数上加的余量 (秒)。
+        """
+        self.db_path = db_path
+        self.window = window
+        self.min_samples = min_samples
+        self.q = q
+        self.margin = margin
+        self.padding = padding
+        self._explore_index = 0
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE IF NOT EXISTS searches (id INTEGER PRIMARY KEY AUTOINCREMENT, boss TEXT, '
+                     'method TEXT, picked INTEGER, duration REAL, confidence REAL, at REAL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS respawns (id INTEGER PRIMARY KEY AUTOINCREMENT, boss TEXT, '
+                     'dropped INTEGER, duration REAL, entered INTEGER, at REAL)')
+        return conn
+
+    def _execute(self, sql, args):
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(sql, args).fetchall()
+            conn.close()
+            return rows
+        except Exception as e:
+            logger.error('echo search stats failed', e)
+            return []
+
+    def record_search(self, boss, method, picked, duration, confidence=0.0):
+        self._execute('INSERT INTO searches (boss, method, picked, duration, confidence, at) VALUES (?, ?, ?, ?, ?, ?)',
+                      (boss, method, int(bool(picked)), duration, confidence, time.time()))
+
+    def record_respawn(self, boss, dropped, duration, entered):
+        self._execute('INSERT INTO respawns (boss, dropped, duration, entered, at) VALUES (?, ?, ?, ?, ?)',
+                      (boss, int(bool(dropped)), duration, int(bool(entered)), time.time()))
+
+    def searches(self, boss, method):
+        """最近的 (picked, duration, confidence), 最新的在前。"""
+        return self._execute('SELECT picked, duration, confidence FROM searches WHERE boss = ? AND method = ? '
+                             'ORDER BY id DESC LIMIT ?', (boss, method, self.window))
+
+    def _bounded(self, value, default, low, high):
+        return max(low, min(high, value)) if value is not None else default
+
+    def time_out(self, boss, method, default, low=1.0, high=None):
+        """找声骸的超时: 最近拾取成功耗时的 p95 加余量, 样本不足返回 default。"""
+        durations = sorted(duration for picked, duration, _ in self.searches(boss, method) if picked)
+        if len(durations) < self.min_samples:
+            return default
+        value = quantile(durations, self.q) * self.margin + self.padding
+        return self._bounded(value, default, low, high or (default * 1.5 if default else value))
+
+    def threshold(self, boss, default, low_delta=0.1, high_delta=0.15):
+        """YOLO 阈值: 保留 95% 成功拾取时的置信度, 同时排除更低置信度的误报; 限制在默认值附近。"""
+        rows = self.searches(boss, 'Yolo')
+        picked = sorted(confidence for p, _, confidence in rows if p and confidence > 0)
+        false_positives = [confidence for p, _, confidence in rows if not p and confidence > 0]
+        if len(picked) < self.min_samples or not false_positives:
+            return default
+        value = quantile(picked, 1 - self.q) - 0.02
+        return self._bounded(value, default, default - low_delta, default + high_delta)
+
+    def respawn_time_out(self, boss, dropped, default, low_ratio=0.3):
+        """等待下一场战斗的超时: 最近进入战斗耗时的 p95 加余量, 样本不足返回 default。"""
+        rows = self._execute('SELECT duration FROM respawns WHERE boss = ? AND dropped = ? AND entered = 1 '
+                             'ORDER BY id DESC LIMIT ?', (boss, int(bool(dropped)), self.window))
+        durations = sorted(row[0] for row in rows)
+        if len(durations) < self.min_samples:
+            return default
+        value = quantile(durations, self.q) * self.margin + self.padding
+        return self._bounded(value, default, default * low_ratio, default * 2)
+
+    def choose_method(self, boss, methods):
+        """选择拾取方式: 样本不足的方式轮流尝试, 之后选每秒成功率最高的方式。"""
+        scores = {}
+        for method in methods:
+            rows = self.searches(boss, method)
+            if len(rows) < self.min_samples:
+                scores = None
+                break
+            success = sum(picked for picked, _, _ in rows) / len(rows)
+            mean_time = sum(duration for _, duration, _ in rows) / len(rows)
+            scores[method] = success / max(mean_time, 0.1)
+        if scores is None:
+            under_sampled = [m for m in methods if len(self.searches(boss, m)) < self.min_samples]
+            self._explore_index += 1
+            return under_sampled[self._explore_index % len(under_sampled)]
+        return max(scores, key=scores.get)
+
+    def summary(self, boss, method):
+        rows = self.searches(boss, method)
+        if not rows:
+            return f'{method}: no data'
+        picked = [duration for p, duration, _ in rows if p]
+        false_positives = sum(1 for p, _, confidence in rows if not p and confidence > 0)
+        p95 = quantile(sorted(picked), self.q)
+        p95_text = f'{p95:.1f}s' if p95 is not None else '-'
+        return f'{method}: {len(picked)}/{len(rows)} picked, p95 {p95_text}, {false_positives} false positives'
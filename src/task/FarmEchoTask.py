@@ -7,6 +7,7 @@ import numpy as np
 
 from ok import Logger, TaskDisabledException, color_range_to_bound
 from src.task.BaseCombatTask import BaseCombatTask, white_color
+from src.task.EchoSearchStats import EchoSearchStats
 from src.task.WWOneTimeTask import WWOneTimeTask
 from ok import find_boxes_by_name
 
@@ -27,13 +28,16 @@ class FarmEchoTask(WWOneTimeTask, BaseCombatTask):
             'Combat Wait Time': 0,
             'Echo Pickup Method': 'Walk',
             'Use Liberation': True,
+            'Team Preset': '',
         })
         self.config_description.update({
             'Boss': 'Select boss profile (includes Combat Wait Time)',
             'Combat Wait Time': 'Wait time before each combat (seconds), overrides Boss profile if set',
             'Use Liberation': 'Do not use Liberation to Save Time',
+            'Team Preset': 'Name of the saved team, the team is verified instead of recognized again, empty to disable',
+            'Echo Pickup Method': 'Auto picks the method and its time outs from the pickup history of this Boss',
         })
-        self.find_echo_method = ['Yolo', 'Run in Circle', 'Walk']
+        self.find_echo_method = ['Yolo', 'Run in Circle', 'Walk', 'Auto']
         self.config_type['Echo Pickup Method'] = {'type': "drop_down", 'options': self.find_echo_method}
         self.boss_list = ['Other', 'Fallacy of No Return', 'Sentry Construct', 'Lorelei', 'Lioness of Glory',
                           'Nightmare: Hecate', 'Fenrico']
@@ -56,6 +60,7 @@ class FarmEchoTask(WWOneTimeTask, BaseCombatTask):
             '罗蕾莱': {'name': r'(罗蕾莱|夜之女皇)', 'set_night': True},
         }
         self.is_revived = False
+        self.echo_stats = EchoSearchStats()
 
     def on_combat_check(self):
         if not self._in_realm:
@@ -76,8 +81,16 @@ class FarmEchoTask(WWOneTimeTask, BaseCombatTask):
         return True
 
     def run(self):
+        self.profiler.start_session(self.__class__.__name__)
+        try:
+            return self.run_farm()
+        finally:
+            self.report_char_profiles()
+
+    def run_farm(self):
         WWOneTimeTask.run(self)
         self.use_liberation = self.config.get('Use Liberation')
+        self.apply_team_preset()
         try:
             return self.do_run()
         except TaskDisabledException as e:
@@ -85,7 +98,7 @@ class FarmEchoTask(WWOneTimeTask, BaseCombatTask):
         except Exception as e:
             logger.error('farm 4c error, try handle monthly card', e)
             if self.handle_claim_button() or self.handle_monthly_card():
-                self.run()
+                self.run_farm()
             else:
                 raise
 
@@ -139,26 +152,45 @@ class FarmEchoTask(WWOneTimeTask, BaseCombatTask):
             self.combat_once(wait_combat_time=0, raise_if_not_found=False)
             if self.is_revived:
                 continue
+            stats_key = self.echo_stats_key()
+            method = self.config.get('Echo Pickup Method', "Yolo")
+            if method == 'Auto':
+                method = self.echo_stats.choose_method(stats_key, self.find_echo_method[:3])
+            search_start = time.time()
+            self.last_echo_confidence = 0
             if self.pick_echo():
                 logger.info(f'farm echo on the face')
                 dropped = True
-            elif self.config.get('Echo Pickup Method', "Yolo") == "Yolo":
+                method = None
+            elif method == "Yolo":
                 dropped = \
-                    self.yolo_find_echo(turn=self._in_realm, use_color=False, time_out=self.yolo_time_out,
-                                        threshold=self.yolo_threshold)[0]
+                    self.yolo_find_echo(turn=self._in_realm, use_color=False,
+                                        time_out=self.echo_stats.time_out(stats_key, method, self.yolo_time_out),
+                                        threshold=self.echo_stats.threshold(stats_key, self.yolo_threshold))[0]
                 logger.info(f'farm echo yolo find {dropped}')
-            elif self.config.get('Echo Pickup Method', "Yolo") == "Run in Circle":
-                dropped = self.run_in_circle_to_find_echo(circle_count=2)
+            elif method == "Run in Circle":
+                dropped = self.run_in_circle_to_find_echo(circle_count=2,
+                                                          time_out=self.echo_stats.time_out(stats_key, method, None))
                 logger.info(f'farm echo walk_circle_find_echo {dropped}')
             else:
-                dropped = self.walk_find_echo()
+                dropped = self.walk_find_echo(time_out=self.echo_stats.time_out(stats_key, method, 3))
                 logger.info(f'farm echo walk_find_echo {dropped}')
+            if method is not None:
+                self.echo_stats.record_search(stats_key, method, dropped, time.time() - search_start,
+                                              self.last_echo_confidence)
+                self.info_set('Echo Search', self.echo_stats.summary(stats_key, method))
             self.incr_drop(dropped)
             if not self.bypass_end_wait:
-                if dropped and not self._has_treasure:
-                    self.wait_until(self.in_combat, raise_if_not_found=False, time_out=5)
-                else:
-                    self.wait_until(self.in_combat, raise_if_not_found=False, time_out=1)
+                dropped_wait = bool(dropped and not self._has_treasure)
+                wait_start = time.time()
+                entered = self.wait_until(self.in_combat, raise_if_not_found=False,
+                                          time_out=self.echo_stats.respawn_time_out(stats_key, dropped_wait,
+                                                                                    5 if dropped_wait else 1))
+                self.echo_stats.record_respawn(stats_key, dropped_wait, time.time() - wait_start, entered)
+
+    def echo_stats_key(self):
+        """找声骸统计按 Boss 配置和是否在副本内区分。"""
+        return f"{self.config.get('Boss')}{'/realm' if self._in_realm else ''}"
 
     def execute_treasure_hunt(self):
         if not self.in_combat() and self.find_treasure_icon() and self.walk_to_treasure_and_restart():
@@ -254,6 +286,10 @@ class FarmEchoTask(WWOneTimeTask, BaseCombatTask):
         self.yolo_time_out = 12 if self._in_realm else 4
 
     def go_to_boss_minimap(self, threshold=0.5, time_out=15):
+        if self.aim_boss is not None and (path := self.map_path(f'boss_{self.aim_boss}')):
+            # 已录制的路径绕开障碍, 走完后剩下的距离仍用小地图标记
+            if self.follow_map_path(path, self.in_combat, time_out=time_out) and self.in_combat():
+                return
         start_time = time.time()
         current_direction = None
         current_adjust = None
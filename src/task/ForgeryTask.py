@@ -17,9 +17,11 @@ class ForgeryTask(DomainTask):
         self.description = 'Farms the selected Forgery Challenge. Must be able to teleport (F2).'
         self.default_config = {
             'Which Forgery Challenge to Farm': 1,  # starts with 1
+            'Record Entry Route': False,
         }
         self.config_description = {
             'Which Forgery Challenge to Farm': 'The Forgery Challenge number in the F2 list.',
+            'Record Entry Route': 'Record your manual walk from the teleport to the entrance, replayed on later runs.',
         }
         self.stamina_once = 40
         self.total_number = 15
@@ -71,7 +73,9 @@ class ForgeryTask(DomainTask):
         self.wait_click_travel()
         self.wait_in_team_and_world(time_out=self.teleport_timeout)
         self.sleep(1)
-        self.walk_until_f(time_out=2)
+        if self.walk_route(f'forgery_{serial_number}', self.find_f_with_text,
+                           record=self.config.get('Record Entry Route', False)) is None:
+            self.walk_until_f(time_out=2)
         self.pick_f()
         self.wait_click_feature('gray_button_challenge', relative_x=4, raise_if_not_found=True,
                                 click_after_delay=1, threshold=0.6, after_sleep=1, time_out=20)
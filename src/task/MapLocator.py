@@ -0,0 +1,293 @@
+"""小地图定位: 把小地图截图与本地缓存的大地图切片做特征匹配, 得到角色的世界坐标和朝向。
+
+切片目录 (默认 configs/map_tiles) 由 MapTileIndex.build 从拼接好的大地图生成, 文件名为 <x>_<y>.png,
+x, y 为切片左上角在大地图上的像素坐标。特征 (ORB 或 AKAZE, 均为二进制描述子) 首次使用时计算并缓存到
+index_<detector>.npz, 切片有改动时自动重建。路径 (世界坐标的路点列表) 保存在同目录的 paths.json。
+跟踪时只匹配上次位置 search_radius 以内的切片, 丢失定位后才搜索全部切片。没有切片时一切照旧。
+"""
+import json
+import math
+import os
+import re
+import time
+
+import cv2
+import numpy as np
+
+from ok import Logger
+
+logger = Logger.get_logger(__name__)
+
+tile_folder = os.path.join('configs', 'map_tiles')
+tile_name_re = re.compile(r'^(-?\d+)_(-?\d+)\.png$')
+
+
+def create_detector(detector, features=500):
+    if detector == 'akaze':
+        return cv2.AKAZE_create()
+    return cv2.ORB_create(nfeatures=features)
+
+
+class MapPose:
+    """一次定位结果: 世界坐标 (大地图像素), 朝向 (度, 与 calculate_angle_clockwise 相同, 0 为向右, 顺时针为正)。"""
+    __slots__ = ('x', 'y', 'heading', 'rotation', 'scale', 'inliers', 'at')
+
+    def __init__(self, x, y, heading, rotation, scale, inliers, at):
+        self.x = x
+        self.y = y
+        self.heading = heading  # 由移动方向估计, 未知时为 None
+        self.rotation = rotation  # 小地图相对大地图的旋转
+        self.scale = scale
+        self.inliers = inliers
+        self.at = at
+
+    def distance_to(self, x, y):
+        return math.hypot(x - self.x, y - self.y)
+
+    def bearing_to(self, x, y):
+        return math.degrees(math.atan2(y - self.y, x - self.x)) % 360
+
+    def __repr__(self):
+        heading = 'None' if self.heading is None else f'{self.heading:.0f}'
+        return f'MapPose({self.x:.0f}, {self.y:.0f}, heading {heading}, inliers {self.inliers})'
+
+
+class MapTileIndex:
+    """大地图切片的特征索引, 按切片网格做空间索引, 只匹配上次位置附近的切片。"""
+
+    def __init__(self, folder=tile_folder, detector='orb', features=500):
+        self.folder = folder
+        self.detector = detector
+        self.features = features
+        self.tile_size = 0
+        self.tiles = {}  # (x, y) -> (points Nx2 世界坐标, descriptors)
+        self._all = None  # 全图搜索用的合并特征
+
+    @property
+    def cache_path(self):
+        return os.path.join(self.folder, f'index_{self.detector}.npz')
+
+    @staticmethod
+    def available(folder=tile_folder):
+        return os.path.isdir(folder) and any(tile_name_re.match(name) for name in os.listdir(folder))
+
+    @staticmethod
+    def build(world_map, folder=tile_folder, tile_size=512, overlap=64):
+        """把拼接好的大地图切成有重叠的切片保存。
+
+        Args:
+            world_map (np.ndarray): BGR 或灰度的大地图, 比例需与游戏内小地图一致。
+            tile_size (int): 切片边长。
+            overlap (int): 相邻切片的重叠像素, 避免特征落在切片边缘。
+        """
+        os.makedirs(folder, exist_ok=True)
+        gray = world_map if world_map.ndim == 2 else cv2.cvtColor(world_map, cv2.COLOR_BGR2GRAY)
+        step = tile_size - overlap
+        count = 0
+        for y in range(0, max(1, gray.shape[0] - overlap), step):
+            for x in range(0, max(1, gray.shape[1] - overlap), step):
+                tile = gray[y:y + tile_size, x:x + tile_size]
+                if tile.std() < 2:  # 空白区域
+                    continue
+                cv2.imwrite(os.path.join(folder, f'{x}_{y}.png'), tile)
+                count += 1
+        logger.info(f'built {count} map tiles in {folder}')
+        return count
+
+    def _tile_files(self):
+        files = []
+        for name in sorted(os.listdir(self.folder)):
+            if match := tile_name_re.match(name):
+                files.append((int(match.group(1)), int(match.group(2)), name))
+        return files
+
+    def _signature(self, files):
+        mtimes = ','.join(f'{name}:{os.path.getmtime(os.path.join(self.folder, name)):.0f}' for _, _, name in files)
+        return f'{self.detector}:{self.features}:{mtimes}'
+
+    def load(self):
+        """读取特征缓存, 缓存过期时重新计算。返回切片数量。"""
+        files = self._tile_files()
+        signature = self._signature(files)
+        if os.path.exists(self.cache_path):
+            try:
+                with np.load(self.cache_path) as data:
+                    if str(data['signature']) == signature:
+                        self._from_arrays(data)
+                        return len(self.tiles)
+            except Exception as e:
+                logger.error('load map index failed', e)
+        start = time.time()
+        detector = create_detector(self.detector, self.features)
+        self.tiles.clear()
+        for x, y, name in files:
+            tile = cv2.imread(os.path.join(self.folder, name), cv2.IMREAD_GRAYSCALE)
+            if tile is None:
+                continue
+            self.tile_size = max(self.tile_size, tile.shape[0], tile.shape[1])
+            keypoints, descriptors = detector.detectAndCompute(tile, None)
+            if descriptors is None:
+                continue
+            points = np.float32([kp.pt for kp in keypoints]) + np.float32([x, y])
+            self.tiles[(x, y)] = (points, descriptors)
+        self._all = None
+        np.savez_compressed(self.cache_path, signature=signature, tile_size=self.tile_size,
+                            keys=np.int32(list(self.tiles.keys())).reshape(-1, 2),
+                            counts=np.int32([len(p) for p, _ in self.tiles.values()]),
+                            points=np.concatenate([p for p, _ in self.tiles.values()]) if self.tiles else np.zeros((0, 2)),
+                            descriptors=np.concatenate([d for _, d in self.tiles.values()]) if self.tiles else
+                            np.zeros((0, 32), np.uint8))
+        logger.info(f'indexed {len(self.tiles)} map tiles in {time.time() - start:.1f}s')
+        return len(self.tiles)
+
+    def _from_arrays(self, data):
+        self.tile_size = int(data['tile_size'])
+        self.tiles.clear()
+        self._all = None
+        points, descriptors = data['points'], data['descriptors']
+        offset = 0
+        for (x, y), count in zip(data['keys'], data['counts']):
+            self.tiles[(int(x), int(y))] = (points[offset:offset + count], descriptors[offset:offset + count])
+            offset += count
+
+    def near(self, x, y, radius):
+        """与以 (x, y) 为圆心、radius 为半径的区域相交的切片的合并特征。"""
+        points, descriptors = [], []
+        for (tx, ty), (p, d) in self.tiles.items():
+            nearest_x = min(max(x, tx), tx + self.tile_size)
+            nearest_y = min(max(y, ty), ty + self.tile_size)
+            if (nearest_x - x) ** 2 + (nearest_y - y) ** 2 <= radius ** 2:
+                points.append(p)
+                descriptors.append(d)
+        if not points:
+            return None, None
+        return np.concatenate(points), np.concatenate(descriptors)
+
+    def everything(self):
+        if self._all is None and self.tiles:
+            self._all = (np.concatenate([p for p, _ in self.tiles.values()]),
+                         np.concatenate([d for _, d in self.tiles.values()]))
+        return self._all or (None, None)
+
+    def paths(self):
+        """paths.json 中保存的路径 {名称: [[x, y], ...]}。"""
+        path = os.path.join(self.folder, 'paths.json')
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_path(self, name, waypoints):
+        paths = self.paths()
+        paths[name] = [[round(x), round(y)] for x, y in waypoints]
+        with open(os.path.join(self.folder, 'paths.json'), 'w', encoding='utf-8') as f:
+            json.dump(paths, f, indent=2)
+
+
+class MapLocator:
+    """用 MapTileIndex 定位小地图。
+
+    有上次位置时只匹配附近 search_radius 内的切片 (局部跟踪), 失败或超过 lost_after 秒没有定位时在全部切片中搜索。
+    变换用 RANSAC 估计相似变换 (平移+旋转+缩放), 小地图中心即角色位置; 朝向由连续定位的位移方向估计。
+    """
+
+    def __init__(self, index, search_radius=400, ratio=0.8, min_inliers=12, lost_after=3.0, min_motion=4.0,
+                 center_mask=0.12, scale_range=None):
+        """
+        Args:
+            index (MapTileIndex): 已加载的切片索引。
+            search_radius (float): 局部跟踪时匹配的范围 (世界像素)。
+            ratio (float): Lowe ratio test 阈值。
+            min_inliers (int): RANSAC 内点少于此值视为定位失败。
+            lost_after (float): 超过此秒数没有成功定位时改为全图搜索。
+            min_motion (float): 位移大于此值 (世界像素) 时才更新朝向。
+            center_mask (float): 遮挡小地图中心 (角色箭头) 的半径, 相对小地图边长。
+            scale_range (tuple, optional): 允许的缩放范围 (小地图像素 -> 世界像素), 用于排除错误匹配。
+        """
+        self.index = index
+        self.search_radius = search_radius
+        self.ratio = ratio
+        self.min_inliers = min_inliers
+        self.lost_after = lost_after
+        self.min_motion = min_motion
+        self.center_mask = center_mask
+        self.scale_range = scale_range
+        self.detector = create_detector(index.detector, index.features)
+        self.matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+        self.mask = None
+        self.last = None
+        self.heading = None
+        self.located = 0
+        self.failed = 0
+        self.global_searches = 0
+        self.elapsed = 0.0
+
+    def reset(self):
+        self.last = None
+        self.heading = None
+
+    def _mask(self, shape):
+        if self.mask is None or self.mask.shape != shape:
+            h, w = shape
+            self.mask = np.zeros(shape, np.uint8)
+            cv2.circle(self.mask, (w // 2, h // 2), int(min(h, w) * 0.48), 255, -1)  # 去掉圆形小地图外框
+            cv2.circle(self.mask, (w // 2, h // 2), int(min(h, w) * self.center_mask), 0, -1)
+        return self.mask
+
+    def locate(self, minimap):
+        """定位一张小地图截图 (BGR 或灰度), 失败返回 None。"""
+        start = time.perf_counter()
+        try:
+            return self._locate(minimap)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def _locate(self, minimap):
+        gray = minimap if minimap.ndim == 2 else cv2.cvtColor(minimap, cv2.COLOR_BGR2GRAY)
+        keypoints, descriptors = self.detector.detectAndCompute(gray, self._mask(gray.shape))
+        if descriptors is None or len(keypoints) < self.min_inliers:
+            self.failed += 1
+            return None
+        now = time.time()
+        pose = None
+        if self.last is not None and now - self.last.at < self.lost_after:
+            world_points, world_descriptors = self.index.near(self.last.x, self.last.y, self.search_radius)
+            pose = self._match(gray.shape, keypoints, descriptors, world_points, world_descriptors, now)
+        if pose is None:
+            self.global_searches += 1
+            world_points, world_descriptors = self.index.everything()
+            pose = self._match(gray.shape, keypoints, descriptors, world_points, world_descriptors, now)
+        if pose is None:
+            self.failed += 1
+            return None
+        if self.last is not None and pose.distance_to(self.last.x, self.last.y) >= self.min_motion:
+            self.heading = self.last.bearing_to(pose.x, pose.y)
+        pose.heading = self.heading
+        self.last = pose
+        self.located += 1
+        return pose
+
+    def _match(self, shape, keypoints, descriptors, world_points, world_descriptors, now):
+        if world_descriptors is None or len(world_descriptors) < 2:
+            return None
+        matches = self.matcher.knnMatch(descriptors, world_descriptors, k=2)
+        good = [m[0] for m in matches if len(m) == 2 and m[0].distance < self.ratio * m[1].distance]
+        if len(good) < self.min_inliers:
+            return None
+        src = np.float32([keypoints[m.queryIdx].pt for m in good])
+        dst = world_points[[m.trainIdx for m in good]].astype(np.float32)
+        matrix, inliers = cv2.estimateAffinePartial2D(src, dst, method=cv2.RANSAC, ransacReprojThreshold=5.0)
+        if matrix is None or inliers is None or int(inliers.sum()) < self.min_inliers:
+            return None
+        scale = math.hypot(matrix[0, 0], matrix[1, 0])
+        if self.scale_range and not self.scale_range[0] <= scale <= self.scale_range[1]:
+            return None
+        h, w = shape
+        x, y = matrix @ np.float32([w / 2, h / 2, 1])
+        rotation = math.degrees(math.atan2(matrix[1, 0], matrix[0, 0]))
+        return MapPose(float(x), float(y), None, rotation, scale, int(inliers.sum()), now)
+
+    def stats(self):
+        total = self.located + self.failed
+        average = self.elapsed / total * 1000 if total else 0
+        return f'{self.located}/{total} located, {self.global_searches} global, {average:.1f}ms'
@@ -0,0 +1,75 @@
+"""批量 OCR: BaseWWTask.ocr_batch 把多个区域拼接成一张画布, 用 onnxocr 做一次检测和一次批量识别,
+再按文字框中心的 y 坐标分回各区域。其他 OCR 库对每个区域调用一次 ocr()。
+"""
+import cv2
+import numpy as np
+
+from ok import Box
+
+
+def scale_crop(crop, frame_height, target_height):
+    """与 ok 的 resize_image 相同的缩放规则, 返回 (图像, 缩放比例)。"""
+    if target_height > 0 and frame_height >= 1.5 * target_height:
+        scale = target_height / frame_height
+        crop = cv2.resize(crop, (max(1, round(crop.shape[1] * scale)), max(1, round(crop.shape[0] * scale))),
+                          interpolation=cv2.INTER_AREA)
+        return crop, scale
+    return crop, 1.0
+
+
+def stack_crops(crops, pad=16, max_height=960):
+    """把多个区域竖直拼接成若干张画布, 一张画布只需要一次文字检测和一次批量识别。
+
+    检测模型会把长边缩放到 max_height 左右, 画布超过这个高度时另起一张, 避免小字被缩小。
+
+    Args:
+        crops (list[np.ndarray]): BGR 图像。
+        pad (int): 区域之间的空白像素, 防止跨区域的文字被连成一行。
+        max_height (int): 单张画布的最大高度。
+
+    Returns:
+        list[tuple[np.ndarray, list[tuple[int, int, int]]]]: [(画布, [(crop 下标, 起始 y, 高度)])]
+    """
+    groups = []
+    current, height = [], pad
+    for index, crop in enumerate(crops):
+        if current and height + crop.shape[0] + pad > max_height:
+            groups.append(current)
+            current, height = [], pad
+        current.append(index)
+        height += crop.shape[0] + pad
+    if current:
+        groups.append(current)
+    canvases = []
+    for group in groups:
+        width = max(crops[i].shape[1] for i in group) + pad * 2
+        height = sum(crops[i].shape[0] + pad for i in group) + pad
+        canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        placements = []
+        y = pad
+        for i in group:
+            h, w = crops[i].shape[:2]
+            canvas[y:y + h, pad:pad + w] = crops[i]
+            placements.append((i, y, h))
+            y += h + pad
+        canvases.append((canvas, placements))
+    return canvases
+
+
+def split_results(result, placements, pad=16):
+    """把 onnxocr 对画布的结果按文字中心分回各区域, 坐标换算为区域内坐标。
+
+    Returns:
+        dict[int, list[Box]]: crop 下标 -> 区域内的文字框。
+    """
+    boxes = {i: [] for i, _, _ in placements}
+    for pos, (text, confidence) in result or []:
+        width, height = round(pos[2][0] - pos[0][0]), round(pos[2][1] - pos[0][1])
+        if width <= 0 or height <= 0:
+            continue
+        center_y = (pos[0][1] + pos[2][1]) / 2
+        for i, y, h in placements:
+            if y <= center_y < y + h:
+                boxes[i].append(Box(pos[0][0] - pad, pos[0][1] - y, width, height, confidence, text))
+                break
+    return boxes
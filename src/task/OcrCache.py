@@ -0,0 +1,76 @@
+"""OCR 结果缓存: BaseWWTask.ocr 调用框架 OCR 前先查缓存, 命中率和节省的时间显示为 OCR Cache。
+
+对原始裁剪区域和预处理参数一起哈希, 与对预处理后的图像哈希等价且更快。传入 cache=False 或 log/screenshot 时不使用缓存。
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def match_key(match):
+    """OCR match 参数的可哈希表示。"""
+    if match is None:
+        return None
+    if isinstance(match, re.Pattern):
+        return 're', match.pattern, match.flags
+    if isinstance(match, (list, tuple)):
+        return tuple(match_key(m) for m in match)
+    return str(match)
+
+
+def option_key(value):
+    if callable(value):
+        return getattr(value, '__qualname__', repr(value))
+    return value
+
+
+class OcrCache:
+    """OCR 结果的 LRU 缓存, 键为裁剪区域的内容哈希 + 区域位置 + match 和预处理参数。
+
+    只有区域像素完全没有变化时才命中 (例如静止的菜单界面反复 wait_ocr), 因此不会返回过期的结果。
+    返回的 Box 为副本, 调用方修改不会影响缓存。ocr_async 在工作线程中写入, 读写加锁。
+    """
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self.entries = OrderedDict()  # key -> (boxes, OCR 耗时)
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0.0
+        self.lock = threading.Lock()
+
+    def key(self, crop, box, match, options):
+        digest = hashlib.blake2b(np.ascontiguousarray(crop), digest_size=16).digest()
+        return (digest, crop.shape, box.x, box.y, box.width, box.height, match_key(match),
+                tuple(sorted((k, option_key(v)) for k, v in options.items())))
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            boxes, elapsed = entry
+            self.saved += elapsed
+        return [b.copy() for b in boxes]
+
+    def put(self, key, boxes, elapsed):
+        with self.lock:
+            self.entries[key] = ([b.copy() for b in boxes], elapsed)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0
+        return f'{rate:.0%} of {total}, saved {self.saved:.1f}s'
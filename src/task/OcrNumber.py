@@ -0,0 +1,83 @@
+"""只识别不检测的数字读取: BaseWWTask.read_number 把固定区域中的一行数字裁剪到文字、缩放到识别模型的输入高度,
+只运行 onnxocr 的识别模型, 解码时只允许 chars 中的字符。
+
+用于体力、声骸数量和数据融合次数; 多行的大区域 (例如每日的 /180 进度) 仍使用 ocr_batch。
+"""
+import cv2
+import numpy as np
+
+NUMBER_CHARS = '0123456789/'
+_decoders = {}
+
+
+def tight_crop(crop, margin=0.25):
+    """按 Otsu 二值化找到文字的外接矩形, 四周留 margin 倍文字高度的空白。
+
+    Returns:
+        tuple[np.ndarray, tuple[int, int, int, int]] | None: (文字图像, 区域内的 (x, y, 宽, 高)), 没有文字时返回 None。
+    """
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    foreground = binary > 0
+    if foreground.mean() > 0.5:  # 深色文字, 取反
+        foreground = ~foreground
+    rows = np.flatnonzero(foreground.any(axis=1))
+    cols = np.flatnonzero(foreground.any(axis=0))
+    if len(rows) == 0 or len(cols) == 0 or rows[-1] == rows[0]:
+        return None
+    pad = max(2, round((rows[-1] - rows[0] + 1) * margin))
+    y, to_y = max(0, rows[0] - pad), min(crop.shape[0], rows[-1] + 1 + pad)
+    x, to_x = max(0, cols[0] - pad), min(crop.shape[1], cols[-1] + 1 + pad)
+    return crop[y:to_y, x:to_x], (x, y, to_x - x, to_y - y)
+
+
+def to_height(image, height):
+    """等比缩放到识别模型的输入高度, 缩小时用 INTER_AREA 保留笔画。"""
+    if image.shape[0] == height:
+        return image
+    width = max(1, round(image.shape[1] * height / image.shape[0]))
+    interpolation = cv2.INTER_AREA if image.shape[0] > height else cv2.INTER_CUBIC
+    return cv2.resize(image, (width, height), interpolation=interpolation)
+
+
+class ConstrainedDecoder:
+    """CTC 解码时只允许 chars 中的字符: 其余字符的概率置零, 保留 blank (下标 0)。
+
+    例如 '/' 被识别成 'l' 或 '1' 被识别成 'I' 时, 解码为允许字符中概率最高的那个。
+    """
+
+    def __init__(self, decoder, chars):
+        self.decoder = decoder
+        self.keep = np.array([i == 0 or c in chars for i, c in enumerate(decoder.character)])
+
+    def __call__(self, preds):
+        if isinstance(preds, (tuple, list)):
+            preds = preds[-1]
+        preds = np.where(self.keep, preds, 0)
+        return self.decoder.decode(preds.argmax(axis=2), preds.max(axis=2), is_remove_duplicate=True)
+
+
+def constrained_decoder(decoder, chars=NUMBER_CHARS):
+    key = id(decoder), chars
+    if key not in _decoders:
+        _decoders[key] = ConstrainedDecoder(decoder, chars)
+    return _decoders[key]
+
+
+def recognize_line(recognizer, image, chars=NUMBER_CHARS):
+    """跳过文字检测, 只对单行文字图像运行 onnxocr 的识别模型。
+
+    Args:
+        recognizer: onnxocr 的 TextRecognizer (ONNXPaddleOcr.text_recognizer)。
+        image (np.ndarray): 已裁剪到文字的 BGR 图像。
+        chars (str): 允许的字符。
+
+    Returns:
+        tuple[str, float]: (文字, 置信度)。
+    """
+    height = recognizer.rec_image_shape[1]
+    image = to_height(image, height)
+    # 识别模型的宽度是动态的, 按文字本身的宽度输入, 不补齐到默认的 rec_image_shape 宽度
+    norm = recognizer.resize_norm_img(image, max(1.0, image.shape[1] / height))[np.newaxis, :]
+    preds = recognizer.run(recognizer.rec_output_name, recognizer.get_input_feed(recognizer.rec_input_name, norm))
+    return constrained_decoder(recognizer.postprocess_op, chars)(preds[0])[0]
@@ -0,0 +1,114 @@
+"""OCR 工作线程池: start_ok 调用 prewarm_ocr 启动 ocr_workers 个 onnxocr 实例 (默认 2, 设为 0 关闭)。
+
+BaseWWTask.ocr_async 返回 Future, 任务可以在识别期间继续操作; 服务未就绪时在调用线程中直接 ocr()。
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from ok import Logger
+
+logger = Logger.get_logger(__name__)
+_service = None
+_service_lock = threading.Lock()
+
+
+class OcrService:
+    """在工作线程中持有若干个独立的 onnxocr 实例, 供 ocr_async 在后台识别。
+
+    框架的 OCR 实例在任务线程中第一次 ocr 时才创建, 首次识别 (openvino 编译模型) 要几秒;
+    这里在 start 时就在工作线程中创建并用空白图预热, 任务代码提交识别后可以继续操作。
+    每个工作线程独占一个实例, onnxruntime/openvino 的会话不在线程间共享。
+    """
+
+    def __init__(self, ocr_config, workers=2):
+        """
+        Args:
+            ocr_config (dict): config.py 中的 'ocr' 配置。
+            workers (int): 工作线程和 OCR 实例的数量。
+        """
+        self.ocr_config = ocr_config or {}
+        self.workers = workers
+        self.engines = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ocr_service')
+        self.warmed = []
+        self.submitted = 0
+        self.busy_time = 0.0
+
+    @property
+    def supported(self):
+        return self.ocr_config.get('lib') == 'onnxocr'
+
+    def create_engine(self):
+        from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+        params = self.ocr_config.get('params') or {}
+        return ONNXPaddleOcr(use_angle_cls=False, use_openvino=params.get('use_openvino', False))
+
+    def _warm_up(self):
+        start = time.time()
+        try:
+            engine = self.create_engine()
+            engine.ocr(np.zeros((64, 256, 3), dtype=np.uint8))
+        except Exception as e:
+            logger.error('ocr service warm up failed', e)
+            raise
+        self.engines.put(engine)
+        logger.info(f'ocr service engine ready in {time.time() - start:.2f}s')
+
+    def start(self):
+        """在工作线程中创建并预热所有实例, 不阻塞调用方。"""
+        if self.supported and not self.warmed:
+            self.warmed = [self.executor.submit(self._warm_up) for _ in range(self.workers)]
+        return self
+
+    @property
+    def ready(self):
+        """至少有一个实例预热完成。"""
+        return any(future.done() and future.exception() is None for future in self.warmed)
+
+    def wait_ready(self, time_out=None):
+        for future in self.warmed:
+            future.result(timeout=time_out)
+
+    def _run(self, fn, args):
+        engine = self.engines.get()
+        start = time.time()
+        try:
+            return fn(engine, *args)
+        finally:
+            self.busy_time += time.time() - start
+            self.engines.put(engine)
+
+    def submit(self, fn, *args):
+        """在空闲的实例上运行 fn(engine, *args), 返回 Future。"""
+        self.submitted += 1
+        return self.executor.submit(self._run, fn, args)
+
+    def stats(self):
+        return f'{self.submitted} async, busy {self.busy_time:.1f}s'
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def start_ocr_service(ocr_config, workers=2):
+    """创建全局 OcrService 并开始预热, 重复调用返回同一个实例。"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = OcrService(ocr_config, workers).start()
+    return _service
+
+
+def get_ocr_service():
+    return _service
+
+
+def completed(result):
+    """已完成的 Future, 服务不可用时同步识别的结果也以 Future 返回。"""
+    future = Future()
+    future.set_result(result)
+    return future
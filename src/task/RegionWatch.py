@@ -0,0 +1,101 @@
+"""OCR 等待的区域变化检测: BaseWWTask.wait_ocr (以及 wait_click_ocr) 只在区域变化并稳定后才 OCR, 传入 watch=False 时每帧 OCR。
+
+强制 OCR 的间隔不超过调用方 time_out 的四分之一。auto_login 在多次 handle_update_restart 之间复用同一个 RegionWatch,
+登录界面不变时不再重复识别。OCR 次数显示为 Region Watch。
+"""
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+
+class _State:
+    def __init__(self, thumb):
+        self.last = thumb
+        self.read = None
+        self.changed_at = 0.0
+        self.read_at = 0.0
+        self.result = []
+
+
+class RegionWatch:
+    """wait_ocr 的区域变化检测: 只在区域变化后又稳定 settle_time 秒时才 OCR。
+
+    每帧把区域缩小为 cell 像素一格的灰度缩略图 (最宽 max_width 格), 与上一帧和上次 OCR 时的缩略图逐格比较,
+    有 min_changed 个以上格子的差值超过 threshold 即视为变化 (不用整体平均, 大区域中一个字的变化不会被平均掉):
+    - 第一次看到区域时立即 OCR;
+    - 与上次 OCR 时相同: 不 OCR, 返回上次的结果;
+    - 正在变化或变化后未稳定: 不 OCR, 返回 [] (界面切换中);
+    - 距上次 OCR 超过 max_interval 秒时强制 OCR, 防止持续动画的区域永远不识别。
+    按区域分别记录, 同一个 RegionWatch 可以在多次 wait_ocr 之间复用。
+    """
+
+    def __init__(self, settle_time=0.2, threshold=16, min_changed=1, max_interval=2.0, cell=4, max_width=320):
+        """
+        Args:
+            settle_time (float): 区域停止变化多少秒后 OCR。
+            threshold (int): 缩略图单个格子的灰度差超过此值视为该格变化。
+            min_changed (int): 变化的格子数达到此值视为区域变化。
+            max_interval (float): 两次 OCR 的最长间隔。
+            cell (int): 缩略图每格对应的像素数, 应小于一个字。
+            max_width (int): 缩略图最大宽度, 大区域的格子相应变大。
+        """
+        self.settle_time = settle_time
+        self.threshold = threshold
+        self.min_changed = min_changed
+        self.max_interval = max_interval
+        self.cell = cell
+        self.max_width = max_width
+        self.states = {}
+        self.reads = 0
+        self.skipped = 0
+
+    def thumb(self, crop):
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+        width = max(1, min(self.max_width, gray.shape[1] // self.cell))
+        height = max(1, round(width * gray.shape[0] / max(1, gray.shape[1])))
+        return cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+
+    def changed(self, a, b):
+        return b is None or np.count_nonzero(cv2.absdiff(a, b) > self.threshold) >= self.min_changed
+
+    @contextmanager
+    def limit_interval(self, time_out):
+        """在一次 wait_ocr 期间把 max_interval 限制为 time_out 的四分之一, 超时前持续变化的区域也能识别几次。"""
+        max_interval = self.max_interval
+        if time_out > 0:
+            self.max_interval = min(max_interval, time_out / 4)
+        try:
+            yield self
+        finally:
+            self.max_interval = max_interval
+
+    def read(self, key, crop, ocr):
+        """区域需要识别时调用 ocr() 并记录结果, 否则返回上次的结果或 []。
+
+        Args:
+            key: 区域的标识, 例如 box 的坐标。
+            crop (np.ndarray): 当前帧中的区域。
+            ocr (callable): 无参数, 返回 OCR 结果。
+        """
+        now = time.time()
+        thumb = self.thumb(crop)
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = _State(thumb)
+        elif self.changed(thumb, state.last):
+            state.changed_at = now
+        state.last = thumb
+        unchanged = state.read is not None and not self.changed(thumb, state.read)
+        settled = now - state.changed_at >= self.settle_time
+        if now - state.read_at < self.max_interval and (unchanged or not settled):
+            self.skipped += 1
+            return [box.copy() for box in state.result] if unchanged else []
+        state.read, state.read_at = thumb, now
+        state.result = ocr() or []
+        self.reads += 1
+        return state.result
+
+    def stats(self):
+        return f'{self.reads} ocr, {self.skipped} skipped'
@@ -0,0 +1,242 @@
+"""录制和回放固定路线 (例如从传送点走到副本入口)。
+
+路线文件 configs/routes/<name>.json:
+    {"version": 1, "events": [[秒, "down"/"up", 按键]], "checkpoints": [[秒, 小地图灰度缩略图 PNG base64]]}
+按键为 w/a/s/d/space/shift, 以及 "right" (鼠标右键, 奔跑)。录制时不要转动镜头, 回放前会中键回正镜头。
+BaseWWTask.walk_route 按录制时间回放, 每个检查点用 cv2.phaseCorrelate 估计小地图偏移并短按 w/a/s/d 修正。
+在无音区、凝素领域或模拟领域中打开 Record Entry Route, 手动走一次入口即可录制; 没有录制的路线仍用原来的走法。
+"""
+import base64
+import json
+import math
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from ok import Logger
+
+logger = Logger.get_logger(__name__)
+
+route_folder = os.path.join('configs', 'routes')
+route_keys = {'w', 'a', 's', 'd', 'space', 'shift'}
+thumb_size = 64
+
+
+def route_path(name):
+    return os.path.join(route_folder, f'{name}.json')
+
+
+def minimap_thumb(task):
+    """小地图的灰度缩略图。"""
+    image = task.get_box_by_name('box_minimap').crop_frame(task.frame)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (thumb_size, thumb_size), interpolation=cv2.INTER_AREA)
+
+
+def encode_thumb(thumb):
+    return base64.b64encode(cv2.imencode('.png', thumb)[1].tobytes()).decode('ascii')
+
+
+def decode_thumb(text):
+    return cv2.imdecode(np.frombuffer(base64.b64decode(text), dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+def minimap_shift(recorded, current):
+    """当前小地图相对录制时的平移 (缩略图像素) 和相关度, 平移方向即回到录制位置需要移动的方向。"""
+    window = cv2.createHanningWindow((thumb_size, thumb_size), cv2.CV_32F)
+    (dx, dy), response = cv2.phaseCorrelate(np.float32(recorded), np.float32(current), window)
+    return dx, dy, response
+
+
+class Route:
+    """一条录制的路线。"""
+
+    def __init__(self, name, events=None, checkpoints=None):
+        self.name = name
+        self.events = events or []  # [(t, 'down'/'up', key)]
+        self.checkpoints = checkpoints or []  # [(t, thumb)]
+
+    @property
+    def duration(self):
+        return self.events[-1][0] if self.events else 0
+
+    def save(self):
+        os.makedirs(route_folder, exist_ok=True)
+        with open(route_path(self.name), 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'events': [[round(t, 3), action, key] for t, action, key in self.events],
+                       'checkpoints': [[round(t, 3), encode_thumb(thumb)] for t, thumb in self.checkpoints]},
+                      f, separators=(',', ':'))
+        logger.info(f'saved route {self.name} {len(self.events)} events {len(self.checkpoints)} checkpoints')
+
+    @classmethod
+    def load(cls, name):
+        """读取路线, 不存在返回 None。"""
+        path = route_path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(name, [tuple(event) for event in data['events']],
+                   [(t, decode_thumb(thumb)) for t, thumb in data['checkpoints']])
+
+
+class RouteRecorder:
+    """录制玩家手动走一次路线时的按键和小地图检查点。
+
+    按键通过 pynput 全局监听 (ok 已依赖 pynput), 小地图在调用 poll 时每 checkpoint_interval 秒记录一次。
+    """
+
+    def __init__(self, task, name, checkpoint_interval=1.0):
+        self.task = task
+        self.route = Route(name)
+        self.checkpoint_interval = checkpoint_interval
+        self.start = 0
+        self.last_checkpoint = -checkpoint_interval
+        self.pressed = set()
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def _on_key(self, key, action):
+        name = getattr(key, 'char', None) or getattr(key, 'name', None)
+        if name is None:
+            return
+        name = name.lower()
+        if name.startswith('shift'):
+            name = 'shift'
+        if name not in route_keys:
+            return
+        with self._lock:
+            if action == 'down':
+                if name in self.pressed:
+                    return  # 长按的重复按键事件
+                self.pressed.add(name)
+            else:
+                self.pressed.discard(name)
+            self.route.events.append((time.time() - self.start, action, name))
+
+    def _on_click(self, x, y, button, pressed):
+        if getattr(button, 'name', None) == 'right':
+            with self._lock:
+                self.route.events.append((time.time() - self.start, 'down' if pressed else 'up', 'right'))
+
+    def begin(self):
+        from pynput import keyboard, mouse
+        self.start = time.time()
+        self._listeners = [
+            keyboard.Listener(on_press=lambda key: self._on_key(key, 'down'),
+                              on_release=lambda key: self._on_key(key, 'up')),
+            mouse.Listener(on_click=self._on_click),
+        ]
+        for listener in self._listeners:
+            listener.start()
+        self.poll()
+
+    def poll(self):
+        """在任务循环中每帧调用, 记录小地图检查点。"""
+        now = time.time() - self.start
+        if now - self.last_checkpoint >= self.checkpoint_interval:
+            self.last_checkpoint = now
+            self.route.checkpoints.append((now, minimap_thumb(self.task)))
+
+    def end(self, save=True):
+        for listener in self._listeners:
+            listener.stop()
+        with self._lock:
+            end = time.time() - self.start
+            for key in list(self.pressed):  # 结束时仍按住的键
+                self.route.events.append((end, 'up', key))
+            self.pressed.clear()
+        if save and self.route.events:
+            self.route.save()
+        return self.route
+
+
+class RoutePlayer:
+    """按录制的时间回放路线, 在检查点用小地图相位相关估计偏移并短按方向键修正。"""
+
+    def __init__(self, task, route, min_response=0.2, tolerance=3, seconds_per_pixel=0.04, max_correction=0.4):
+        """
+        Args:
+            min_response (float): 相位相关度低于此值时认为小地图无法比对, 不修正。
+            tolerance (float): 偏移小于此值 (缩略图像素) 时不修正。
+            seconds_per_pixel (float): 每像素偏移对应的修正按键时间。
+            max_correction (float): 单次修正的最长按键时间。
+        """
+        self.task = task
+        self.route = route
+        self.min_response = min_response
+        self.tolerance = tolerance
+        self.seconds_per_pixel = seconds_per_pixel
+        self.max_correction = max_correction
+        self.corrections = 0
+
+    def _press(self, action, key):
+        if key == 'right':
+            if action == 'down':
+                self.task.mouse_down(key='right')
+            else:
+                self.task.mouse_up(key='right')
+        elif action == 'down':
+            self.task.send_key_down(key)
+        else:
+            self.task.send_key_up(key)
+
+    def _correct(self, thumb, held):
+        dx, dy, response = minimap_shift(thumb, minimap_thumb(self.task))
+        distance = math.hypot(dx, dy)
+        if response < self.min_response or distance < self.tolerance:
+            return 0
+        bearing = math.degrees(math.atan2(dy, dx)) % 360
+        angle = self.task.get_angle_between(self.task.get_my_angle(), bearing)
+        if -45 <= angle <= 45:
+            key = 'w'
+        elif 45 < angle <= 135:
+            key = 'd'
+        elif -135 < angle <= -45:
+            key = 'a'
+        else:
+            key = 's'
+        if key in held:
+            return 0
+        duration = min(self.max_correction, distance * self.seconds_per_pixel)
+        logger.debug(f'route {self.route.name} off by {distance:.1f}px, correct {key} {duration:.2f}s')
+        self.corrections += 1
+        self.task.send_key_down(key)
+        self.task.sleep(duration)
+        self.task.send_key_up(key)
+        return duration
+
+    def play(self):
+        """回放路线, 返回修正用掉的时间。"""
+        self.task.middle_click(after_sleep=0.2)
+        events = list(self.route.events)
+        checkpoints = list(self.route.checkpoints)
+        held = set()
+        start = time.time()
+        shifted = 0.0  # 修正耗时, 之后的事件顺延
+        try:
+            while events or checkpoints:
+                next_event = events[0][0] if events else math.inf
+                next_checkpoint = checkpoints[0][0] if checkpoints else math.inf
+                at = min(next_event, next_checkpoint)
+                wait = start + shifted + at - time.time()
+                if wait > 0:
+                    self.task.sleep(wait)
+                if next_event <= next_checkpoint:
+                    _, action, key = events.pop(0)
+                    self._press(action, key)
+                    if action == 'down':
+                        held.add(key)
+                    else:
+                        held.discard(key)
+                else:
+                    _, thumb = checkpoints.pop(0)
+                    self.task.next_frame()
+                    shifted += self._correct(thumb, held)
+        finally:
+            for key in held:
+                self._press('up', key)
+        return shifted
@@ -17,11 +17,13 @@ class SimulationTask(DomainTask):
         self.description = 'Farms the selected Simulation Challenge. Must be able to teleport (F2).'
         self.default_config = {
             'Material Selection': 'Shell Credit',
+            'Record Entry Route': False,
         }
         material_option_list = ['Resonator EXP', 'Weapon EXP', 'Shell Credit']
         self.config_type['Material Selection'] = {'type': 'drop_down', 'options': material_option_list}
         self.config_description = {
             'Material Selection': 'Resonator EXP / Weapon EXP / Shell Credit',
+            'Record Entry Route': 'Record your manual walk from the teleport to the entrance, replayed on later runs.',
         }
         self.stamina_once = 40
 
@@ -58,7 +60,9 @@ class SimulationTask(DomainTask):
         self.wait_click_travel()
         self.wait_in_team_and_world(time_out=self.teleport_timeout)
         self.sleep(1)
-        self.walk_until_f(time_out=1)
+        if self.walk_route('simulation', self.find_f_with_text,
+                           record=self.config.get('Record Entry Route', False)) is None:
+            self.walk_until_f(time_out=1)
         self.pick_f()
         if selection == 'Resonator EXP':
             index = 0
@@ -0,0 +1,48 @@
+"""模拟量转向: 按住 w 前进, 按目标方向偏差比例转动镜头, 代替 a/d 切换和中键微调。
+
+_navigate_based_on_angle 在 ±80° 以内、walk_to_yolo_echo 在声骸位于前方时使用; 大角度转身和后退仍用按键。
+默认关闭, 需要设置 BaseWWTask.analog_steering = True 并使用支持相对鼠标移动的前台交互;
+首次使用时由 calibrate_camera 测量 camera_pixels_per_degree, 测量失败则退回按键转向。
+"""
+import math
+
+
+class SteeringController:
+    """按住 w 前进时, 按目标方向偏差比例转动镜头 (PD 控制), 代替松开/按下 a、d 的离散转向。
+
+    error 为目标相对前进方向的角度 (度, 右正左负), 输出为本帧镜头需要转动的角度。
+    """
+
+    def __init__(self, kp=0.6, kd=0.05, deadband=3.0, max_turn=25.0):
+        """
+        Args:
+            kp (float): 比例系数, 每帧转动偏差的比例。
+            kd (float): 微分系数, 抑制过冲。
+            deadband (float): 偏差小于此角度时不转动。
+            max_turn (float): 每帧最多转动的角度。
+        """
+        self.kp = kp
+        self.kd = kd
+        self.deadband = deadband
+        self.max_turn = max_turn
+        self.last_error = None
+        self.turns = 0
+
+    def reset(self):
+        self.last_error = None
+
+    def update(self, error, dt=1 / 30):
+        """返回本帧需要转动的角度, 0 表示不需要转动。"""
+        derivative = 0 if self.last_error is None or dt <= 0 else (error - self.last_error) / dt
+        self.last_error = error
+        if abs(error) < self.deadband:
+            return 0.0
+        turn = self.kp * error + self.kd * derivative * dt
+        turn = max(-self.max_turn, min(self.max_turn, turn))
+        self.turns += 1
+        return turn
+
+
+def screen_offset_to_angle(offset_ratio, fov=90.0):
+    """屏幕水平偏移 (相对屏幕宽度, 中心为 0, 右正) 换算为偏航角 (度)。"""
+    return math.degrees(math.atan(2 * offset_ratio * math.tan(math.radians(fov / 2))))
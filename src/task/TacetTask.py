@@ -20,6 +20,7 @@ class TacetTask(WWOneTimeTask, BaseCombatTask):
             'Which Tacet Suppression to Farm': 1,  # starts with 1
             'Max Stamina to Spend': 0,  # 0 = unlimited, otherwise stops after spending this much
             'Prefer Single Spend': False,  # force single-spend even if stamina is enough for double
+            'Record Entry Route': False,
         }
         self.total_number = 14
         self.target_enemy_time_out = 10
@@ -28,6 +29,7 @@ class TacetTask(WWOneTimeTask, BaseCombatTask):
             'Which Tacet Suppression to Farm': 'The Tacet Suppression number in the F2 list.',
             'Max Stamina to Spend': 'Stop after spending this amount; 0 = no cap.',
             'Prefer Single Spend': 'Force single spend even if stamina is enough for double.',
+            'Record Entry Route': 'Record your manual walk from the teleport to the boss, replayed on later runs.',
         }
         self.default_config = default_config
         self.door_walk_method = {  # starts with 0
@@ -78,15 +80,18 @@ class TacetTask(WWOneTimeTask, BaseCombatTask):
             self.wait_click_travel()
             self.wait_in_team_and_world(time_out=120)
             self.sleep(2)
+            record_route = config.get('Record Entry Route', False)
             if self.door_walk_method.get(index) is not None:
-                for method in self.door_walk_method.get(index):
-                    self.send_key_down(method[0])
-                    self.sleep(method[1])
-                    self.send_key_up(method[0])
-                    self.sleep(0.05)
-                self.run_until(self.in_combat, 'w', time_out=10, running=True)
+                if self.walk_route(f'tacet_{index}', self.in_combat, record=record_route) is None:
+                    for method in self.door_walk_method.get(index):
+                        self.send_key_down(method[0])
+                        self.sleep(method[1])
+                        self.send_key_up(method[0])
+                        self.sleep(0.05)
+                    self.run_until(self.in_combat, 'w', time_out=10, running=True)
             else:
-                self.walk_until_f(time_out=4, backward_time=0, raise_if_not_found=True)
+                if self.walk_route(f'tacet_{index}', self.find_f_with_text, record=record_route) is None:
+                    self.walk_until_f(time_out=4, backward_time=0, raise_if_not_found=True)
                 self.pick_f(handle_claim=False)
             self.combat_once()
             self.sleep(3)
@@ -96,7 +101,9 @@ class TacetTask(WWOneTimeTask, BaseCombatTask):
             self.info_incr('used stamina', used)
             spent += used
             self.sleep(4)
+            rewards = self.ocr_async(*self.reward_region)  # 后台识别奖励, 同时继续点击
             self.click(0.51, 0.84, after_sleep=3)
+            self.log_rewards(rewards)
             if not can_continue:
                 return self.not_enough_stamina()
             must_use -= used
@@ -0,0 +1,155 @@
+"""走向目标时的目标跟踪: 在两次全图检测之间用模板匹配跟随目标, 位置和大小经过 alpha-beta 滤波。
+
+walk_to_yolo_echo 和 do_walk_to_box 按滤波后的位置转向, YOLO 调用和 a/d 切换都更少。
+"""
+import time
+
+import cv2
+
+from ok import Box
+
+
+class AlphaBetaFilter:
+    """一维 alpha-beta 滤波 (常速度模型), 平滑位置并估计速度。"""
+    __slots__ = ('alpha', 'beta', 'value', 'velocity')
+
+    def __init__(self, alpha=0.5, beta=0.1):
+        self.alpha = alpha
+        self.beta = beta
+        self.value = None
+        self.velocity = 0.0
+
+    def reset(self, value=None):
+        self.value = value
+        self.velocity = 0.0
+
+    def predict(self, dt):
+        if self.value is None:
+            return None
+        return self.value + self.velocity * dt
+
+    def update(self, measurement, dt):
+        if self.value is None:
+            self.reset(measurement)
+            return measurement
+        predicted = self.predict(dt)
+        residual = measurement - predicted
+        self.value = predicted + self.alpha * residual
+        if dt > 0:
+            self.velocity += self.beta * residual / dt
+        return self.value
+
+
+class TargetTracker:
+    """跟踪移动中屏幕上的目标 (例如声骸), 减少全图检测并平滑转向。
+
+    每 detect_interval 帧或跟踪可信度低于 min_confidence 时才调用 detect (例如 YOLO),
+    其余帧在预测位置附近用模板匹配跟踪; 位置和大小经过 alpha-beta 滤波, 转向使用滤波后的位置。
+    """
+
+    def __init__(self, detect, detect_interval=4, min_confidence=0.6, patch_ratio=0.05, search_ratio=2.5,
+                 alpha=0.5, beta=0.1, max_jump_ratio=0.2):
+        """
+        Args:
+            detect (callable): detect() 返回 Box 列表, 按优先级排序。
+            detect_interval (int): 两次检测之间最多跟踪的帧数。
+            min_confidence (float): 模板匹配可信度低于此值时重新检测。
+            patch_ratio (float): 模板边长 (相对屏幕高度)。
+            search_ratio (float): 搜索区域边长相对模板边长的倍数。
+            max_jump_ratio (float): 检测结果与预测位置的最大距离 (相对屏幕高度), 超过时视为新目标。
+        """
+        self.detect = detect
+        self.detect_interval = detect_interval
+        self.min_confidence = min_confidence
+        self.patch_ratio = patch_ratio
+        self.search_ratio = search_ratio
+        self.max_jump_ratio = max_jump_ratio
+        self.filters = [AlphaBetaFilter(alpha, beta) for _ in range(4)]  # 中心 x, 中心 y, 宽, 高
+        self.template = None
+        self.confidence = 0.0
+        self.since_detect = 0
+        self.last_time = 0
+        self.detections = 0
+        self.tracks = 0
+
+    def reset(self):
+        for f in self.filters:
+            f.reset()
+        self.template = None
+        self.confidence = 0.0
+        self.since_detect = 0
+
+    @property
+    def tracking(self):
+        return self.filters[0].value is not None
+
+    def update(self, frame):
+        """处理一帧, 返回滤波后的目标 Box, 没有目标返回 None。"""
+        now = time.time()
+        dt = now - self.last_time if self.last_time else 0
+        self.last_time = now
+        measurement = None
+        if self.tracking and self.since_detect < self.detect_interval and self.confidence >= self.min_confidence:
+            measurement = self._track(frame, dt)
+        if measurement is None:
+            measurement = self._detect(frame, dt)
+            if measurement is None:
+                self.reset()
+                return None
+        self.since_detect += 1
+        x, y, w, h = (f.update(m, dt) for f, m in zip(self.filters, measurement))
+        return Box(x - w / 2, y - h / 2, w, h, confidence=self.confidence, name='tracked_target')
+
+    def _detect(self, frame, dt):
+        self.detections += 1
+        boxes = self.detect()
+        if not boxes:
+            return None
+        target = boxes[0]
+        if self.tracking:
+            # 优先选择与预测位置最近的检测结果, 避免在多个目标之间跳动
+            px, py = self.filters[0].predict(dt), self.filters[1].predict(dt)
+            target = min(boxes, key=lambda b: (b.center()[0] - px) ** 2 + (b.center()[1] - py) ** 2)
+            cx, cy = target.center()
+            if ((cx - px) ** 2 + (cy - py) ** 2) ** 0.5 > frame.shape[0] * self.max_jump_ratio:
+                self.reset()
+        cx, cy = target.center()
+        self._grab_template(frame, cx, cy)
+        self.confidence = 1.0
+        self.since_detect = 0
+        return cx, cy, target.width, target.height
+
+    def _patch_size(self, frame):
+        return max(8, int(frame.shape[0] * self.patch_ratio))
+
+    def _grab_template(self, frame, cx, cy):
+        size = self._patch_size(frame)
+        x, y = int(cx - size / 2), int(cy - size / 2)
+        if x < 0 or y < 0 or x + size > frame.shape[1] or y + size > frame.shape[0]:
+            self.template = None
+            return
+        self.template = cv2.cvtColor(frame[y:y + size, x:x + size], cv2.COLOR_BGR2GRAY)
+
+    def _track(self, frame, dt):
+        if self.template is None:
+            return None
+        self.tracks += 1
+        size = self.template.shape[0]
+        half = int(size * self.search_ratio / 2)
+        px, py = self.filters[0].predict(dt), self.filters[1].predict(dt)
+        x1, y1 = max(0, int(px) - half), max(0, int(py) - half)
+        x2, y2 = min(frame.shape[1], int(px) + half), min(frame.shape[0], int(py) + half)
+        if x2 - x1 <= size or y2 - y1 <= size:
+            return None
+        region = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+        result = cv2.matchTemplate(region, self.template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        self.confidence = max_val
+        if max_val < self.min_confidence:
+            return None
+        cx, cy = x1 + max_loc[0] + size / 2, y1 + max_loc[1] + size / 2
+        self._grab_template(frame, cx, cy)  # 目标随移动变大, 每次更新模板
+        return cx, cy, self.filters[2].value, self.filters[3].value
+
+    def stats(self):
+        return f'conf {self.confidence:.2f} detect {self.detections} track {self.tracks}'
@@ -0,0 +1,26 @@
+from src.combat.AdaptiveInterval import AdaptiveInterval
+
+
+def test_grows_while_stable_and_shrinks_on_change():
+    scheduler = AdaptiveInterval()
+    for _ in range(10):
+        scheduler.record(0.01, False)
+    assert scheduler.interval == scheduler.max_interval
+    assert scheduler.record(0.01, True) == scheduler.max_interval * scheduler.shrink
+
+
+def test_low_hp_caps_at_min_interval():
+    scheduler = AdaptiveInterval()
+    for _ in range(10):
+        scheduler.record(0.01, False)
+    assert scheduler.record(0.01, False, hp_ratio=0.1) == scheduler.min_interval
+    assert scheduler.record(0.01, False, hp_ratio=0.5) > scheduler.min_interval
+
+
+def test_slow_checks_raise_the_lower_bound():
+    scheduler = AdaptiveInterval()
+    for _ in range(3):
+        scheduler.record(0.01, True)
+    assert scheduler.interval == scheduler.min_interval
+    scheduler.record(0.2, False)
+    assert scheduler.interval >= scheduler.avg_cost * scheduler.cost_ratio
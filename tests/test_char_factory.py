@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('ok')
+
+from src.char import CharFactory  # noqa: E402
+from src.char.BaseChar import BaseChar  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在独立进程中测量导入耗时和内存; 'eager' 导入所有角色模块, 即改为按需导入之前的行为
+BENCH = """
+import json, time, tracemalloc
+tracemalloc.start()
+start = time.perf_counter()
+from src.char import CharFactory
+{extra}
+cost = time.perf_counter() - start
+current, peak = tracemalloc.get_traced_memory()
+print(json.dumps({{'ms': cost * 1000, 'mb': current / 1024 / 1024, 'peak_mb': peak / 1024 / 1024,
+                  'classes': len(CharFactory.loaded_char_classes())}}))
+"""
+CASES = {
+    'lazy': '',
+    'team of 3': "[CharFactory.get_char_class(n) for n in ('char_yinlin', 'char_zani', 'char_phoebe')]",
+    'eager': '[CharFactory.get_char_class(n) for n in CharFactory.char_names]',
+}
+
+
+def bench(extra):
+    result = subprocess.run([sys.executable, '-c', BENCH.format(extra=extra)], cwd=ROOT, capture_output=True,
+                            text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_get_char_class_resolves_every_name():
+    for name, info in CharFactory.char_dict.items():
+        cls = CharFactory.get_char_class(name)
+        assert issubclass(cls, BaseChar), name
+        assert cls.__name__ == info['module'], name
+
+
+def test_lazy_import_is_cheaper_than_eager():
+    results = {case: bench(extra) for case, extra in CASES.items()}
+    for case, result in results.items():
+        print(f"{case:10s} {result['ms']:.1f}ms {result['mb']:.2f}MB peak {result['peak_mb']:.2f}MB "
+              f"{result['classes']} classes")
+    modules = len({info['module'] for info in CharFactory.char_dict.values()})
+    assert results['lazy']['classes'] == 0
+    assert results['eager']['classes'] == modules
+    assert results['lazy']['ms'] < results['eager']['ms']
+    assert results['lazy']['mb'] < results['team of 3']['mb'] < results['eager']['mb']
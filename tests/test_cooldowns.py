@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+pytest.importorskip('ok')
+
+from src.combat.Cooldowns import CooldownModel  # noqa: E402
+
+
+class _Task:
+    def time_elapsed_accounting_for_freeze(self, start):
+        return time.time() - start
+
+
+class _Char:
+    index = 0
+    res_cd = 10
+    echo_cd = 20
+    liberation_cd = 99999999
+
+
+@pytest.fixture
+def model():
+    return CooldownModel(_Task(), margin=0.5, max_age=3.0, ready_max_age=1.0, min_interval=0.4)
+
+
+def test_cast_is_trusted_until_close_to_ready(model):
+    now = time.time()
+    model.on_cast(_Char(), 'resonance', at=now - 1)
+    assert not model.needs_reconcile(0, 'resonance')
+    model.on_cast(_Char(), 'resonance', at=now - 9.8)
+    assert model.needs_reconcile(0, 'resonance')
+    model.on_cast(_Char(), 'resonance', at=now - 20)
+    assert not model.needs_reconcile(0, 'resonance')
+
+
+def test_unknown_base_cd_needs_ocr(model):
+    model.on_cast(_Char(), 'liberation')
+    assert model.needs_reconcile(0, 'liberation')
+
+
+def test_skill_key_on_ready_prediction_drops_it(model):
+    model.on_cast(_Char(), 'echo', at=time.time() - 30)
+    model.on_key(0, 'echo')
+    assert model.needs_reconcile(0, 'echo')
+
+
+def test_ocr_ready_is_rechecked_after_ready_max_age(model):
+    now = time.time()
+    model.observe(0, {'resonance': 0}, at=now - 0.5)
+    assert not model.needs_reconcile(0, 'resonance')
+    model.observe(0, {'resonance': 0}, at=now - 1.5)
+    assert model.needs_reconcile(0, 'resonance')
+
+
+def test_dark_icon_on_ready_prediction_needs_ocr(model):
+    model.on_cast(_Char(), 'resonance', at=time.time() - 30)
+    assert not model.needs_reconcile(0, 'resonance')
+    model.check_probe(0, 'resonance', probe_ready=False)
+    assert model.needs_reconcile(0, 'resonance')
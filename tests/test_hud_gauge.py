@@ -0,0 +1,119 @@
+import math
+import timeit
+
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+np = pytest.importorskip('numpy')
+pytest.importorskip('ok')
+
+from ok import color_range_to_bound  # noqa: E402
+from src.char.HudGauge import count_segments_from_right, remove_short_runs, ring_color_percentage  # noqa: E402
+
+
+# 移到 HudGauge 之前各角色中的实现, 用于确认结果不变
+def legacy_ring(cropped, target_color, mask_r1_ratio, mask_r2_ratio):
+    h, w = cropped.shape[:2]
+    r1 = int(math.floor(h * mask_r1_ratio))
+    r2 = int(math.ceil(h * mask_r2_ratio))
+    center = (w // 2, h // 2)
+    mask = np.zeros((h, w), dtype=np.uint8)
+    cv2.circle(mask, center, r2, 255, -1)
+    cv2.circle(mask, center, r1, 0, -1)
+    lower_bound, upper_bound = color_range_to_bound(target_color)
+    combined = cv2.bitwise_and(cv2.inRange(cropped, lower_bound, upper_bound), mask)
+    return cv2.countNonZero(combined) / cv2.countNonZero(mask)
+
+
+def legacy_judge(gray, min_freq, max_freq, min_amp):
+    height, width = gray.shape[:]
+    if height == 0 or width < 64 or not np.array_equal(np.unique(gray), [0, 255]):
+        return 0
+    profile = np.sum(gray == 255, axis=0).astype(np.float32)
+    profile -= np.mean(profile)
+    n = np.abs(np.fft.fft(profile))
+    amplitude = 0
+    frequncy = 0
+    for i in range(1, width):
+        if n[i] > amplitude:
+            amplitude = n[i]
+            frequncy = i
+    return (min_freq <= frequncy <= max_freq) or amplitude >= min_amp
+
+
+def legacy_forte_num(image, num, min_freq, max_freq, min_amp):
+    step = int(image.shape[1] / num)
+    forte = num
+    left = step * (forte - 1)
+    while forte > 0:
+        if legacy_judge(image[:, left:left + step], min_freq, max_freq, min_amp):
+            break
+        left -= step
+        forte -= 1
+    return forte
+
+
+def legacy_remove_short_stripes(gray, threshold):
+    result = gray.copy()
+    height, width = gray.shape
+    for y in range(height):
+        row = gray[y]
+        x = 0
+        while x < width:
+            if row[x] == 255:
+                start = x
+                while x < width and row[x] == 255:
+                    x += 1
+                if x - start < threshold:
+                    result[y, start:x] = 0
+            else:
+                x += 1
+    return result
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def stripes(rng):
+    stripes = np.zeros((20, 546), dtype=np.uint8)
+    stripes[:, :400] = np.where((np.arange(400) // 6) % 2 == 0, 255, 0)
+    stripes[rng.random(stripes.shape) < 0.02] = 255
+    return stripes
+
+
+def test_ring_color_percentage_matches_legacy(rng):
+    icon = rng.integers(0, 256, (107, 107, 3), dtype=np.uint8)
+    color = {'r': (100, 255), 'g': (100, 255), 'b': (100, 255)}
+    assert ring_color_percentage(icon, color, 0.425, 0.49) == pytest.approx(legacy_ring(icon, color, 0.425, 0.49))
+
+
+def test_count_segments_matches_legacy(stripes):
+    assert count_segments_from_right(stripes, 4, 9, 11, 400) == legacy_forte_num(stripes, 4, 9, 11, 400)
+
+
+def test_remove_short_runs_matches_legacy(stripes):
+    assert np.array_equal(remove_short_runs(stripes, 4), legacy_remove_short_stripes(stripes, 4))
+
+
+def per_call_ms(fn, number=200):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1000
+
+
+def test_probes_are_faster_than_legacy(rng, stripes):
+    icon = rng.integers(0, 256, (107, 107, 3), dtype=np.uint8)
+    color = {'r': (100, 255), 'g': (100, 255), 'b': (100, 255)}
+    cases = [
+        ('ring mask percentage', lambda: legacy_ring(icon, color, 0.425, 0.49),
+         lambda: ring_color_percentage(icon, color, 0.425, 0.49)),
+        ('forte segment count', lambda: legacy_forte_num(stripes, 4, 9, 11, 400),
+         lambda: count_segments_from_right(stripes, 4, 9, 11, 400)),
+        ('remove short stripes', lambda: legacy_remove_short_stripes(stripes, 4),
+         lambda: remove_short_runs(stripes, 4)),
+    ]
+    for name, before, after in cases:
+        before_ms, after_ms = per_call_ms(before), per_call_ms(after)
+        print(f'{name:24s} before {before_ms:8.4f}ms after {after_ms:8.4f}ms x{before_ms / after_ms:.1f}')
+        assert after_ms < before_ms, name
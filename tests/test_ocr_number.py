@@ -0,0 +1,69 @@
+import glob
+import os
+import timeit
+
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+np = pytest.importorskip('numpy')
+
+from src.task.OcrNumber import NUMBER_CHARS, ConstrainedDecoder, recognize_line, tight_crop, to_height  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'ocr_number')
+
+
+class _Decoder:
+    character = ['blank'] + list('0123456789/lIO')
+
+    def decode(self, index, prob, is_remove_duplicate=False):
+        result = []
+        for row, p in zip(index, prob):
+            keep = np.ones(len(row), dtype=bool)
+            keep[1:] = row[1:] != row[:-1]
+            keep &= row != 0
+            result.append((''.join(self.character[i] for i in row[keep]), float(np.mean(p[keep]))))
+        return result
+
+
+def test_constrained_decoder_picks_allowed_chars():
+    # '1', 'l' (应为 '/'), '2', 'O' (应为 '0'), 每个字符后接 blank
+    decoder = _Decoder()
+    preds = np.zeros((1, 8, len(decoder.character)), np.float32)
+    for t, (best, second) in enumerate([('1', None), ('l', '/'), ('2', None), ('O', '0')]):
+        preds[0, t * 2, decoder.character.index(best)] = 0.6
+        if second:
+            preds[0, t * 2, decoder.character.index(second)] = 0.35
+        preds[0, t * 2 + 1, 0] = 0.9
+    assert decoder.decode(preds.argmax(axis=2), preds.max(axis=2))[0][0] == '1l2O'
+    assert ConstrainedDecoder(decoder, NUMBER_CHARS)(preds)[0][0] == '1/20'
+
+
+def test_tight_crop_finds_text():
+    canvas = np.full((60, 300, 3), 30, np.uint8)
+    cv2.putText(canvas, '120/240', (120, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    line, (x, y, w, h) = tight_crop(canvas)
+    assert line.shape[:2] == (h, w)
+    assert 100 <= x < 120 and w < 180
+    assert to_height(line, 48).shape[0] == 48
+    assert tight_crop(np.full((60, 300, 3), 30, np.uint8)) is None
+
+
+def test_recognize_line_is_faster_than_ocr():
+    onnx_paddleocr = pytest.importorskip('onnxocr.onnx_paddleocr')
+    engine = onnx_paddleocr.ONNXPaddleOcr(use_angle_cls=False, use_gpu=False, use_dml=False, use_openvino=False)
+    full_ms = fast_ms = 0
+    for path in sorted(glob.glob(os.path.join(FIXTURE, '*.png'))):
+        crop = cv2.imread(path)
+        expected = os.path.basename(path)[:-4].replace('_', '/')  # 文件名即数字, '_' 代表 '/'
+
+        def full():
+            return engine.ocr(crop, cls=False)[0][0][1][0]
+
+        def fast():
+            return recognize_line(engine.text_recognizer, tight_crop(crop)[0])[0]
+
+        assert full() == fast() == expected
+        full_ms += min(timeit.repeat(full, number=5, repeat=3)) / 5 * 1000
+        fast_ms += min(timeit.repeat(fast, number=5, repeat=3)) / 5 * 1000
+    # 本机 (CPU) 每张 34-42ms 对 6-18ms
+    assert fast_ms * 2 < full_ms, (fast_ms, full_ms)
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from src.task import RegionWatch as region_watch  # noqa: E402
+
+
+class _Text(str):
+    def copy(self):
+        return self
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(region_watch, 'time', SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_reads_only_after_the_region_settles(clock):
+    rng = np.random.default_rng(2)
+    old, new = rng.integers(0, 255, (2, 60, 300, 3), dtype=np.uint8)
+    watch = region_watch.RegionWatch(settle_time=0.2, max_interval=2.0)
+    calls = []
+
+    def ocr(text):
+        return lambda: calls.append(text) or [_Text(text)]
+
+    assert watch.read('box', old, ocr('old')) == ['old']
+    clock.now += 0.1
+    assert watch.read('box', old, ocr('old')) == ['old']  # 没有变化, 返回上次的结果
+    clock.now += 0.1
+    assert watch.read('box', new, ocr('new')) == []  # 刚变化, 还未稳定
+    clock.now += 0.1
+    assert watch.read('box', new, ocr('new')) == []
+    clock.now += 0.15
+    assert watch.read('box', new, ocr('new')) == ['new']
+    assert calls == ['old', 'new']
+    assert watch.reads == 2 and watch.skipped == 3
+
+
+def test_forces_a_read_after_max_interval(clock):
+    crop = np.zeros((20, 100, 3), dtype=np.uint8)
+    watch = region_watch.RegionWatch(max_interval=2.0)
+    calls = []
+    watch.read('box', crop, lambda: calls.append(1) or [])
+    clock.now += 1
+    watch.read('box', crop, lambda: calls.append(1) or [])
+    clock.now += 1.5
+    watch.read('box', crop, lambda: calls.append(1) or [])
+    assert len(calls) == 2
+
+
+def test_small_glyph_change_in_a_large_box(clock):
+    cv2 = pytest.importorskip('cv2')
+    before = np.full((80, 1200, 3), 40, dtype=np.uint8)
+    cv2.putText(before, 'x 12', (1000, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    after = np.full((80, 1200, 3), 40, dtype=np.uint8)
+    cv2.putText(after, 'x 13', (1000, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    watch = region_watch.RegionWatch(settle_time=0.2, max_interval=10)
+    assert np.mean(cv2.absdiff(watch.thumb(before), watch.thumb(after))) < 2  # 整体平均差值检测不到
+    assert watch.read('box', before, lambda: [_Text('12')]) == ['12']
+    clock.now += 0.1
+    assert watch.read('box', after, lambda: [_Text('13')]) == []
+    clock.now += 0.3
+    assert watch.read('box', after, lambda: [_Text('13')]) == ['13']
+
+
+def test_limit_interval_clamps_to_time_out(clock):
+    crop = np.zeros((20, 100, 3), dtype=np.uint8)
+    watch = region_watch.RegionWatch(max_interval=30)
+    calls = []
+    with watch.limit_interval(1):
+        for _ in range(5):
+            watch.read('box', crop, lambda: calls.append(1) or [])
+            clock.now += 0.3
+    assert watch.max_interval == 30
+    assert len(calls) == 5
@@ -0,0 +1,52 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('ok')
+
+from src.combat.Replay import Recording, ReplayClock, replay  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'replay')
+
+
+def test_recording_index():
+    recording = Recording(FIXTURE)
+    assert len(recording) == 3
+    assert recording.duration == 0.5
+    assert [recording.index_at(t) for t in (0, 0.3, 0.6)] == [0, 1, 2]
+    assert int(recording.frame(1)[0, 0, 0]) == 100
+
+
+def test_patch_modules_only_touches_task_modules():
+    from src.combat import CombatCheck
+    clock = ReplayClock()
+    with clock.patch_modules():
+        clock.sleep(2)
+        assert CombatCheck.time.time() == clock.start + 2
+        assert time.time() < clock.start  # time 模块本身不变
+    assert CombatCheck.time is time
+
+
+def test_replay_fixture():
+    from src.combat import CombatCheck
+    from src.task.BaseCombatTask import BaseCombatTask
+    seen = {'frames': []}
+
+    def action(task):
+        seen['virtual'] = CombatCheck.time.time()
+        task.send_key('1')
+        task.sleep(0.1)
+        while True:
+            task.next_frame()
+            seen['frames'].append(int(task.frame[0, 0, 0]))
+
+    report = replay(BaseCombatTask, FIXTURE, action=action, fps=4)
+    assert report.error is None
+    assert seen['virtual'] == ReplayClock().start
+    # 0.12s 后每帧推进 0.25s: 0.37s -> 第 2 帧, 0.62s -> 第 3 帧, 0.87s 超过录制时长
+    assert seen['frames'] == [100, 200]
+    assert report.frames == 2
+    assert any(event[1:] == ('key', '1') for event in report.events)
+    assert CombatCheck.time is time
@@ -0,0 +1,75 @@
+import math
+import random
+
+import pytest
+
+from src.task.Steering import SteeringController, screen_offset_to_angle
+
+# 合成的行走轨迹: 角色以 5m/s 前进, 目标在 10~30m 外、前方 ±80° 内。
+# 离散策略模拟 _navigate_based_on_angle 的小幅调整: 偏差 10~80° 时斜向走 0.1s 再中键回正 (3 次输入 + 0.21s 等待);
+# 连续策略每帧 (30fps) 按 SteeringController.update 转动镜头, 每次转动计 1 次输入。
+SPEED, FRAME_DT, ARRIVE, TIME_LIMIT = 5.0, 1 / 30, 1.5, 20
+
+
+def simulate(target, discrete):
+    x = y = heading = t = 0.0
+    events = 0
+    controller = SteeringController()
+    while t < TIME_LIMIT:
+        dx, dy = target[0] - x, target[1] - y
+        if math.hypot(dx, dy) < ARRIVE:
+            return t, events
+        error = (math.degrees(math.atan2(dx, dy)) - heading + 180) % 360 - 180
+        step = FRAME_DT
+        if discrete:
+            if 10 <= abs(error) <= 80:
+                heading += math.copysign(45, error)  # 斜向移动, 回正后朝向移动方向
+                step = 0.21
+                events += 3
+        else:
+            turn = controller.update(error, FRAME_DT)
+            if turn:
+                heading += turn
+                events += 1
+        x += math.sin(math.radians(heading)) * SPEED * step
+        y += math.cos(math.radians(heading)) * SPEED * step
+        t += step
+    return t, events
+
+
+@pytest.fixture
+def trajectories():
+    rng = random.Random(7)
+    targets = []
+    for _ in range(200):
+        bearing, distance = math.radians(rng.uniform(-80, 80)), rng.uniform(10, 30)
+        targets.append((math.sin(bearing) * distance, math.cos(bearing) * distance))
+    return targets
+
+
+def test_analogue_steering_needs_fewer_inputs_and_less_time(trajectories):
+    discrete = [simulate(target, True) for target in trajectories]
+    analogue = [simulate(target, False) for target in trajectories]
+    assert not any(t >= TIME_LIMIT for t, _ in analogue)
+    discrete_time = sum(t for t, _ in discrete) / len(discrete)
+    analogue_time = sum(t for t, _ in analogue) / len(analogue)
+    discrete_inputs = sum(e for _, e in discrete) / len(discrete)
+    analogue_inputs = sum(e for _, e in analogue) / len(analogue)
+    print(f'discrete {discrete_time:.2f}s {discrete_inputs:.1f} inputs, '
+          f'analogue {analogue_time:.2f}s {analogue_inputs:.1f} inputs')
+    assert analogue_inputs < discrete_inputs
+    assert analogue_time < discrete_time
+
+
+def test_controller_deadband_and_clamp():
+    controller = SteeringController(deadband=3, max_turn=25)
+    assert controller.update(2) == 0
+    assert controller.update(170) == 25
+    assert controller.update(-170) == -25
+    assert controller.turns == 2
+
+
+def test_screen_offset_to_angle():
+    assert screen_offset_to_angle(0) == 0
+    assert screen_offset_to_angle(0.5) == pytest.approx(45)
+    assert screen_offset_to_angle(-0.25) == pytest.approx(-screen_offset_to_angle(0.25))